@@ -23,8 +23,13 @@ class PyDetector {
     }
     mmdeploy_detection_t* detection{};
     int* result_count{};
-    auto status = mmdeploy_detector_apply(detector_, mats.data(), (int)mats.size(), &detection,
-                                          &result_count);
+    int status{};
+    {
+      // `imgs` outlives the call, other python threads may run meanwhile
+      py::gil_scoped_release _;
+      status = mmdeploy_detector_apply(detector_, mats.data(), (int)mats.size(), &detection,
+                                       &result_count);
+    }
     if (status != MMDEPLOY_SUCCESS) {
       throw std::runtime_error("failed to apply detector, code: " + std::to_string(status));
     }
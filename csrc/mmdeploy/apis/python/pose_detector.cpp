@@ -57,8 +57,13 @@ class PyPoseDetector {
     }
 
     mmdeploy_pose_detection_t* detection{};
-    auto status = mmdeploy_pose_detector_apply_bbox(detector_, mats.data(), (int)mats.size(),
-                                                    boxes.data(), bbox_count.data(), &detection);
+    int status{};
+    {
+      // `imgs` outlives the call, other python threads may run meanwhile
+      py::gil_scoped_release _;
+      status = mmdeploy_pose_detector_apply_bbox(detector_, mats.data(), (int)mats.size(),
+                                                 boxes.data(), bbox_count.data(), &detection);
+    }
     if (status != MMDEPLOY_SUCCESS) {
       throw std::runtime_error("failed to apply pose_detector, code: " + std::to_string(status));
     }
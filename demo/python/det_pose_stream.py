@@ -0,0 +1,200 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import argparse
+import os
+import queue
+import threading
+
+import cv2
+import numpy as np
+from det_pose import visualize
+from mmdeploy_runtime import Detector, PoseDetector
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='show how to run top-down pose estimation on a stream '
+        'with SDK Python API')
+    parser.add_argument('device_name', help='name of device, cuda or cpu')
+    parser.add_argument(
+        'det_model_path',
+        help='path of mmdeploy SDK model dumped by model converter')
+    parser.add_argument(
+        'pose_model_path',
+        help='path of mmdeploy SDK model dumped by model converter')
+    parser.add_argument('video', help='video path or camera index')
+    parser.add_argument(
+        '--output-dir', default='det_pose_output', help='output directory')
+    parser.add_argument(
+        '--bbox-thr', type=float, default=0.6, help='score threshold of bbox')
+    parser.add_argument(
+        '--max-batch-size',
+        type=int,
+        default=32,
+        help='max number of person boxes of one pose detector call')
+    args = parser.parse_args()
+    if args.video.isnumeric():
+        args.video = int(args.video)
+    return args
+
+
+class DetPoseStream:
+    """Top-down pose estimation on a stream of frames.
+
+    The detector runs in a background thread, so the detection of the next
+    frames overlaps the pose estimation of the current ones. The person boxes
+    of all the detected frames are gathered into `PoseDetector.batch` calls of
+    at most `max_batch_size` boxes, which may span several frames.
+
+    Args:
+        detector (Detector): The object detector.
+        pose_detector (PoseDetector): The top-down pose detector.
+        bbox_thr (float): The score threshold of person boxes.
+        person_label (int): The label of person of the detector.
+        max_batch_size (int): The max number of boxes of a pose call.
+        max_queue_size (int): The max number of detected frames waiting for
+            pose estimation.
+
+    Examples:
+        >>> stream = DetPoseStream(detector, pose_detector)
+        >>> for frame, keypoints in stream(frames):
+        >>>     # keypoints: (num_person, num_keypoint, 3)
+        >>>     pass
+    """
+
+    def __init__(self,
+                 detector,
+                 pose_detector,
+                 bbox_thr=0.6,
+                 person_label=0,
+                 max_batch_size=32,
+                 max_queue_size=4):
+        self.detector = detector
+        self.pose_detector = pose_detector
+        self.bbox_thr = bbox_thr
+        self.person_label = person_label
+        self.max_batch_size = max_batch_size
+        self.max_queue_size = max_queue_size
+
+    @staticmethod
+    def _put(det_queue, item, stop):
+        """Put an item into the queue unless the stream is stopped."""
+        while not stop.is_set():
+            try:
+                det_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _detect(self, frames, det_queue, stop, errors):
+        """Detect the persons of the frames and put them into the queue."""
+        try:
+            for frame in frames:
+                bboxes, labels, _ = self.detector(frame)
+                keep = np.logical_and(labels == self.person_label,
+                                      bboxes[..., 4] > self.bbox_thr)
+                if not self._put(det_queue, (frame, bboxes[keep, :4]), stop):
+                    return
+        except Exception as e:
+            errors.append(e)
+        self._put(det_queue, None, stop)
+
+    def _estimate(self, batch):
+        """Estimate the poses of a batch of detected frames."""
+        num_boxes = [len(bboxes) for _, bboxes in batch]
+        owners = np.repeat(np.arange(len(batch)), num_boxes)
+        bboxes = np.concatenate([bboxes for _, bboxes in batch])
+        poses = [[] for _ in batch]
+        for start in range(0, len(bboxes), self.max_batch_size):
+            chunk_owners = owners[start:start + self.max_batch_size]
+            chunk_bboxes = bboxes[start:start + self.max_batch_size]
+            frame_ids, splits = np.unique(chunk_owners, return_index=True)
+            results = self.pose_detector.batch(
+                [batch[i][0] for i in frame_ids],
+                np.split(chunk_bboxes, splits[1:]))
+            for i, result in zip(frame_ids, results):
+                poses[i].append(result)
+        for (frame, _), pose in zip(batch, poses):
+            pose = np.concatenate(pose) if pose else np.zeros(
+                (0, 0, 3), dtype=np.float32)
+            yield frame, pose
+
+    def __call__(self, frames):
+        """Run the stream.
+
+        Args:
+            frames (Iterable[np.ndarray]): The input frames.
+
+        Yields:
+            tuple[np.ndarray, np.ndarray]: The frame and its keypoints of
+            shape (num_person, num_keypoint, 3), in the order of the inputs.
+        """
+        det_queue = queue.Queue(self.max_queue_size)
+        stop = threading.Event()
+        errors = []
+        thread = threading.Thread(
+            target=self._detect,
+            args=(frames, det_queue, stop, errors),
+            daemon=True)
+        thread.start()
+        try:
+            finished = False
+            while not finished:
+                # wait for a frame, then take the frames detected meanwhile
+                batch = [det_queue.get()]
+                num_boxes = 0 if batch[0] is None else len(batch[0][1])
+                while batch[-1] is not None and \
+                        num_boxes < self.max_batch_size:
+                    try:
+                        batch.append(det_queue.get_nowait())
+                    except queue.Empty:
+                        break
+                    if batch[-1] is not None:
+                        num_boxes += len(batch[-1][1])
+                if batch[-1] is None:
+                    finished = True
+                    batch.pop()
+                if batch:
+                    yield from self._estimate(batch)
+            if errors:
+                raise errors[0]
+        finally:
+            stop.set()
+            thread.join()
+
+
+def read_video(video):
+    cap = cv2.VideoCapture(video)
+    while True:
+        success, frame = cap.read()
+        if not success:
+            break
+        yield frame
+    cap.release()
+
+
+def main():
+    args = parse_args()
+
+    # create object detector
+    detector = Detector(
+        model_path=args.det_model_path, device_name=args.device_name)
+    # create pose detector
+    pose_detector = PoseDetector(
+        model_path=args.pose_model_path, device_name=args.device_name)
+
+    stream = DetPoseStream(
+        detector,
+        pose_detector,
+        bbox_thr=args.bbox_thr,
+        max_batch_size=args.max_batch_size)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for frame_id, (frame, poses) in enumerate(stream(read_video(args.video))):
+        visualize(frame, poses,
+                  os.path.join(args.output_dir, f'{frame_id:06d}.jpg'), 0.5,
+                  1280)
+
+
+if __name__ == '__main__':
+    main()
@@ -29,11 +29,17 @@ def create_calib_input_data(calib_file: str,
             as the dataset config. Defaults to None.
         dataset_type (str, optional): The dataset type. Defaults to 'val'.
         device (str, optional): Device to create dataset. Defaults to 'cpu'.
+
+    Notes:
+        `calib_config` of the deploy config accepts `compression` to compress
+        the calibration data with 'lzf', 'gzip' or 'lz4', the data is not
+        compressed by default. `num_workers` overrides the number of workers
+        of the calibration dataloader.
     """
 
     from mmdeploy.core import patch_model
     from mmdeploy.utils import (IR, cfg_apply_marks, get_backend,
-                                get_ir_config, load_config)
+                                get_calib_config, get_ir_config, load_config)
     from .utils import create_calib_input_data as create_calib_input_data_impl
     with no_mp():
         if dataset_cfg is None:
@@ -49,6 +55,11 @@ def create_calib_input_data(calib_file: str,
         dataset_cfg = load_config(dataset_cfg)[0]
         calib_dataloader = deepcopy(dataset_cfg[f'{dataset_type}_dataloader'])
         calib_dataloader['batch_size'] = 1
+        calib_config = get_calib_config(deploy_cfg) or dict()
+        num_workers = calib_config.get('num_workers', None)
+        if num_workers is not None:
+            calib_dataloader['num_workers'] = num_workers
+            calib_dataloader['persistent_workers'] = num_workers > 0
 
         from mmdeploy.apis.utils import build_task_processor
         task_processor = build_task_processor(model_cfg, deploy_cfg, device)
@@ -78,4 +89,5 @@ def create_calib_input_data(calib_file: str,
             inference_func=model.forward,
             model_partition=apply_marks,
             context_info=dict(cfg=deploy_cfg),
-            device=device)
+            device=device,
+            compression=calib_config.get('compression', None))
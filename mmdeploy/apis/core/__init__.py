@@ -1,4 +1,5 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+from .cache import ArtifactCache
 from .pipeline_manager import PIPELINE_MANAGER, no_mp
 
-__all__ = ['PIPELINE_MANAGER', 'no_mp']
+__all__ = ['ArtifactCache', 'PIPELINE_MANAGER', 'no_mp']
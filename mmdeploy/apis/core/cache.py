@@ -0,0 +1,277 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import hashlib
+import json
+import os
+import os.path as osp
+import shutil
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence
+
+from mmdeploy.utils import get_root_logger
+
+# options of `backend_config.common_config` that are only used to build the
+# backend model and do not change the exported IR.
+BACKEND_BUILD_OPTIONS = ('max_workspace_size', 'int8_mode')
+
+# fields of model config that do not change the exported model.
+MODEL_CFG_IGNORED_KEYS = ('train_dataloader', 'train_cfg', 'optim_wrapper',
+                          'param_scheduler', 'default_hooks', 'custom_hooks',
+                          'auto_scale_lr', 'work_dir', 'log_level',
+                          'log_processor', 'load_from', 'resume', 'launcher',
+                          'visualizer', 'vis_backends', 'env_cfg')
+
+_MANIFEST = 'manifest.json'
+
+
+def _to_dict(cfg: Any) -> Any:
+    """Convert a config to builtin types."""
+    if hasattr(cfg, '_cfg_dict'):
+        return cfg._cfg_dict.to_dict()
+    return cfg
+
+
+def get_export_config(deploy_cfg: Any) -> Dict:
+    """Get the part of the deploy config used to export the IR.
+
+    The backend type is kept since the rewriters are specialized for each
+    backend, while the options only used to build the backend model are
+    dropped.
+
+    Args:
+        deploy_cfg (mmengine.Config): The deploy config.
+
+    Returns:
+        Dict: The deploy config without backend build options.
+    """
+    cfg = dict(_to_dict(deploy_cfg))
+    cfg.pop('calib_config', None)
+    backend_cfg = cfg.pop('backend_config', dict())
+    common_cfg = backend_cfg.get('common_config', dict())
+    common_cfg = {
+        k: v
+        for k, v in common_cfg.items() if k not in BACKEND_BUILD_OPTIONS
+    }
+    cfg['backend_config'] = dict(
+        type=backend_cfg.get('type'), common_config=common_cfg)
+    return cfg
+
+
+def get_model_config(model_cfg: Any) -> Dict:
+    """Get the part of the model config used to deploy the model.
+
+    Args:
+        model_cfg (mmengine.Config): The model config.
+
+    Returns:
+        Dict: The model config without training fields.
+    """
+    cfg = dict(_to_dict(model_cfg))
+    for key in MODEL_CFG_IGNORED_KEYS:
+        cfg.pop(key, None)
+    return cfg
+
+
+def get_device_info(device: str) -> Dict:
+    """Get the info of the device that a backend model is built on.
+
+    Devices are named by their indices, which differ between processes with
+    different `CUDA_VISIBLE_DEVICES`. The name and the compute capability of
+    a GPU tell the models built for different GPUs apart.
+
+    Args:
+        device (str): The device, e.g. `cpu` or `cuda:0`.
+
+    Returns:
+        Dict: The device, with the name and the compute capability of the
+            GPU if it is a cuda device.
+    """
+    import torch
+    info = dict(device=device)
+    if device.startswith('cuda') and torch.cuda.is_available():
+        info['name'] = torch.cuda.get_device_name(device)
+        info['capability'] = '.'.join(
+            map(str, torch.cuda.get_device_capability(device)))
+    return info
+
+
+def copy_file(src: str, dst: str):
+    """Copy a file, an existing destination is removed first so that the
+    files linked to it are not modified."""
+    if osp.lexists(dst):
+        os.remove(dst)
+    shutil.copyfile(src, dst)
+
+
+class ArtifactCache:
+    """Content-addressed cache of the outputs of conversion stages.
+
+    The key of a stage is the hash of everything the stage depends on: the
+    name of the stage, the configs, the contents of the input files and the
+    versions of mmdeploy and the related packages. The outputs are copied
+    into the cache after the stage is done and copied back the next time
+    the stage is called with the same key.
+
+    Args:
+        cache_dir (str): The directory to save the cached outputs.
+
+    Examples:
+        >>> from mmdeploy.apis.core import ArtifactCache
+        >>> cache = ArtifactCache('.cache/mmdeploy')
+        >>> key = cache.get_key('extract_model', files=['end2end.onnx'],
+        >>>                     start='detector:input')
+        >>> files = cache.fetch(key, 'work_dir')
+        >>> if files is None:
+        >>>     # run the stage and save the outputs
+        >>>     cache.store(key, ['work_dir/partition0.onnx'], 'work_dir')
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = osp.abspath(cache_dir)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # (path, size, mtime) -> sha256
+        self._file_hashes = dict()
+        self._source_hash = None
+
+    def hash_file(self, path: str) -> str:
+        """Get the sha256 of the file content.
+
+        Args:
+            path (str): The file path. Paths that do not exist on the local
+                disk, e.g. urls, are hashed as strings.
+
+        Returns:
+            str: The hex digest.
+        """
+        if not osp.isfile(path):
+            return hashlib.sha256(str(path).encode()).hexdigest()
+        stat = os.stat(path)
+        stat_key = (osp.abspath(path), stat.st_size, stat.st_mtime_ns)
+        if stat_key not in self._file_hashes:
+            sha = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    sha.update(chunk)
+            self._file_hashes[stat_key] = sha.hexdigest()
+        return self._file_hashes[stat_key]
+
+    def get_source_hash(self) -> str:
+        """Get the hash of the python sources of mmdeploy.
+
+        Rewriters change with the sources even if the version of mmdeploy does
+        not, so the sources are part of every key.
+        """
+        if self._source_hash is None:
+            import mmdeploy
+            root = osp.dirname(osp.abspath(mmdeploy.__file__))
+            sha = hashlib.sha256()
+            for dir_path, dir_names, file_names in os.walk(root):
+                dir_names.sort()
+                for file_name in sorted(file_names):
+                    if not file_name.endswith('.py'):
+                        continue
+                    path = osp.join(dir_path, file_name)
+                    sha.update(osp.relpath(path, root).encode())
+                    sha.update(self.hash_file(path).encode())
+            self._source_hash = sha.hexdigest()
+        return self._source_hash
+
+    @staticmethod
+    def get_versions() -> Dict[str, str]:
+        """Get the versions of the packages used by the conversion."""
+        import torch
+
+        from mmdeploy.version import __version__
+        versions = dict(mmdeploy=__version__, torch=torch.__version__)
+        try:
+            import onnx
+            versions['onnx'] = onnx.__version__
+        except ImportError:
+            pass
+        return versions
+
+    def get_key(self, stage: str, files: Sequence[str] = (), **inputs) -> str:
+        """Get the key of a stage.
+
+        Args:
+            stage (str): The name of the stage.
+            files (Sequence[str]): The input files of the stage, hashed by
+                contents.
+            inputs: Other inputs of the stage, e.g. configs and options. They
+                should be serializable to json, configs are converted to
+                dict and other objects are converted to string.
+
+        Returns:
+            str: The hex digest of the key.
+        """
+        key = dict(
+            stage=stage,
+            files=[self.hash_file(file) for file in files],
+            inputs={k: _to_dict(v)
+                    for k, v in inputs.items()},
+            versions=self.get_versions(),
+            source=self.get_source_hash())
+        key = json.dumps(key, sort_keys=True, default=str)
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def _entry_dir(self, key: str) -> str:
+        return osp.join(self.cache_dir, key[:2], key)
+
+    def fetch(self, key: str, work_dir: str) -> Optional[List[str]]:
+        """Copy the cached outputs of a stage into the work dir.
+
+        Args:
+            key (str): The key of the stage.
+            work_dir (str): The directory to restore the outputs.
+
+        Returns:
+            List[str] | None: The restored output files, `None` if the stage
+                has not been cached.
+        """
+        entry_dir = self._entry_dir(key)
+        manifest_path = osp.join(entry_dir, _MANIFEST)
+        if not osp.exists(manifest_path):
+            return None
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+
+        files = []
+        for rel_path in manifest['files']:
+            dst = osp.join(work_dir, rel_path)
+            os.makedirs(osp.dirname(osp.abspath(dst)), exist_ok=True)
+            copy_file(osp.join(entry_dir, rel_path), dst)
+            files.append(dst)
+        return files
+
+    def store(self, key: str, files: Sequence[str], work_dir: str):
+        """Copy the outputs of a stage into the cache.
+
+        Args:
+            key (str): The key of the stage.
+            files (Sequence[str]): The output files of the stage.
+            work_dir (str): The work dir of the stage, the output files are
+                cached by the relative paths to it.
+        """
+        rel_paths = [osp.relpath(file, work_dir) for file in files]
+        if any(rel_path.startswith(os.pardir) for rel_path in rel_paths):
+            logger = get_root_logger()
+            logger.warning(f'Can not cache {files} outside of {work_dir}.')
+            return
+
+        entry_dir = self._entry_dir(key)
+        if osp.exists(entry_dir):
+            return
+        os.makedirs(osp.dirname(entry_dir), exist_ok=True)
+        # write into a temporary directory and rename it so that no partial
+        # entry is visible to other processes.
+        tmp_dir = tempfile.mkdtemp(dir=osp.dirname(entry_dir))
+        try:
+            for file, rel_path in zip(files, rel_paths):
+                dst = osp.join(tmp_dir, rel_path)
+                os.makedirs(osp.dirname(dst), exist_ok=True)
+                copy_file(file, dst)
+            with open(osp.join(tmp_dir, _MANIFEST), 'w') as f:
+                json.dump(dict(files=rel_paths), f)
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            # another process has cached the same stage or the copy failed
+            shutil.rmtree(tmp_dir, ignore_errors=True)
@@ -1,6 +1,6 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 
-from typing import Dict, Iterable, Optional, Union
+from typing import Dict, Iterable, List, Optional, Sequence, Union
 
 import onnx
 
@@ -65,3 +65,39 @@ def extract_model(model: Union[str, onnx.ModelProto],
     from .onnx import extract_partition
     return extract_partition(model, start_marker, end_marker, start_name_map,
                              end_name_map, dynamic_axes, save_file)
+
+
+@PIPELINE_MANAGER.register_pipeline()
+def extract_models(model: Union[str, onnx.ModelProto],
+                   partition_cfgs: Sequence[Dict],
+                   num_workers: Optional[int] = None) -> List[onnx.ModelProto]:
+    """Extract several partition-models from an ONNX model in one pass.
+
+    Examples:
+        >>> from mmdeploy.apis import extract_models
+        >>> partition_cfgs = [
+            dict(
+                start='detector_forward:input',
+                end=['extract_feat:output', 'rpn_head:output'],
+                save_file='partition0.onnx'),
+            dict(
+                start='roi_extractor:input',
+                end='bbox_head:output',
+                save_file='partition1.onnx')
+        ]
+        >>> extract_models('work_dir/end2end.onnx', partition_cfgs)
+
+    Args:
+        model (str | onnx.ModelProto): Input ONNX model to be extracted.
+        partition_cfgs (Sequence[Dict]): The configs of the partitions. Each
+            config has `start` and `end` markers, and optional
+            `start_name_map`, `end_name_map`, `dynamic_axes` and `save_file`.
+        num_workers (int): The number of threads to save the models. Defaults
+            to `None`, which saves all the models at the same time.
+
+    Returns:
+        List[onnx.ModelProto]: The extracted models.
+    """
+
+    from .onnx import extract_partitions
+    return extract_partitions(model, partition_cfgs, num_workers)
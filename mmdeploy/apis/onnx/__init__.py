@@ -1,5 +1,5 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 from .export import export
-from .partition import extract_partition
+from .partition import extract_partition, extract_partitions
 
-__all__ = ['export', 'extract_partition']
+__all__ = ['export', 'extract_partition', 'extract_partitions']
@@ -1,4 +1,6 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+import os
+import os.path as osp
 from copy import deepcopy
 from functools import partial
 from typing import Any, Dict, Optional, Sequence, Tuple, Union
@@ -7,7 +9,9 @@ import torch
 
 from mmdeploy.apis.core import PIPELINE_MANAGER
 from mmdeploy.core import RewriterContext, patch_model
-from mmdeploy.utils import IR, Backend, get_ir_config, get_root_logger
+from mmdeploy.utils import (IR, Backend, consolidate_external_data,
+                            get_external_data_path, get_ir_config,
+                            get_root_logger)
 from .optimizer import *  # noqa
 from .passes import optimize_onnx
 
@@ -52,7 +56,8 @@ def export(model: torch.nn.Module,
         model (torch.nn.Module): the model to be exported.
         args (torch.Tensor|Tuple|Dict): Dummy input of the model.
         output_path_prefix (str): The output file prefix. The model will
-            be saved to `<output_path_prefix>.onnx`.
+            be saved to `<output_path_prefix>.onnx`, and the weights of a
+            model larger than 2GB to `<output_path_prefix>.onnx.data`.
         backend (Backend|str): Which backend will the graph be used. Different
             backend would generate different graph.
         input_metas (Dict): The constant inputs of the model.
@@ -69,6 +74,9 @@ def export(model: torch.nn.Module,
         optimize (bool): Perform optimize on model.
     """
     output_path = output_path_prefix + '.onnx'
+    data_path = get_external_data_path(output_path)
+    if osp.exists(data_path):
+        os.remove(data_path)
 
     logger = get_root_logger()
     logger.info(f'Export PyTorch model to ONNX: {output_path}.')
@@ -146,6 +154,8 @@ def export(model: torch.nn.Module,
             dynamic_axes=dynamic_axes,
             keep_initializers_as_inputs=keep_initializers_as_inputs,
             verbose=verbose)
+        # the weights of models larger than 2GB are saved in separate files
+        consolidate_external_data(output_path)
 
         if input_metas is not None:
             patched_model.forward = model_forward
@@ -1,139 +1,60 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-from typing import Dict, Iterable, Optional, Union
+import os.path as osp
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Union
 
 import onnx
 import onnx.helper
 import onnx.utils
+from onnx.external_data_helper import load_external_data_for_model
 
 from mmdeploy.apis.core import PIPELINE_MANAGER
-from mmdeploy.core.optimizers import (attribute_to_dict, create_extractor,
-                                      get_new_name, parse_extractor_io_string,
+from mmdeploy.core.optimizers import (GraphIndex, attribute_to_dict,
+                                      create_extractor, get_new_name,
+                                      parse_extractor_io_string,
                                       remove_identity, remove_imports,
-                                      rename_value)
-from mmdeploy.utils import get_root_logger
+                                      remove_items, rename_value)
+from mmdeploy.utils import get_root_logger, has_external_data, save_onnx
 
 
-@PIPELINE_MANAGER.register_pipeline()
-def extract_partition(model: Union[str, onnx.ModelProto],
-                      start_marker: Union[str, Iterable[str]],
-                      end_marker: Union[str, Iterable[str]],
-                      start_name_map: Optional[Dict[str, str]] = None,
-                      end_name_map: Optional[Dict[str, str]] = None,
-                      dynamic_axes: Optional[Dict[str, Dict[int, str]]] = None,
-                      save_file: Optional[str] = None) -> onnx.ModelProto:
-    """Extract partition-model from an ONNX model.
+def _collect_io(marks: List,
+                markers: Union[str, Iterable[str]],
+                io_type: str,
+                name_map: Optional[Dict[str, str]] = None) -> List:
+    """Collect the values of the markers.
 
-    The partition-model is defined by the names of the input and output tensors
-    exactly.
-
-    Examples:
-        >>> from mmdeploy.apis import extract_model
-        >>> model = 'work_dir/fastrcnn.onnx'
-        >>> start_marker = 'detector:input'
-        >>> end_marker = ['extract_feat:output', 'multiclass_nms[0]:input']
-        >>> dynamic_axes = {
-            'input': {
-                0: 'batch',
-                2: 'height',
-                3: 'width'
-            },
-            'scores': {
-                0: 'batch',
-                1: 'num_boxes',
-            },
-            'boxes': {
-                0: 'batch',
-                1: 'num_boxes',
-            }
-        }
-        >>> save_file = 'partition_model.onnx'
-        >>> extract_partition(model, start_marker, end_marker, \
-                dynamic_axes=dynamic_axes, \
-                save_file=save_file)
-
-    Args:
-        model (str | onnx.ModelProto): Input ONNX model to be extracted.
-        start_marker (str | Sequence[str]): Start marker(s) to extract.
-        end_marker (str | Sequence[str]): End marker(s) to extract.
-        start_name_map (Dict[str, str]): A mapping of start names, defaults to
-            `None`.
-        end_name_map (Dict[str, str]): A mapping of end names, defaults to
-            `None`.
-        dynamic_axes (Dict[str, Dict[int, str]]): A dictionary to specify
-            dynamic axes of input/output, defaults to `None`.
-        save_file (str): A file to save the extracted model, defaults to
-            `None`.
+    The inputs of the marks are the inputs of the partition if `io_type` is
+    `'input'`, otherwise the outputs of the marks are the outputs of the
+    partition, whatever the types of the markers are.
 
     Returns:
-        onnx.ModelProto: The extracted model.
+        List: The original name, the new name and the mark attributes of
+            the values.
     """
-    if isinstance(model, str):
-        model = onnx.load(model)
-
-    num_value_info = len(model.graph.value_info)
-    inputs = []
-    outputs = []
-    logger = get_root_logger()
-    if not isinstance(start_marker, (list, tuple)):
-        start_marker = [start_marker]
-    for s in start_marker:
-        start_name, func_id, start_type = parse_extractor_io_string(s)
-        for node in model.graph.node:
-            if node.op_type == 'Mark':
-                attr = attribute_to_dict(node.attribute)
-                if attr['func'] == start_name and attr[
-                        'type'] == start_type and attr['func_id'] == func_id:
-                    name = node.input[0]
-                    if name not in inputs:
-                        new_name = get_new_name(
-                            attr, mark_name=s, name_map=start_name_map)
-                        rename_value(model, name, new_name)
-                        if not any([
-                                v_info.name == new_name
-                                for v_info in model.graph.value_info
-                        ]):
-                            new_val_info = onnx.helper.make_tensor_value_info(
-                                new_name, attr['dtype'], attr['shape'])
-                            model.graph.value_info.append(new_val_info)
-                        inputs.append(new_name)
-
-    logger.info(f'inputs: {", ".join(inputs)}')
-
-    # collect outputs
-    if not isinstance(end_marker, (list, tuple)):
-        end_marker = [end_marker]
-    for e in end_marker:
-        end_name, func_id, end_type = parse_extractor_io_string(e)
-        for node in model.graph.node:
-            if node.op_type == 'Mark':
-                attr = attribute_to_dict(node.attribute)
-                if attr['func'] == end_name and attr[
-                        'type'] == end_type and attr['func_id'] == func_id:
-                    name = node.output[0]
-                    if name not in outputs:
-                        new_name = get_new_name(
-                            attr, mark_name=e, name_map=end_name_map)
-                        rename_value(model, name, new_name)
-                        if not any([
-                                v_info.name == new_name
-                                for v_info in model.graph.value_info
-                        ]):
-                            new_val_info = onnx.helper.make_tensor_value_info(
-                                new_name, attr['dtype'], attr['shape'])
-                            model.graph.value_info.append(new_val_info)
-                        outputs.append(new_name)
-
-    logger.info(f'outputs: {", ".join(outputs)}')
+    if not isinstance(markers, (list, tuple)):
+        markers = [markers]
+    io_list = []
+    names = set()
+    for marker in markers:
+        func, func_id, marker_type = parse_extractor_io_string(marker)
+        for node, attr in marks:
+            if attr['func'] == func and attr['type'] == marker_type and attr[
+                    'func_id'] == func_id:
+                name = node.input[0] if io_type == 'input' else node.output[0]
+                if name not in names:
+                    new_name = get_new_name(
+                        attr, mark_name=marker, name_map=name_map)
+                    io_list.append((name, new_name, attr))
+                    names.add(name)
+    return io_list
 
-    # replace Mark with Identity
-    for node in model.graph.node:
-        if node.op_type == 'Mark':
-            del node.attribute[:]
-            node.domain = ''
-            node.op_type = 'Identity'
 
-    extractor = create_extractor(model)
-    extracted_model = extractor.extract_model(inputs, outputs)
+def _postprocess(extracted_model: onnx.ModelProto,
+                 inputs: List[str],
+                 num_value_info: int,
+                 dynamic_axes: Optional[Dict[str, Dict[int, str]]] = None):
+    """Clean up an extracted partition-model inplace."""
+    logger = get_root_logger()
 
     # remove all Identity, this may be done by onnx simplifier
     remove_identity(extracted_model)
@@ -148,14 +69,8 @@ def extract_partition(model: Union[str, onnx.ModelProto],
         used.add(output.name)
 
     # delete unused inputs
-    success = True
-    while success:
-        success = False
-        for i, input in enumerate(extracted_model.graph.input):
-            if input.name not in used:
-                del extracted_model.graph.input[i]
-                success = True
-                break
+    remove_items(extracted_model.graph.input,
+                 lambda input: input.name not in used)
 
     # eliminate output without shape
     for xs in [extracted_model.graph.output]:
@@ -173,18 +88,12 @@ def extract_partition(model: Union[str, onnx.ModelProto],
                 input.type.tensor_type.shape.dim[0].dim_value = 1
 
     # eliminate duplicated value_info for inputs
-    success = True
     # num_value_info == 0 if dynamic shape
     if num_value_info == 0:
-        while len(extracted_model.graph.value_info) > 0:
-            extracted_model.graph.value_info.pop()
-    while success:
-        success = False
-        for i, x in enumerate(extracted_model.graph.value_info):
-            if x.name in inputs:
-                del extracted_model.graph.value_info[i]
-                success = True
-                break
+        del extracted_model.graph.value_info[:]
+    input_names = set(inputs)
+    remove_items(extracted_model.graph.value_info,
+                 lambda x: x.name in input_names)
 
     # dynamic shape support
     if dynamic_axes is not None:
@@ -202,8 +111,181 @@ def extract_partition(model: Union[str, onnx.ModelProto],
     # remove mmdeploy domain if useless
     remove_imports(extracted_model)
 
-    # save extract_model if save_file is given
-    if save_file is not None:
-        onnx.save(extracted_model, save_file)
 
-    return extracted_model
+@PIPELINE_MANAGER.register_pipeline()
+def extract_partitions(
+        model: Union[str, onnx.ModelProto],
+        partition_cfgs: Sequence[Dict],
+        num_workers: Optional[int] = None) -> List[onnx.ModelProto]:
+    """Extract several partition-models from an ONNX model in one pass.
+
+    The model is loaded, its `Mark` nodes are parsed and its shapes are
+    inferred only once. All the partition-models are extracted with the same
+    extractor, and then saved in parallel.
+
+    The external data of a model file is not loaded for the extraction. Each
+    partition-model loads the weights it uses afterwards, and is saved by
+    :func:`mmdeploy.utils.save_onnx` if `save_file` is given.
+
+    Examples:
+        >>> from mmdeploy.apis.onnx import extract_partitions
+        >>> partition_cfgs = [
+            dict(
+                start='detector_forward:input',
+                end=['extract_feat:output', 'rpn_head:output'],
+                save_file='partition0.onnx'),
+            dict(
+                start='roi_extractor:input',
+                end='bbox_head:output',
+                save_file='partition1.onnx')
+        ]
+        >>> extract_partitions('work_dir/end2end.onnx', partition_cfgs)
+
+    Args:
+        model (str | onnx.ModelProto): Input ONNX model to be extracted.
+        partition_cfgs (Sequence[Dict]): The configs of the partitions. Each
+            config has `start` and `end` markers, and optional
+            `start_name_map`, `end_name_map`, `dynamic_axes` and `save_file`,
+            as the arguments of :func:`extract_partition`.
+        num_workers (int): The number of threads to load the weights of and
+            save the models. Defaults to `None`, which handles all the models
+            at the same time.
+
+    Returns:
+        List[onnx.ModelProto]: The extracted models.
+    """
+    base_dir = None
+    if isinstance(model, str):
+        base_dir = osp.dirname(model)
+        model = onnx.load(model, load_external_data=False)
+
+    num_value_info = len(model.graph.value_info)
+    logger = get_root_logger()
+    index = GraphIndex(model.graph)
+    marks = [(node, attribute_to_dict(node.attribute))
+             for node in model.graph.node if node.op_type == 'Mark']
+
+    partitions = []
+    for cfg in partition_cfgs:
+        inputs = _collect_io(marks, cfg['start'], 'input',
+                             cfg.get('start_name_map', None))
+        outputs = _collect_io(marks, cfg['end'], 'output',
+                              cfg.get('end_name_map', None))
+        logger.info(f'inputs: {", ".join(new for _, new, _ in inputs)}')
+        logger.info(f'outputs: {", ".join(new for _, new, _ in outputs)}')
+        partitions.append((inputs, outputs))
+
+        # the values are renamed in the partition-models, the shapes of all
+        # the boundaries are given to the shape inference of the whole model
+        for name, _, attr in inputs + outputs:
+            if not index.value_info.get(name):
+                index.add_value_info(
+                    onnx.helper.make_tensor_value_info(name, attr['dtype'],
+                                                       attr['shape']))
+
+    # replace Mark with Identity
+    for node, _ in marks:
+        del node.attribute[:]
+        node.domain = ''
+        node.op_type = 'Identity'
+
+    extractor = create_extractor(model)
+    extracted_models = []
+    for cfg, (inputs, outputs) in zip(partition_cfgs, partitions):
+        extracted_model = extractor.extract_model(
+            [name for name, _, _ in inputs], [name for name, _, _ in outputs])
+        extracted_index = GraphIndex(extracted_model.graph)
+        for name, new_name, _ in inputs + outputs:
+            rename_value(
+                extracted_model, name, new_name, index=extracted_index)
+        _postprocess(extracted_model, [new_name for _, new_name, _ in inputs],
+                     num_value_info, cfg.get('dynamic_axes', None))
+        extracted_models.append(extracted_model)
+
+    # load the weights of the returned models, and save extract_model if
+    # save_file is given
+    saves = [(extracted_model, cfg.get('save_file', None))
+             for cfg, extracted_model in zip(partition_cfgs, extracted_models)]
+    if base_dir is None:
+        saves = [(extracted_model, save_file)
+                 for extracted_model, save_file in saves
+                 if save_file is not None]
+
+    def _save(args):
+        extracted_model, save_file = args
+        if base_dir is not None and has_external_data(extracted_model):
+            load_external_data_for_model(extracted_model, base_dir)
+        if save_file is not None:
+            save_onnx(extracted_model, save_file)
+
+    if len(saves) == 1:
+        _save(saves[0])
+    elif len(saves) > 1:
+        with ThreadPoolExecutor(num_workers or len(saves)) as executor:
+            list(executor.map(_save, saves))
+
+    return extracted_models
+
+
+@PIPELINE_MANAGER.register_pipeline()
+def extract_partition(model: Union[str, onnx.ModelProto],
+                      start_marker: Union[str, Iterable[str]],
+                      end_marker: Union[str, Iterable[str]],
+                      start_name_map: Optional[Dict[str, str]] = None,
+                      end_name_map: Optional[Dict[str, str]] = None,
+                      dynamic_axes: Optional[Dict[str, Dict[int, str]]] = None,
+                      save_file: Optional[str] = None) -> onnx.ModelProto:
+    """Extract partition-model from an ONNX model.
+
+    The partition-model is defined by the names of the input and output tensors
+    exactly.
+
+    Examples:
+        >>> from mmdeploy.apis import extract_model
+        >>> model = 'work_dir/fastrcnn.onnx'
+        >>> start_marker = 'detector:input'
+        >>> end_marker = ['extract_feat:output', 'multiclass_nms[0]:input']
+        >>> dynamic_axes = {
+            'input': {
+                0: 'batch',
+                2: 'height',
+                3: 'width'
+            },
+            'scores': {
+                0: 'batch',
+                1: 'num_boxes',
+            },
+            'boxes': {
+                0: 'batch',
+                1: 'num_boxes',
+            }
+        }
+        >>> save_file = 'partition_model.onnx'
+        >>> extract_partition(model, start_marker, end_marker, \
+                dynamic_axes=dynamic_axes, \
+                save_file=save_file)
+
+    Args:
+        model (str | onnx.ModelProto): Input ONNX model to be extracted.
+        start_marker (str | Sequence[str]): Start marker(s) to extract.
+        end_marker (str | Sequence[str]): End marker(s) to extract.
+        start_name_map (Dict[str, str]): A mapping of start names, defaults to
+            `None`.
+        end_name_map (Dict[str, str]): A mapping of end names, defaults to
+            `None`.
+        dynamic_axes (Dict[str, Dict[int, str]]): A dictionary to specify
+            dynamic axes of input/output, defaults to `None`.
+        save_file (str): A file to save the extracted model, defaults to
+            `None`.
+
+    Returns:
+        onnx.ModelProto: The extracted model.
+    """
+    partition_cfg = dict(
+        start=start_marker,
+        end=end_marker,
+        start_name_map=start_name_map,
+        end_name_map=end_name_map,
+        dynamic_axes=dynamic_axes,
+        save_file=save_file)
+    return extract_partitions(model, [partition_cfg])[0]
@@ -1,13 +1,124 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+import queue
+import threading
 from copy import deepcopy
-from typing import Callable, Dict, Optional
+from typing import Any, Callable, Dict, Optional
 
+import numpy as np
 import torch
 from torch.utils.data import DataLoader
 
 from ..core import PIPELINE_MANAGER
 
 
+def get_compression_kwargs(compression: Optional[str] = None) -> Dict:
+    """Get the arguments of `h5py.Group.create_dataset` to compress data.
+
+    Args:
+        compression (str | None): The compression filter, one of `None`,
+            'lzf', 'gzip' and 'lz4'. 'lz4' requires `hdf5plugin`. Data is
+            stored uncompressed and contiguous if it is `None`, so that it can
+            be read without decompression. Defaults to None.
+
+    Returns:
+        Dict: The keyword arguments of `create_dataset`.
+    """
+    if compression is None:
+        return dict()
+    elif compression == 'lzf':
+        return dict(compression='lzf')
+    elif compression == 'gzip':
+        return dict(compression='gzip', compression_opts=4)
+    elif compression == 'lz4':
+        try:
+            import hdf5plugin
+        except ImportError:
+            raise ImportError('Please install hdf5plugin to compress '
+                              'calibration data with lz4.')
+        return dict(hdf5plugin.LZ4())
+    else:
+        raise ValueError(f'Unsupported compression: {compression}')
+
+
+class CalibDataWriter:
+    """Write calibration data into a hdf5 file in a background thread.
+
+    The data is saved as `calib_data/{model_type}/{input_name}/{data_id}`.
+    Data is queued and written in batches by the writer thread, so that the
+    model inference is not blocked by the disk.
+
+    Args:
+        calib_file (h5py.File): The opened calibration file.
+        compression (str | None): The compression filter, see
+            `get_compression_kwargs`. Defaults to None.
+        batch_size (int): The number of data written before each flush.
+            Defaults to 16.
+        max_queue_size (int): The max number of queued data. Defaults to 64.
+    """
+
+    def __init__(self,
+                 calib_file: Any,
+                 compression: Optional[str] = None,
+                 batch_size: int = 16,
+                 max_queue_size: int = 64):
+        self.calib_file = calib_file
+        self.batch_size = batch_size
+        self._compression_kwargs = get_compression_kwargs(compression)
+        if 'calib_data' not in calib_file:
+            calib_file.create_group('calib_data')
+        self._calib_data = calib_file['calib_data']
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _write_batch(self, batch):
+        for model_type, input_name, data_id, data in batch:
+            group = self._calib_data.require_group(model_type)
+            group = group.require_group(input_name)
+            group.create_dataset(
+                str(data_id), data=data, **self._compression_kwargs)
+        self.calib_file.flush()
+
+    def _run(self):
+        batch = []
+        while True:
+            item = self._queue.get()
+            if item is not None:
+                batch.append(item)
+            if len(batch) >= self.batch_size or (item is None and batch):
+                try:
+                    self._write_batch(batch)
+                except Exception as e:
+                    self._error = e
+                batch = []
+            if item is None:
+                break
+
+    def write(self, model_type: str, input_name: str, data_id: int,
+              data: np.ndarray):
+        """Queue the data to be written.
+
+        Args:
+            model_type (str): The model type, e.g. 'end2end', 'partition0'.
+            input_name (str): The input name.
+            data_id (int): The index of the data.
+            data (np.ndarray): The data.
+        """
+        if self._error is not None:
+            raise self._error
+        self._queue.put(
+            (model_type, input_name, data_id, np.ascontiguousarray(data)))
+
+    def close(self):
+        """Write the queued data and stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+
 @PIPELINE_MANAGER.register_pipeline()
 def create_calib_input_data(calib_file: str,
                             model: torch.nn.Module,
@@ -16,7 +127,8 @@ def create_calib_input_data(calib_file: str,
                             inference_func: Optional[Callable] = None,
                             model_partition: bool = False,
                             context_info: Dict = dict(),
-                            device: str = 'cpu') -> None:
+                            device: str = 'cpu',
+                            compression: Optional[str] = None) -> None:
     """Create calibration table.
 
     Examples:
@@ -42,6 +154,8 @@ def create_calib_input_data(calib_file: str,
         dataset_type (str): A string specifying dataset type, e.g.: 'test',
             'val', defaults to 'val'.
         device (str): Specifying the device to run on, defaults to 'cpu'.
+        compression (str | None): The compression of calibration data, one
+            of `None`, 'lzf', 'gzip' and 'lz4'. Defaults to None.
     """
     import h5py
     import tqdm
@@ -50,41 +164,33 @@ def create_calib_input_data(calib_file: str,
     backend = 'default'
 
     with h5py.File(calib_file, mode='w') as file:
-        calib_data_group = file.create_group('calib_data')
-
-        if not model_partition:
-            # create end2end group
-            input_data_group = calib_data_group.create_group('end2end')
-            input_group = input_data_group.create_group('input')
-        for data_id, input_data in enumerate(tqdm.tqdm(dataloader)):
-
-            if not model_partition:
-                # save end2end data
-                if get_tensor_func is not None:
-                    input_tensor = get_tensor_func(input_data)
-                else:
-                    input_tensor = input_data
-                input_ndarray = input_tensor.detach().cpu().numpy()
-                input_group.create_dataset(
-                    str(data_id),
-                    shape=input_ndarray.shape,
-                    compression='gzip',
-                    compression_opts=4,
-                    data=input_ndarray)
-            else:
-                context_info_ = deepcopy(context_info)
-                if 'cfg' not in context_info:
-                    context_info_['cfg'] = dict()
-                context_info_['backend'] = backend
-                context_info_['create_calib'] = True
-                context_info_['calib_file'] = file
-                context_info_['data_id'] = data_id
-
-                with torch.no_grad(), RewriterContext(**context_info_):
-                    reset_mark_function_count()
-                    if inference_func is not None:
-                        inference_func(model, input_data)
+        writer = CalibDataWriter(file, compression=compression)
+        try:
+            for data_id, input_data in enumerate(tqdm.tqdm(dataloader)):
+
+                if not model_partition:
+                    # save end2end data
+                    if get_tensor_func is not None:
+                        input_tensor = get_tensor_func(input_data)
                     else:
-                        model(input_data)
+                        input_tensor = input_data
+                    input_ndarray = input_tensor.detach().cpu().numpy()
+                    writer.write('end2end', 'input', data_id, input_ndarray)
+                else:
+                    context_info_ = deepcopy(context_info)
+                    if 'cfg' not in context_info:
+                        context_info_['cfg'] = dict()
+                    context_info_['backend'] = backend
+                    context_info_['create_calib'] = True
+                    context_info_['calib_file'] = file
+                    context_info_['calib_writer'] = writer
+                    context_info_['data_id'] = data_id
 
-            file.flush()
+                    with torch.no_grad(), RewriterContext(**context_info_):
+                        reset_mark_function_count()
+                        if inference_func is not None:
+                            inference_func(model, input_data)
+                        else:
+                            model(input_data)
+        finally:
+            writer.close()
@@ -0,0 +1,137 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+from typing import Any, Callable, Optional, Sequence, Tuple
+
+import torch
+
+from mmdeploy.utils import get_root_logger
+
+
+def _copy_structure(outputs: Any) -> Any:
+    """Shallow copy the containers of nested outputs."""
+    if isinstance(outputs, tuple):
+        return tuple(_copy_structure(_) for _ in outputs)
+    elif isinstance(outputs, list):
+        return [_copy_structure(_) for _ in outputs]
+    elif isinstance(outputs, dict):
+        return dict((k, _copy_structure(v)) for k, v in outputs.items())
+    return outputs
+
+
+class CUDAGraphCache:
+    """Capture a callable into CUDA graphs and replay them by input shapes.
+
+    The first call of an input shape runs eagerly, the second call warms up
+    and captures a graph and later calls replay it. Inputs are copied into
+    the static input tensors of the graph and the static outputs owned by
+    the graph are returned, so the outputs are overwritten by the next
+    replay of the same graph. Calls that can not be captured, e.g. inputs on
+    the host, run eagerly.
+
+    Args:
+        max_graphs (int): The max number of captured graphs. Unseen input
+            shapes run eagerly once the cache is full. Defaults to 8.
+
+    Examples:
+        >>> from mmdeploy.backend.base.cuda_graph import CUDAGraphCache
+        >>> import torch
+        >>>
+        >>> graphs = CUDAGraphCache()
+        >>> model = torch.nn.Conv2d(3, 8, 3).cuda().eval()
+        >>> inputs = [torch.rand(1, 3, 224, 224).cuda()]
+        >>> for _ in range(3):
+        >>>     outputs = graphs.run(model, inputs)
+    """
+
+    def __init__(self, max_graphs: int = 8):
+        self.max_graphs = max_graphs
+        # input key -> (graph, static inputs, static outputs), `None` marks
+        # the inputs that failed to be captured.
+        self._graphs = dict()
+        self._seen = set()
+
+    @staticmethod
+    def is_available() -> bool:
+        """Check whether CUDA graphs can be captured in this environment."""
+        return hasattr(torch.cuda, 'CUDAGraph') and torch.cuda.is_available()
+
+    @staticmethod
+    def get_key(inputs: Sequence[torch.Tensor]) -> Tuple:
+        """Get the cache key of the inputs.
+
+        Args:
+            inputs (Sequence[torch.Tensor]): The input tensors.
+
+        Returns:
+            Tuple: The shapes, dtypes and devices of the inputs.
+        """
+        return tuple((tuple(tensor.shape), tensor.dtype, tensor.device)
+                     for tensor in inputs)
+
+    def __capture(self, func: Callable, inputs: Sequence[torch.Tensor]):
+        """Capture the callable with static copies of the inputs."""
+        static_inputs = [tensor.clone() for tensor in inputs]
+        # warm up the callable to be captured on a side stream
+        stream = torch.cuda.Stream()
+        stream.wait_stream(torch.cuda.current_stream())
+        with torch.cuda.stream(stream):
+            func(*static_inputs)
+        torch.cuda.current_stream().wait_stream(stream)
+        graph = torch.cuda.CUDAGraph()
+        with torch.cuda.graph(graph):
+            static_outputs = func(*static_inputs)
+        return graph, static_inputs, static_outputs
+
+    def run(self,
+            func: Callable,
+            inputs: Sequence[torch.Tensor],
+            eager_func: Optional[Callable] = None) -> Any:
+        """Run the callable with CUDA graphs if possible.
+
+        Args:
+            func (Callable): The callable to be captured. It must only launch
+                CUDA work that depends on the shapes of its inputs.
+            inputs (Sequence[torch.Tensor]): The input tensors.
+            eager_func (Callable | None): The callable to run the inputs that
+                are not captured, e.g. if it should not share the states of
+                `func` with the captured graphs. Defaults to None, which
+                runs `func` eagerly.
+
+        Returns:
+            Any: The outputs of the callable.
+        """
+        if eager_func is None:
+            eager_func = func
+        if not self.is_available() or not all(
+                isinstance(tensor, torch.Tensor) and tensor.is_cuda
+                for tensor in inputs):
+            return eager_func(*inputs)
+
+        key = self.get_key(inputs)
+        if key not in self._graphs:
+            if len(self._graphs) >= self.max_graphs:
+                return eager_func(*inputs)
+            if key not in self._seen:
+                self._seen.add(key)
+                return eager_func(*inputs)
+            try:
+                self._graphs[key] = self.__capture(func, inputs)
+            except Exception as e:
+                logger = get_root_logger()
+                logger.warning(f'Failed to capture CUDA graph of {key}, '
+                               f'fall back to eager execution: {e}')
+                self._graphs[key] = None
+            self._seen.discard(key)
+
+        entry = self._graphs[key]
+        if entry is None:
+            return eager_func(*inputs)
+        graph, static_inputs, static_outputs = entry
+        for static_input, tensor in zip(static_inputs, inputs):
+            static_input.copy_(tensor)
+        graph.replay()
+        return _copy_structure(static_outputs)
+
+    def clear(self):
+        """Release all captured graphs."""
+        self._graphs.clear()
+        self._seen.clear()
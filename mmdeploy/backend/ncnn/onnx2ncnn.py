@@ -7,6 +7,7 @@ from typing import List, Optional, Union
 
 import onnx
 
+from mmdeploy.utils import save_onnx
 from .init_plugins import get_onnx2ncnn_path
 
 
@@ -60,7 +61,7 @@ def from_onnx(onnx_model: Union[onnx.ModelProto, str],
 
     if not isinstance(onnx_model, str):
         onnx_path = tempfile.NamedTemporaryFile(suffix='.onnx').name
-        onnx.save(onnx_model, onnx_path)
+        save_onnx(onnx_model, onnx_path)
     else:
         onnx_path = onnx_model
 
@@ -1,5 +1,7 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Optional, Sequence
 
 import ncnn
@@ -21,6 +23,12 @@ class NCNNWrapper(BaseWrapper):
         output_names (Sequence[str] | None): Names of model outputs in order.
             Defaults to `None` and the wrapper will load the output names from
             ncnn model.
+        use_vulkan (bool): Whether to use vulkan compute. Defaults to `False`.
+        num_workers (int): The number of worker threads running the images
+            of a batch concurrently, each with its own extractor. Defaults to
+            `1` and the images are processed one after another.
+        num_threads (int | None): The number of threads used by each
+            extractor. Defaults to `None` and the ncnn default is used.
 
     Examples:
         >>> from mmdeploy.backend.ncnn import NCNNWrapper
@@ -39,6 +47,8 @@ class NCNNWrapper(BaseWrapper):
                  bin_file: str,
                  output_names: Optional[Sequence[str]] = None,
                  use_vulkan: bool = False,
+                 num_workers: int = 1,
+                 num_threads: Optional[int] = None,
                  **kwargs):
 
         net = ncnn.Net()
@@ -46,10 +56,17 @@ class NCNNWrapper(BaseWrapper):
             from mmdeploy.backend.ncnn import ncnn_ext
             ncnn_ext.register_mmdeploy_custom_layers(net)
         net.opt.use_vulkan_compute = use_vulkan
+        if num_threads is not None:
+            net.opt.num_threads = num_threads
         net.load_param(param_file)
         net.load_model(bin_file)
 
         self._net = net
+        self._num_threads = num_threads
+        self._executor = ThreadPoolExecutor(num_workers) \
+            if num_workers > 1 else None
+        # reusable input mats of each worker thread
+        self._local = threading.local()
         if output_names is None:
             assert hasattr(self._net, 'output_names')
             output_names = self._net.output_names()
@@ -80,7 +97,7 @@ class NCNNWrapper(BaseWrapper):
         input_list = list(inputs.values())
         batch_size = input_list[0].size(0)
         logger = get_root_logger()
-        if batch_size > 1:
+        if batch_size > 1 and self._executor is None:
             logger.warning(
                 f'ncnn only support batch_size = 1, but given {batch_size}')
         for input_tensor in input_list[1:]:
@@ -90,34 +107,23 @@ class NCNNWrapper(BaseWrapper):
                 'ncnn only supports cpu device'
         # set output names
         output_names = self._output_names
-        # create output dict
-        outputs = dict([name, [None] * batch_size] for name in output_names)
+        inputs = dict((name, input_tensor.detach().cpu().contiguous())
+                      for name, input_tensor in inputs.items())
         # run inference
-        for batch_id in range(batch_size):
-            # create extractor
-            ex = self._net.create_extractor()
-
-            # set inputs
-            for name, input_tensor in inputs.items():
-                data = input_tensor[batch_id].contiguous()
-                data = data.detach().cpu().numpy()
-                input_mat = ncnn.Mat(data)
-                ex.input(name, input_mat)
-
-            # get outputs
-            result = self.__ncnn_execute(
-                extractor=ex, output_names=output_names)
-            for name in output_names:
-                mat = result[name]
-                # deal with special case
-                if mat.empty():
-                    logger.warning(
-                        f'The "{name}" output of ncnn model is empty.')
-                    continue
-                outputs[name][batch_id] = torch.from_numpy(np.array(mat))
+        if self._executor is not None and batch_size > 1:
+            results = list(
+                self._executor.map(lambda i: self.__infer(inputs, i),
+                                   range(batch_size)))
+        else:
+            results = [
+                self.__infer(inputs, batch_id)
+                for batch_id in range(batch_size)
+            ]
 
         # stack outputs together
-        for name, output_tensor in outputs.items():
+        outputs = dict()
+        for name in output_names:
+            output_tensor = [result[name] for result in results]
             if None in output_tensor:
                 outputs[name] = None
             else:
@@ -125,6 +131,71 @@ class NCNNWrapper(BaseWrapper):
 
         return outputs
 
+    def destroy(self):
+        """Shutdown the worker threads."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __get_input_mat(self, name: str, data: np.ndarray) -> ncnn.Mat:
+        """Copy the input data into the reusable mat of the current thread.
+
+        Args:
+            name (str): The input name.
+            data (np.ndarray): The input data of a single image.
+
+        Returns:
+            ncnn.Mat: The input mat.
+        """
+        if data.dtype != np.float32 or not 1 <= data.ndim <= 4:
+            return ncnn.Mat(data)
+        input_mats = getattr(self._local, 'input_mats', None)
+        if input_mats is None:
+            input_mats = self._local.input_mats = dict()
+        shape, mat = input_mats.get(name, (None, None))
+        if shape != data.shape:
+            mat = ncnn.Mat(*data.shape[::-1])
+            input_mats[name] = (data.shape, mat)
+        np.copyto(np.array(mat, copy=False), data)
+        return mat
+
+    def __infer(self, inputs: Dict[str, torch.Tensor],
+                batch_id: int) -> Dict[str, Optional[torch.Tensor]]:
+        """Run inference of a single image in the batch.
+
+        Args:
+            inputs (Dict[str, torch.Tensor]): Key-value pairs of model inputs.
+            batch_id (int): The index of the image in the batch.
+
+        Returns:
+            Dict[str, torch.Tensor | None]: Key-value pairs of model outputs,
+                `None` for empty outputs.
+        """
+        # create extractor
+        ex = self._net.create_extractor()
+        if self._num_threads is not None and hasattr(ex, 'set_num_threads'):
+            ex.set_num_threads(self._num_threads)
+
+        # set inputs
+        for name, input_tensor in inputs.items():
+            data = input_tensor[batch_id].numpy()
+            ex.input(name, self.__get_input_mat(name, data))
+
+        # get outputs
+        result = self.__ncnn_execute(
+            extractor=ex, output_names=self._output_names)
+        outputs = dict()
+        for name in self._output_names:
+            mat = result[name]
+            # deal with special case
+            if mat.empty():
+                logger = get_root_logger()
+                logger.warning(f'The "{name}" output of ncnn model is empty.')
+                outputs[name] = None
+                continue
+            outputs[name] = torch.from_numpy(np.array(mat))
+        return outputs
+
     @TimeCounter.count_time(Backend.NCNN.value)
     def __ncnn_execute(self, extractor: ncnn.Extractor,
                        output_names: Sequence[str]) -> Dict[str, ncnn.Mat]:
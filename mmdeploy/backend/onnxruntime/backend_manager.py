@@ -3,7 +3,7 @@ import logging
 import os.path as osp
 from typing import Any, Callable, Optional, Sequence
 
-from mmdeploy.utils import get_backend_config, get_common_config
+from mmdeploy.utils import get_backend_config, get_common_config, save_onnx
 from ..base import BACKEND_MANAGERS, BaseBackendManager
 
 
@@ -32,10 +32,16 @@ class ONNXRuntimeManager(BaseBackendManager):
         """
 
         from .wrapper import ORTWrapper
+        use_output_buffers = False
+        if deploy_cfg:
+            backend_config = get_backend_config(deploy_cfg)
+            use_output_buffers = backend_config.get('use_output_buffers',
+                                                    False)
         return ORTWrapper(
             onnx_file=backend_files[0],
             device=device,
-            output_names=output_names)
+            output_names=output_names,
+            use_output_buffers=use_output_buffers)
 
     @classmethod
     def is_available(cls, with_custom_ops: bool = False) -> bool:
@@ -152,5 +158,5 @@ class ONNXRuntimeManager(BaseBackendManager):
             common_cfg = get_common_config(deploy_cfg)
             model = onnx.load(ir_files[0])
             model_fp16 = float16.convert_float_to_float16(model, **common_cfg)
-            onnx.save(model_fp16, ir_files[0])
+            save_onnx(model_fp16, ir_files[0])
         return ir_files
@@ -1,7 +1,8 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import ctypes
 import os.path as osp
-from typing import Dict, Optional, Sequence
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence, Tuple
 
 import numpy as np
 import onnxruntime as ort
@@ -23,6 +24,12 @@ class ORTWrapper(BaseWrapper):
          output_names (Sequence[str] | None): Names of model outputs in order.
             Defaults to `None` and the wrapper will load the output names from
             model.
+         use_output_buffers (bool): Whether to keep pre-allocated output
+            tensors for each input shape and bind them to the session
+            directly. The returned tensors share memory with these buffers
+            and stay on the device of the session, so they are overwritten by
+            the next call with the same input shapes. The buffers of the 64
+            most recently used input shapes are kept. Defaults to `False`.
 
      Examples:
          >>> from mmdeploy.backend.onnxruntime import ORTWrapper
@@ -38,7 +45,8 @@ class ORTWrapper(BaseWrapper):
     def __init__(self,
                  onnx_file: str,
                  device: str,
-                 output_names: Optional[Sequence[str]] = None):
+                 output_names: Optional[Sequence[str]] = None,
+                 use_output_buffers: bool = False):
         # get the custom op path
         ort_custom_op_path = get_ops_path()
         session_options = ort.SessionOptions()
@@ -69,6 +77,13 @@ class ORTWrapper(BaseWrapper):
         self.io_binding = sess.io_binding()
         self.device_id = device_id
         self.device_type = 'cpu' if device == 'cpu' else 'cuda'
+        self.use_output_buffers = use_output_buffers
+        # input shapes -> output buffers, `None` marks the input shapes whose
+        # output shapes are data dependent and can not be pre-allocated. The
+        # least recently used input shapes come first.
+        self._output_buffers: Dict[Tuple, Optional[Dict[
+            str, torch.Tensor]]] = OrderedDict()
+        self._max_cached_shapes = 64
         super().__init__(output_names)
 
     def forward(self, inputs: Dict[str,
@@ -81,6 +96,7 @@ class ORTWrapper(BaseWrapper):
         Returns:
             Dict[str, torch.Tensor]: The output name and tensor pairs.
         """
+        input_shapes = []
         for name, input_tensor in inputs.items():
             # set io binding for inputs/outputs
             input_type = self._input_metas[name].type
@@ -99,14 +115,24 @@ class ORTWrapper(BaseWrapper):
                 element_type=element_type,
                 shape=input_tensor.shape,
                 buffer_ptr=input_tensor.data_ptr())
+            input_shapes.append((name, tuple(input_tensor.shape)))
+        shape_key = tuple(input_shapes)
 
-        for name in self._output_names:
-            self.io_binding.bind_output(name)
         # run session to get outputs
         if self.device_type == 'cuda':
             torch.cuda.synchronize()
+        if self.use_output_buffers:
+            outputs = self.__forward_with_buffers(shape_key)
+            if outputs is not None:
+                return outputs
+
+        for name in self._output_names:
+            self.io_binding.bind_output(name)
         self.__ort_execute(self.io_binding)
         output_list = self.io_binding.copy_outputs_to_cpu()
+        if self.use_output_buffers and shape_key not in self._output_buffers:
+            self.__create_output_buffers(shape_key, self._output_names,
+                                         output_list)
         outputs = {}
         for output_name, numpy_tensor in zip(self._output_names, output_list):
             if numpy_tensor.dtype == np.float16:
@@ -115,6 +141,70 @@ class ORTWrapper(BaseWrapper):
 
         return outputs
 
+    def __create_output_buffers(self, shape_key: Tuple,
+                                output_names: Sequence[str],
+                                output_list: Sequence[np.ndarray]):
+        """Allocate the output buffers of the given input shapes.
+
+        Args:
+            shape_key (Tuple): The names and shapes of the inputs.
+            output_names (Sequence[str]): Names of model outputs in order.
+            output_list (Sequence[np.ndarray]): Outputs of a previous run
+                with the same input shapes.
+        """
+        device = 'cpu' if self.device_type == 'cpu' else \
+            f'cuda:{self.device_id}'
+        buffers = {}
+        for name, numpy_tensor in zip(output_names, output_list):
+            dtype = torch.from_numpy(numpy_tensor[:0]).dtype
+            buffers[name] = torch.empty(
+                numpy_tensor.shape, dtype=dtype, device=device)
+        self._output_buffers[shape_key] = buffers
+        if len(self._output_buffers) > self._max_cached_shapes:
+            self._output_buffers.popitem(last=False)
+
+    def __forward_with_buffers(
+            self, shape_key: Tuple) -> Optional[Dict[str, torch.Tensor]]:
+        """Run inference with the pre-allocated output buffers.
+
+        Args:
+            shape_key (Tuple): The names and shapes of the bound inputs.
+
+        Returns:
+            Dict[str, torch.Tensor] | None: The output name and tensor pairs.
+                `None` if no buffer can be used for the input shapes.
+        """
+        if shape_key not in self._output_buffers:
+            return None
+        self._output_buffers.move_to_end(shape_key)
+        buffers = self._output_buffers[shape_key]
+        if buffers is None:
+            return None
+        for name, buffer in buffers.items():
+            element_type = buffer.new_zeros(1, device='cpu').numpy().dtype
+            self.io_binding.bind_output(
+                name=name,
+                device_type=self.device_type,
+                device_id=self.device_id,
+                element_type=element_type,
+                shape=tuple(buffer.shape),
+                buffer_ptr=buffer.data_ptr())
+        try:
+            self.__ort_execute(self.io_binding)
+        except Exception as e:
+            # the output shapes depend on the input data, disable buffers
+            # of these input shapes
+            logger = get_root_logger()
+            logger.debug(f'Disable output buffers for {shape_key}: {e}')
+            self._output_buffers[shape_key] = None
+            return None
+        outputs = {}
+        for name, buffer in buffers.items():
+            if buffer.dtype == torch.float16:
+                buffer = buffer.float()
+            outputs[name] = buffer
+        return outputs
+
     @TimeCounter.count_time(Backend.ONNXRUNTIME.value)
     def __ort_execute(self, io_binding: ort.IOBinding):
         """Run inference with ONNXRuntime session.
@@ -1,9 +1,15 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import abc
+import hashlib
+import itertools
 import os
+import queue
+import threading
 import time
+import warnings
+from concurrent.futures import Future, ThreadPoolExecutor
 from random import randint
-from typing import Dict, Optional, Sequence, Tuple
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 
 import grpc
 import inference_pb2
@@ -92,15 +98,225 @@ class RetryOnRpcErrorClientInterceptor(grpc.UnaryUnaryClientInterceptor,
                                     request_iterator)
 
 
+def _get_file_hash(file: str, chunk_size: int = 1 << 20) -> str:
+    """Get the sha256 of a file, which is read in chunks."""
+    sha256 = hashlib.sha256()
+    with open(file, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def _iter_model_chunks(file: str, file_hash: str,
+                       chunk_size: int) -> Iterator[inference_pb2.ModelChunk]:
+    """Read the model file in chunks for the streaming upload."""
+    with open(file, 'rb') as f:
+        yield inference_pb2.ModelChunk(
+            hash=file_hash,
+            size=os.fstat(f.fileno()).st_size,
+            data=f.read(chunk_size))
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            yield inference_pb2.ModelChunk(data=chunk)
+
+
+def _encode_inputs(inputs: Dict[str, torch.Tensor],
+                   layout: str = 'NHWC') -> List[inference_pb2.Tensor]:
+    """Build `list` inputs for remote snpe engine.
+
+    Args:
+        inputs (Dict[str, torch.Tensor]): Key-value pairs of model inputs.
+        layout (str): The layout of 4-D inputs accepted by the remote engine.
+            Defaults to 'NHWC'.
+
+    Returns:
+        List[inference_pb2.Tensor]: snpe input tensors.
+    """
+
+    def get_shape(shape):
+        if len(shape) == 4:
+            return (0, 2, 3, 1)
+        elif len(shape) == 3:
+            return (0, 1, 2)
+        elif len(shape) == 2:
+            return (0, 1)
+        return (0)
+
+    logger = get_root_logger()
+
+    snpe_inputs = []
+    for name, input_tensor in inputs.items():
+        data = input_tensor.detach()
+        tensor_layout = None
+        if data.dim() == 4:
+            tensor_layout = layout
+            if layout == 'NHWC':
+                data = data.permute(get_shape(data.shape))
+        data = data.cpu().numpy()
+
+        if data.dtype != np.float32:
+            logger.error('SNPE now only support fp32 input')
+            data = data.astype(dtype=np.float32)
+        tensor = inference_pb2.Tensor(
+            data=data.tobytes(),
+            name=name,
+            dtype='float32',
+            shape=list(data.shape),
+            layout=tensor_layout)
+
+        snpe_inputs.append(tensor)
+    return snpe_inputs
+
+
+def _decode_reply(resp: inference_pb2.Reply,
+                  device: str) -> Dict[str, torch.Tensor]:
+    """Get the outputs from the reply of remote snpe engine.
+
+    Args:
+        resp (inference_pb2.Reply): The reply of remote snpe engine.
+        device (str): The device of the outputs.
+
+    Returns:
+        Dict[str, torch.Tensor]: Key-value pairs of model outputs.
+    """
+
+    def get_shape(shape):
+        if len(shape) == 4:
+            if shape[0] == 1 and shape[
+                    1] == 1 and shape[2] > 1 and shape[3] > 1:
+                # snpe NHWC layout works except for segmentation task
+                return (0, 1, 2, 3)
+            return (0, 3, 1, 2)
+        elif len(shape) == 3:
+            return (0, 1, 2)
+        elif len(shape) == 2:
+            return (0, 1)
+        return (0)
+
+    result = dict()
+    if resp.status == 0:
+        for tensor in resp.data:
+            # the outputs share the memory of the reply
+            ndarray = np.frombuffer(
+                tensor.data, dtype=np.float32).reshape(tuple(tensor.shape))
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', UserWarning)
+                data = torch.from_numpy(ndarray)
+            if tensor.layout != 'NCHW':
+                data = data.permute(get_shape(data.shape))
+            result[tensor.name] = data.to(device)
+    else:
+        logger = get_root_logger()
+        logger.error(f'snpe inference failed {resp.info}')
+
+    return result
+
+
+class _InferenceStream:
+    """Pipeline the inference requests in a bidirectional stream.
+
+    The replies are received in a thread and matched to the requests by id.
+
+    Args:
+        stub (inference_pb2_grpc.InferenceStub): The stub of the service.
+        max_in_flight (int): The max number of requests waiting for replies.
+    """
+
+    def __init__(self, stub: inference_pb2_grpc.InferenceStub,
+                 max_in_flight: int):
+        self._stub = stub
+        self._window = threading.Semaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self._request_ids = itertools.count()
+        self._pending = dict()
+        self._requests = None
+
+    def submit(self, tensors: List[inference_pb2.Tensor],
+               device: str) -> Future:
+        """Send the inputs, blocks if the window of requests is full.
+
+        Args:
+            tensors (List[inference_pb2.Tensor]): snpe input tensors.
+            device (str): The device of the outputs.
+
+        Returns:
+            Future: The future of key-value pairs of model outputs.
+        """
+        self._window.acquire()
+        future = Future()
+        with self._lock:
+            request_id = next(self._request_ids)
+            self._pending[request_id] = (future, device)
+            if self._requests is None:
+                self._requests = queue.Queue()
+                replies = self._stub.StreamInference(
+                    iter(self._requests.get, None))
+                threading.Thread(
+                    target=self._receive,
+                    args=(self._requests, replies),
+                    daemon=True).start()
+            requests = self._requests
+        requests.put(inference_pb2.TensorList(id=request_id, data=tensors))
+        return future
+
+    def _receive(self, requests: queue.Queue,
+                 replies: Iterator[inference_pb2.Reply]):
+        """Set the results of the pending requests with the replies."""
+        error = None
+        try:
+            for reply in replies:
+                with self._lock:
+                    future, device = self._pending.pop(reply.id)
+                self._window.release()
+                try:
+                    outputs = _decode_reply(reply, device)
+                except Exception as e:
+                    future.set_exception(e)
+                    raise
+                future.set_result(outputs)
+        except Exception as e:
+            error = e
+            if not isinstance(e, grpc.RpcError):
+                # stop the stream with the unexpected replies
+                replies.cancel()
+                requests.put(None)
+
+        # the next request opens a new stream
+        with self._lock:
+            if self._requests is requests:
+                self._requests = None
+            pending = list(self._pending.values())
+            self._pending.clear()
+        if error is not None or len(pending) > 0:
+            logger = get_root_logger()
+            logger.error(f'snpe inference stream closed {error}')
+        for future, _ in pending:
+            self._window.release()
+            future.set_exception(
+                error or RuntimeError('snpe inference stream closed'))
+
+    def close(self):
+        """Close the stream after the sent requests."""
+        with self._lock:
+            if self._requests is not None:
+                self._requests.put(None)
+                self._requests = None
+
+
 @BACKEND_WRAPPER.register_module(Backend.SNPE.value)
 class SNPEWrapper(BaseWrapper):
     """snpe wrapper class for inference.
 
     Args:
         dlc_file (str): Path of a weight file.
+        uri (str): The uri of the remote snpe inference service.
         output_names (Sequence[str] | None): Names of model outputs in order.
             Defaults to `None` and the wrapper will load the output names from
             snpe model.
+        chunk_size (int): The chunk size in bytes to upload the model file.
+            The model file is only uploaded if it is not cached by the
+            service. Defaults to 1MB.
+        max_in_flight (int): The max number of requests sent by
+            :meth:`forward_async` and waiting for replies. Defaults to 4.
 
     Examples:
         >>> from mmdeploy.backend.snpe import SNPEWrapper
@@ -111,12 +327,17 @@ class SNPEWrapper(BaseWrapper):
         >>> inputs = dict(input=torch.randn(1, 3, 224, 224))
         >>> outputs = model(inputs)
         >>> print(outputs)
+        >>> # pipeline the requests over the network
+        >>> futures = [model.forward_async(inputs) for _ in range(8)]
+        >>> outputs = [future.result() for future in futures]
     """
 
     def __init__(self,
                  dlc_file: str,
                  uri: str,
                  output_names: Optional[Sequence[str]] = None,
+                 chunk_size: int = 1 << 20,
+                 max_in_flight: int = 4,
                  **kwargs):
 
         logger = get_root_logger()
@@ -136,18 +357,14 @@ class SNPEWrapper(BaseWrapper):
         if uri is None:
             logger.error('URI not set')
 
-        weights = bytes()
-        filesize = os.stat(dlc_file).st_size
-
-        logger.info(f'reading local model file {dlc_file}')
-        with open(dlc_file, 'rb') as f:
-            weights = f.read(filesize)
-
         self.stub = inference_pb2_grpc.InferenceStub(
             grpc.intercept_channel(grpc.insecure_channel(uri), *interceptors))
 
+        model = self.__upload_model(dlc_file, chunk_size)
+        if model is None:
+            return
+
         logger.info('init remote SNPE engine with RPC, please wait...')
-        model = inference_pb2.Model(name=dlc_file, weights=weights, device=1)
         resp = self.stub.Init(model)
 
         if resp.status != 0:
@@ -157,9 +374,58 @@ class SNPEWrapper(BaseWrapper):
         output = self.stub.OutputNames(inference_pb2.Empty())
         output_names = output.names
 
+        try:
+            config = self.stub.Config(inference_pb2.Empty())
+        except grpc.RpcError as e:
+            if e.code() != grpc.StatusCode.UNIMPLEMENTED:
+                raise
+            config = inference_pb2.ServiceConfig()
+        # skip the permutes if the service accepts NCHW
+        self._layout = 'NCHW' if 'NCHW' in config.layouts else 'NHWC'
+        self._stream = _InferenceStream(
+            self.stub, max_in_flight) if config.stream else None
+        self._executor = None
+
         super().__init__(output_names)
         logger.info(f'init success, outputs {output_names}')
 
+    def __upload_model(self, dlc_file: str,
+                       chunk_size: int) -> Optional[inference_pb2.Model]:
+        """Upload the model file if it is not cached by the remote service.
+
+        Args:
+            dlc_file (str): Path of the model file.
+            chunk_size (int): The chunk size in bytes to upload the file.
+
+        Returns:
+            inference_pb2.Model | None: The model to init the remote engine,
+                `None` if the upload failed.
+        """
+        logger = get_root_logger()
+        file_hash = _get_file_hash(dlc_file)
+        try:
+            resp = self.stub.HasModel(inference_pb2.ModelInfo(hash=file_hash))
+        except grpc.RpcError as e:
+            if e.code() != grpc.StatusCode.UNIMPLEMENTED:
+                raise
+            # the service without model cache
+            logger.info(f'reading local model file {dlc_file}')
+            with open(dlc_file, 'rb') as f:
+                weights = f.read()
+            return inference_pb2.Model(
+                name=dlc_file, weights=weights, device=1)
+
+        if resp.status == 0:
+            logger.info(f'model file {dlc_file} is cached, skip uploading')
+        else:
+            logger.info(f'uploading local model file {dlc_file}')
+            resp = self.stub.UploadModel(
+                _iter_model_chunks(dlc_file, file_hash, chunk_size))
+            if resp.status != 0:
+                logger.error(f'upload SNPE model failed {resp.info}')
+                return None
+        return inference_pb2.Model(name=dlc_file, hash=file_hash, device=1)
+
     def forward(self, inputs: Dict[str,
                                    torch.Tensor]) -> Dict[str, torch.Tensor]:
         """Run forward inference.
@@ -170,44 +436,56 @@ class SNPEWrapper(BaseWrapper):
         Returns:
             Dict[str, torch.Tensor]: Key-value pairs of model outputs.
         """
+        if self._stream is not None:
+            return self.forward_async(inputs).result()
 
-        def get_shape(shape):
-            if len(shape) == 4:
-                return (0, 2, 3, 1)
-            elif len(shape) == 3:
-                return (0, 1, 2)
-            elif len(shape) == 2:
-                return (0, 1)
-            return (0)
+        device_type = next(iter(inputs.values())).device.type
+        return self.__snpe_execute(
+            tensorList=inference_pb2.TensorList(
+                data=_encode_inputs(inputs, self._layout)),
+            device=device_type)
 
-        input_list = list(inputs.values())
-        device_type = input_list[0].device.type
+    def forward_async(self, inputs: Dict[str, torch.Tensor]) -> Future:
+        """Run forward inference without waiting for the results.
 
-        logger = get_root_logger()
+        The requests are pipelined in one stream, so the remote device keeps
+        busy during the network round trips. The call blocks if there are
+        `max_in_flight` requests waiting for replies.
 
-        # build `list` inputs for remote snpe engine
-        snpe_inputs = []
-        for name, input_tensor in inputs.items():
-            data = input_tensor.contiguous().detach()
-            # snpe input layout is  NHWC
-            data = data.permute(get_shape(data.shape))
-            data = data.cpu().numpy()
-
-            if data.dtype != np.float32:
-                logger.error('SNPE now only support fp32 input')
-                data = data.astype(dtype=np.float32)
-            tensor = inference_pb2.Tensor(
-                data=data.tobytes(),
-                name=name,
-                dtype='float32',
-                shape=list(data.shape))
-
-            snpe_inputs.append(tensor)
+        Args:
+            inputs (Dict[str, torch.Tensor]): Key-value pairs of model inputs.
 
-        return self.__snpe_execute(
-            tensorList=inference_pb2.TensorList(data=snpe_inputs),
+        Returns:
+            Future: The future of key-value pairs of model outputs.
+        """
+        device_type = next(iter(inputs.values())).device.type
+        tensors = _encode_inputs(inputs, self._layout)
+        if self._stream is not None:
+            start_time = time.perf_counter()
+            future = self._stream.submit(tensors, device_type)
+            if TimeCounter.names[Backend.SNPE.value]['enable']:
+                # time the requests until the replies, like the unary calls
+                def record_time(future: Future):
+                    if future.exception() is None:
+                        TimeCounter.record_time(Backend.SNPE.value, start_time,
+                                                time.perf_counter())
+
+                future.add_done_callback(record_time)
+            return future
+
+        # the service without StreamInference
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        return self._executor.submit(
+            self.__snpe_execute,
+            tensorList=inference_pb2.TensorList(data=tensors),
             device=device_type)
 
+    def __del__(self):
+        stream = getattr(self, '_stream', None)
+        if stream is not None:
+            stream.close()
+
     @TimeCounter.count_time(Backend.SNPE.value)
     def __snpe_execute(self, tensorList: inference_pb2.TensorList,
                        device: str) -> Dict[str, torch.tensor]:
@@ -220,31 +498,4 @@ class SNPEWrapper(BaseWrapper):
             dict[str, torch.tensor]: Inference results of snpe model.
         """
         resp = self.stub.Inference(tensorList)
-
-        def get_shape(shape):
-            if len(shape) == 4:
-                if shape[0] == 1 and shape[
-                        1] == 1 and shape[2] > 1 and shape[3] > 1:
-                    # snpe NHWC layout works except for segmentation task
-                    return (0, 1, 2, 3)
-                return (0, 3, 1, 2)
-            elif len(shape) == 3:
-                return (0, 1, 2)
-            elif len(shape) == 2:
-                return (0, 1)
-            return (0)
-
-        result = dict()
-        if resp.status == 0:
-            for tensor in resp.data:
-                ndarray = np.frombuffer(tensor.data, dtype=np.float32)
-                shape = tuple(tensor.shape)
-                data = torch.from_numpy(
-                    ndarray.reshape(shape).copy()).to(device)
-                data = data.permute(get_shape(data.shape))
-                result[tensor.name] = data
-        else:
-            logger = get_root_logger()
-            logger.error(f'snpe inference failed {resp.info}')
-
-        return result
+        return _decode_reply(resp, device)
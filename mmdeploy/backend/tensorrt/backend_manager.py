@@ -3,6 +3,7 @@ import logging
 import os.path as osp
 from typing import Any, Callable, Optional, Sequence
 
+from mmdeploy.utils import get_backend_config
 from ..base import BACKEND_MANAGERS, BaseBackendManager
 
 
@@ -31,7 +32,17 @@ class TensorRTManager(BaseBackendManager):
         """
 
         from .wrapper import TRTWrapper
-        return TRTWrapper(engine=backend_files[0], output_names=output_names)
+        use_output_buffers = use_cuda_graph = False
+        if deploy_cfg:
+            backend_config = get_backend_config(deploy_cfg)
+            use_output_buffers = backend_config.get('use_output_buffers',
+                                                    False)
+            use_cuda_graph = backend_config.get('use_cuda_graph', False)
+        return TRTWrapper(
+            engine=backend_files[0],
+            output_names=output_names,
+            use_output_buffers=use_output_buffers,
+            use_cuda_graph=use_cuda_graph)
 
     @classmethod
     def is_available(cls, with_custom_ops: bool = False) -> bool:
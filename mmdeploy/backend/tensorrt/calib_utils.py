@@ -1,5 +1,7 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-from typing import Any, Dict, Sequence, Union
+import queue
+import threading
+from typing import Any, Dict, Optional, Sequence, Union
 
 import numpy as np
 import pycuda.autoinit  # noqa:F401
@@ -20,6 +22,8 @@ class HDF5Calibrator(trt.IInt8Calibrator):
         device_id (int): Cuda device id, defaults to 0.
         algorithm (trt.CalibrationAlgoType): Calibration algo type, defaults
             to `trt.CalibrationAlgoType.ENTROPY_CALIBRATION_2`.
+        num_prefetch (int): The number of batches read ahead by a background
+            thread, defaults to 2.
     """
 
     def __init__(
@@ -29,6 +33,7 @@ class HDF5Calibrator(trt.IInt8Calibrator):
             model_type: str = 'end2end',
             device_id: int = 0,
             algorithm: trt.CalibrationAlgoType = DEFAULT_CALIBRATION_ALGORITHM,
+            num_prefetch: int = 2,
             **kwargs):
         super().__init__()
         import h5py
@@ -48,7 +53,8 @@ class HDF5Calibrator(trt.IInt8Calibrator):
         self.input_shapes = input_shapes
         self.kwargs = kwargs
 
-        # create buffers that will hold data batches
+        # device buffers that hold data batches, they are allocated once and
+        # reused since the data is always tiled to the opt shape.
         self.buffers = dict()
 
         self.count = 0
@@ -56,43 +62,92 @@ class HDF5Calibrator(trt.IInt8Calibrator):
         self.dataset_length = len(first_input_group)
         self.batch_size = first_input_group['0'].shape[0]
 
+        self.num_prefetch = num_prefetch
+        self._prefetch_queue = None
+        self._prefetch_names = None
+        self._prefetch_thread = None
+
     def __del__(self):
         """Close h5py file if necessary."""
+        self._stop_prefetch()
         if hasattr(self, 'calib_file'):
             self.calib_file.close()
 
+    def _read_data(self, name: str, index: int) -> np.ndarray:
+        """Read data and tile it to the opt shape."""
+        input_group = self.calib_data[name]
+        data_np = input_group[str(index)][...].astype(np.float32, copy=False)
+
+        # tile the tensor so we can keep the same distribute
+        opt_shape = tuple(self.input_shapes[name]['opt_shape'])
+        data_shape = data_np.shape
+        if data_shape != opt_shape:
+            reps = [
+                int(np.ceil(opt_s / data_s))
+                for opt_s, data_s in zip(opt_shape, data_shape)
+            ]
+
+            data_np = np.tile(data_np, reps)
+
+            slice_list = tuple(slice(0, end) for end in opt_shape)
+            data_np = data_np[slice_list]
+        return np.ascontiguousarray(data_np)
+
+    def _prefetch(self, names: Sequence[str], start: int):
+        """Read batches in the background."""
+        for index in range(start, self.dataset_length):
+            batch = [self._read_data(name, index) for name in names]
+            self._prefetch_queue.put(batch)
+            if self._prefetch_names is None:
+                return
+
+    def _stop_prefetch(self):
+        """Stop the prefetch thread."""
+        thread = getattr(self, '_prefetch_thread', None)
+        if thread is None:
+            return
+        self._prefetch_names = None
+        # unblock the thread
+        while thread.is_alive():
+            try:
+                self._prefetch_queue.get(timeout=0.01)
+            except queue.Empty:
+                pass
+        self._prefetch_thread = None
+
+    def _next_batch(self, names: Sequence[str]) -> Optional[list]:
+        """Get the next host batch, from the prefetch thread if enabled."""
+        if self.num_prefetch <= 0:
+            return [self._read_data(name, self.count) for name in names]
+        names = list(names)
+        if self._prefetch_names != names:
+            self._stop_prefetch()
+            self._prefetch_queue = queue.Queue(maxsize=self.num_prefetch)
+            self._prefetch_names = names
+            self._prefetch_thread = threading.Thread(
+                target=self._prefetch, args=(names, self.count), daemon=True)
+            self._prefetch_thread.start()
+        return self._prefetch_queue.get()
+
     def get_batch(self, names: Sequence[str], **kwargs) -> list:
         """Get batch data."""
         if self.count < self.dataset_length:
 
             ret = []
-            for name in names:
-                input_group = self.calib_data[name]
-                data_np = input_group[str(self.count)][...].astype(np.float32)
-
-                # tile the tensor so we can keep the same distribute
-                opt_shape = self.input_shapes[name]['opt_shape']
-                data_shape = data_np.shape
-
-                reps = [
-                    int(np.ceil(opt_s / data_s))
-                    for opt_s, data_s in zip(opt_shape, data_shape)
-                ]
-
-                data_np = np.tile(data_np, reps)
-
-                slice_list = tuple(slice(0, end) for end in opt_shape)
-                data_np = data_np[slice_list]
-
-                data_np_cuda_ptr = cuda.mem_alloc(data_np.nbytes)
-                cuda.memcpy_htod(data_np_cuda_ptr,
-                                 np.ascontiguousarray(data_np))
-                self.buffers[name] = data_np_cuda_ptr
-
-                ret.append(self.buffers[name])
+            batch = self._next_batch(names)
+            for name, data_np in zip(names, batch):
+                if name not in self.buffers or \
+                        self.buffers[name][1] != data_np.nbytes:
+                    self.buffers[name] = (cuda.mem_alloc(data_np.nbytes),
+                                          data_np.nbytes)
+                data_np_cuda_ptr = self.buffers[name][0]
+                cuda.memcpy_htod(data_np_cuda_ptr, data_np)
+
+                ret.append(data_np_cuda_ptr)
             self.count += 1
             return ret
         else:
+            self._stop_prefetch()
             return None
 
     def get_algorithm(self) -> trt.CalibrationAlgoType:
@@ -3,13 +3,16 @@ import logging
 import os
 import re
 import sys
+import tempfile
 from typing import Any, Dict, Optional, Sequence, Union
 
 import onnx
 import tensorrt as trt
+from onnx.external_data_helper import load_external_data_for_model
 from packaging import version
 
-from mmdeploy.utils import get_root_logger
+from mmdeploy.utils import get_root_logger, save_onnx
+from mmdeploy.utils.onnx_utils import MAX_PROTO_SIZE
 from .init_plugins import load_tensorrt_plugin
 
 
@@ -174,7 +177,16 @@ def from_onnx(onnx_model: Union[str, onnx.ModelProto],
     if isinstance(onnx_model, str):
         parse_valid = parser.parse_from_file(onnx_model)
     elif isinstance(onnx_model, onnx.ModelProto):
-        parse_valid = parser.parse(onnx_model.SerializeToString())
+        if onnx_model.ByteSize() > MAX_PROTO_SIZE:
+            # the model can not be serialized, parse it with external data
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                onnx_path = os.path.join(tmp_dir, 'model.onnx')
+                save_onnx(onnx_model, onnx_path, save_as_external_data=True)
+                parse_valid = parser.parse_from_file(onnx_path)
+                # restore the weights moved into the external data
+                load_external_data_for_model(onnx_model, tmp_dir)
+        else:
+            parse_valid = parser.parse(onnx_model.SerializeToString())
     else:
         raise TypeError('Unsupported onnx model type!')
 
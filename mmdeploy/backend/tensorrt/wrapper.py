@@ -1,5 +1,6 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-from typing import Any, Dict, Optional, Sequence, Union
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
 
 import tensorrt as trt
 import torch
@@ -7,6 +8,7 @@ import torch
 from mmdeploy.utils import Backend
 from mmdeploy.utils.timer import TimeCounter
 from ..base import BACKEND_WRAPPER, BaseWrapper
+from ..base.cuda_graph import CUDAGraphCache
 from .init_plugins import load_tensorrt_plugin
 from .torch_allocator import TorchAllocator
 from .utils import load
@@ -61,11 +63,26 @@ class TRTWrapper(BaseWrapper):
         output_names (Sequence[str] | None): Names of model outputs  in order.
             Defaults to `None` and the wrapper will load the output names from
             model.
+        device_id (int): The device id of the engine. Defaults to `0`.
+        use_output_buffers (bool): Whether to reuse the output tensors of
+            the same input shapes. The returned tensors are overwritten by the
+            next call with the same input shapes. Defaults to `False`.
+        use_cuda_graph (bool): Whether to capture the engine execution into
+            CUDA graphs by input shapes and replay them. The outputs are then
+            owned by the graphs and overwritten by the next call with the
+            same input shapes. Each graph runs with its own execution context
+            whose input shapes are never changed, which costs the device
+            memory of one context per graph. Defaults to `False`.
 
     Note:
         If the engine is converted from onnx model. The input_names and
         output_names should be the same as onnx model.
 
+        The binding indices and output shapes are resolved once for each
+        input shape and cached. If the engine has multiple optimization
+        profiles, the first profile that accepts the input shapes is used,
+        and each profile runs with its own execution context.
+
     Examples:
         >>> from mmdeploy.backend.tensorrt import TRTWrapper
         >>> engine_file = 'resnet.engine'
@@ -78,7 +95,9 @@ class TRTWrapper(BaseWrapper):
     def __init__(self,
                  engine: Union[str, trt.ICudaEngine],
                  output_names: Optional[Sequence[str]] = None,
-                 device_id: int = 0):
+                 device_id: int = 0,
+                 use_output_buffers: bool = False,
+                 use_cuda_graph: bool = False):
         super().__init__(output_names)
         load_tensorrt_plugin()
         self.engine = engine
@@ -96,11 +115,27 @@ class TRTWrapper(BaseWrapper):
         if hasattr(self.context, 'temporary_allocator'):
             self.context.temporary_allocator = self.allocator
 
+        self.use_output_buffers = use_output_buffers
+        # profile id -> execution context
+        self._contexts = {0: self.context}
+        # profile id -> input shapes last set to the context
+        self._context_shapes = dict()
+        # input shapes -> resolved bindings, least recently used first
+        self._binding_cache = OrderedDict()
+        self._max_cached_shapes = 64
+        self._cuda_graphs = CUDAGraphCache() if use_cuda_graph else None
+        # input shapes -> execution context of the captured graph
+        self._graph_contexts = dict()
         self.__load_io_names()
+        self.__load_profiles()
 
     def __load_io_names(self):
         """Load input/output names from engine."""
-        names = [_ for _ in self.engine]
+        # bindings of profile k > 0 are duplicated with a `[profile k]` suffix
+        num_profiles = self.engine.num_optimization_profiles
+        self._num_bindings_per_profile = self.engine.num_bindings // \
+            num_profiles
+        names = [_ for _ in self.engine][:self._num_bindings_per_profile]
         input_names = list(filter(self.engine.binding_is_input, names))
         self._input_names = input_names
 
@@ -108,6 +143,166 @@ class TRTWrapper(BaseWrapper):
             output_names = list(set(names) - set(input_names))
             self._output_names = output_names
 
+    def __load_profiles(self):
+        """Load the min/max input shapes of all optimization profiles."""
+        self._profiles = []
+        for profile_id in range(self.engine.num_optimization_profiles):
+            profile = dict()
+            for input_name in self._input_names:
+                min_shape, _, max_shape = self.engine.get_profile_shape(
+                    profile_id, input_name)
+                profile[input_name] = (tuple(min_shape), tuple(max_shape))
+            self._profiles.append(profile)
+
+    def __select_profile(self, input_shapes: Dict[str, Tuple]) -> int:
+        """Select the first optimization profile accepting the inputs.
+
+        Args:
+            input_shapes (Dict[str, Tuple]): The input name and shape pairs.
+
+        Returns:
+            int: The id of the selected optimization profile.
+        """
+        for profile_id, profile in enumerate(self._profiles):
+            valid = True
+            for input_name, shape in input_shapes.items():
+                min_shape, max_shape = profile[input_name]
+                assert len(shape) == len(
+                    min_shape), 'Input dim is different from engine profile.'
+                if not all(s_min <= s_input <= s_max
+                           for s_min, s_input, s_max in zip(
+                               min_shape, shape, max_shape)):
+                    valid = False
+                    break
+            if valid:
+                return profile_id
+
+        profile_ranges = [{
+            name: f'{min_shape} - {max_shape}'
+            for name, (min_shape, max_shape) in profile.items()
+        } for profile in self._profiles]
+        raise AssertionError('Input shape should be in range of one of the '
+                             f'profiles {profile_ranges}'
+                             f' but get {input_shapes}.')
+
+    def __get_context(self, profile_id: int) -> Any:
+        """Get the execution context of an optimization profile.
+
+        Args:
+            profile_id (int): The id of the optimization profile.
+
+        Returns:
+            tensorrt.IExecutionContext: The execution context.
+        """
+        if profile_id not in self._contexts:
+            self._contexts[profile_id] = self.__create_context(profile_id)
+        return self._contexts[profile_id]
+
+    def __create_context(self, profile_id: int) -> Any:
+        """Create an execution context of an optimization profile.
+
+        Args:
+            profile_id (int): The id of the optimization profile.
+
+        Returns:
+            tensorrt.IExecutionContext: The execution context.
+        """
+        context = self.engine.create_execution_context()
+        if hasattr(context, 'temporary_allocator'):
+            context.temporary_allocator = self.allocator
+        if hasattr(context, 'set_optimization_profile_async'):
+            success = context.set_optimization_profile_async(
+                profile_id,
+                torch.cuda.current_stream().cuda_stream)
+        else:
+            context.active_optimization_profile = profile_id
+            success = context.active_optimization_profile == profile_id
+        if success is False:
+            raise RuntimeError(
+                f'Failed to set optimization profile {profile_id}.')
+        return context
+
+    def __get_graph_context(self, shape_key: Tuple, cache: Dict[str,
+                                                                Any]) -> Any:
+        """Get the execution context of the CUDA graph of the input shapes.
+
+        A replayed graph skips setting the input shapes, so the context of
+        each graph is not shared and its input shapes are set only once.
+
+        Args:
+            shape_key (Tuple): The input name and shape pairs.
+            cache (Dict[str, Any]): The resolved bindings of the inputs.
+
+        Returns:
+            tensorrt.IExecutionContext: The execution context.
+        """
+        context = self._graph_contexts.get(shape_key, None)
+        if context is None:
+            context = self.__create_context(cache['profile_id'])
+            for input_name, shape in shape_key:
+                context.set_binding_shape(cache['input_indices'][input_name],
+                                          shape)
+            self._graph_contexts[shape_key] = context
+        return context
+
+    def __set_binding_shapes(self, shape_key: Tuple, cache: Dict[str, Any]):
+        """Set the input shapes to the execution context if they changed.
+
+        Args:
+            shape_key (Tuple): The input name and shape pairs.
+            cache (Dict[str, Any]): The resolved bindings of the inputs.
+        """
+        profile_id = cache['profile_id']
+        if self._context_shapes.get(profile_id, None) == shape_key:
+            return
+        context = cache['context']
+        for input_name, shape in shape_key:
+            context.set_binding_shape(cache['input_indices'][input_name],
+                                      shape)
+        self._context_shapes[profile_id] = shape_key
+
+    def __get_binding_cache(self, shape_key: Tuple) -> Dict[str, Any]:
+        """Get the resolved bindings of the given input shapes.
+
+        Args:
+            shape_key (Tuple): The input name and shape pairs.
+
+        Returns:
+            Dict[str, Any]: The profile id, execution context, binding
+                indices, output specs and reusable output tensors.
+        """
+        cache = self._binding_cache.get(shape_key, None)
+        if cache is not None:
+            self._binding_cache.move_to_end(shape_key)
+            return cache
+
+        profile_id = self.__select_profile(dict(shape_key))
+        offset = profile_id * self._num_bindings_per_profile
+        input_indices = dict(
+            (input_name, self.engine.get_binding_index(input_name) + offset)
+            for input_name, _ in shape_key)
+        cache = dict(
+            profile_id=profile_id,
+            context=self.__get_context(profile_id),
+            input_indices=input_indices,
+            output_specs=None,
+            outputs=None)
+        self.__set_binding_shapes(shape_key, cache)
+
+        output_specs = dict()
+        for output_name in self._output_names:
+            idx = self.engine.get_binding_index(output_name) + offset
+            dtype = torch_dtype_from_trt(self.engine.get_binding_dtype(idx))
+            shape = tuple(cache['context'].get_binding_shape(idx))
+            device = torch_device_from_trt(self.engine.get_location(idx))
+            output_specs[output_name] = (idx, shape, dtype, device)
+        cache['output_specs'] = output_specs
+
+        self._binding_cache[shape_key] = cache
+        if len(self._binding_cache) > self._max_cached_shapes:
+            self._binding_cache.popitem(last=False)
+        return cache
+
     def __on_state_dict(self, state_dict: Dict[str, Any], prefix: str):
         """State dict hook
         Args:
@@ -132,55 +327,77 @@ class TRTWrapper(BaseWrapper):
         """
         assert self._input_names is not None
         assert self._output_names is not None
-        bindings = [None] * (len(self._input_names) + len(self._output_names))
 
-        profile_id = 0
         inputs = dict((name, data.contiguous().int() if data.dtype ==
                        torch.long else data.contiguous())
                       for name, data in inputs.items())
-        for input_name, input_tensor in inputs.items():
-            # check if input shape is valid
-            profile = self.engine.get_profile_shape(profile_id, input_name)
-            assert input_tensor.dim() == len(
-                profile[0]), 'Input dim is different from engine profile.'
-            for s_min, s_input, s_max in zip(profile[0], input_tensor.shape,
-                                             profile[2]):
-                assert s_min <= s_input <= s_max, \
-                    'Input shape should be between ' \
-                    + f'{profile[0]} and {profile[2]}' \
-                    + f' but get {tuple(input_tensor.shape)}.'
-            idx = self.engine.get_binding_index(input_name)
+        if self._cuda_graphs is not None:
+            input_names = list(inputs.keys())
+            return self._cuda_graphs.run(
+                lambda *tensors: self.__execute(
+                    dict(zip(input_names, tensors)), use_graph_context=True),
+                list(inputs.values()),
+                eager_func=lambda *tensors: self.__execute(
+                    dict(zip(input_names, tensors))))
+        return self.__execute(inputs)
+
+    def __execute(self,
+                  inputs: Dict[str, torch.Tensor],
+                  use_graph_context: bool = False) -> Dict[str, torch.Tensor]:
+        """Bind the inputs and outputs and run the engine.
+
+        Args:
+            inputs (Dict[str, torch.Tensor]): The contiguous input name and
+                tensor pairs.
+            use_graph_context (bool): Whether to run with the execution
+                context of the CUDA graph of the input shapes. Defaults to
+                `False`.
 
+        Return:
+            Dict[str, torch.Tensor]: The output name and tensor pairs.
+        """
+        bindings = [0] * self.engine.num_bindings
+        shape_key = tuple(
+            (name, tuple(data.shape)) for name, data in inputs.items())
+        cache = self.__get_binding_cache(shape_key)
+        if use_graph_context:
+            context = self.__get_graph_context(shape_key, cache)
+        else:
+            self.__set_binding_shapes(shape_key, cache)
+            context = cache['context']
+
+        for input_name, input_tensor in inputs.items():
             # All input tensors must be gpu variables
             assert 'cuda' in input_tensor.device.type
-            input_tensor = input_tensor.contiguous()
-            if input_tensor.dtype == torch.long:
-                input_tensor = input_tensor.int()
-            self.context.set_binding_shape(idx, tuple(input_tensor.shape))
-            bindings[idx] = input_tensor.contiguous().data_ptr()
+            bindings[cache['input_indices'][input_name]] = \
+                input_tensor.data_ptr()
 
         # create output tensors
-        outputs = {}
-        for output_name in self._output_names:
-            idx = self.engine.get_binding_index(output_name)
-            dtype = torch_dtype_from_trt(self.engine.get_binding_dtype(idx))
-            shape = tuple(self.context.get_binding_shape(idx))
-
-            device = torch_device_from_trt(self.engine.get_location(idx))
-            output = torch.empty(size=shape, dtype=dtype, device=device)
-            outputs[output_name] = output
-            bindings[idx] = output.data_ptr()
-
-        self.__trt_execute(bindings=bindings)
-
-        return outputs
+        outputs = cache['outputs']
+        if outputs is None:
+            outputs = dict(
+                (output_name,
+                 torch.empty(size=shape, dtype=dtype, device=device))
+                for output_name, (_, shape, dtype,
+                                  device) in cache['output_specs'].items())
+            if self.use_output_buffers:
+                cache['outputs'] = outputs
+        for output_name, output in outputs.items():
+            bindings[cache['output_specs'][output_name][0]] = \
+                output.data_ptr()
+
+        self.__trt_execute(context=context, bindings=bindings)
+
+        return dict(outputs)
 
     @TimeCounter.count_time(Backend.TENSORRT.value)
-    def __trt_execute(self, bindings: Sequence[int]):
+    def __trt_execute(self, context: Any, bindings: Sequence[int]):
         """Run inference with TensorRT.
 
         Args:
+            context (tensorrt.IExecutionContext): The execution context of
+                the selected optimization profile.
             bindings (list[int]): A list of integer binding the input/output.
         """
-        self.context.execute_async_v2(bindings,
-                                      torch.cuda.current_stream().cuda_stream)
+        context.execute_async_v2(bindings,
+                                 torch.cuda.current_stream().cuda_stream)
@@ -2,6 +2,7 @@
 import logging
 from typing import Any, Callable, Optional, Sequence
 
+from mmdeploy.utils import get_backend_config
 from ..base import BACKEND_MANAGERS, BaseBackendManager
 
 
@@ -29,10 +30,15 @@ class TorchScriptManager(BaseBackendManager):
                 to None.
         """
         from .wrapper import TorchscriptWrapper
+        use_cuda_graph = False
+        if deploy_cfg:
+            backend_config = get_backend_config(deploy_cfg)
+            use_cuda_graph = backend_config.get('use_cuda_graph', False)
         return TorchscriptWrapper(
             model=backend_files[0],
             input_names=input_names,
-            output_names=output_names)
+            output_names=output_names,
+            use_cuda_graph=use_cuda_graph)
 
     @classmethod
     def is_available(cls, with_custom_ops: bool = False) -> bool:
@@ -8,6 +8,7 @@ import torch
 from mmdeploy.utils import Backend, get_root_logger
 from mmdeploy.utils.timer import TimeCounter
 from ..base import BACKEND_WRAPPER, BaseWrapper
+from ..base.cuda_graph import CUDAGraphCache
 from .init_plugins import get_ops_path
 
 
@@ -21,6 +22,10 @@ class TorchscriptWrapper(BaseWrapper):
             Defaults to `None` and the wrapper will accept list or Tensor.
         output_names (Sequence[str] | None): Names of model outputs  in order.
             Defaults to `None` and the wrapper will return list or Tensor.
+        use_cuda_graph (bool): Whether to capture the model into CUDA graphs
+            by input shapes and replay them. The outputs are then owned by
+            the graphs and overwritten by the next call with the same input
+            shapes. Defaults to `False`.
 
     Note:
         If the engine is converted from onnx model. The input_names and
@@ -39,7 +44,8 @@ class TorchscriptWrapper(BaseWrapper):
     def __init__(self,
                  model: Union[str, torch.jit.RecursiveScriptModule],
                  input_names: Optional[Sequence[str]] = None,
-                 output_names: Optional[Sequence[str]] = None):
+                 output_names: Optional[Sequence[str]] = None,
+                 use_cuda_graph: bool = False):
         logger = get_root_logger()
 
         # load custom ops if exist
@@ -64,6 +70,7 @@ class TorchscriptWrapper(BaseWrapper):
 
         self._input_names = input_names
         self._output_names = output_names
+        self._cuda_graphs = CUDAGraphCache() if use_cuda_graph else None
 
     def forward(
         self, inputs: Union[torch.Tensor, Sequence[torch.Tensor],
@@ -91,7 +98,11 @@ class TorchscriptWrapper(BaseWrapper):
         elif isinstance(inputs, torch.Tensor):
             inputs = [inputs]
 
-        outputs = self.__torchscript_execute(inputs)
+        if self._cuda_graphs is not None:
+            outputs = self._cuda_graphs.run(
+                lambda *tensors: self.__torchscript_execute(tensors), inputs)
+        else:
+            outputs = self.__torchscript_execute(inputs)
 
         if self._output_names is not None and is_dict_inputs:
             # output to dict
@@ -53,6 +53,18 @@ class End2EndModel(BaseBackendModel):
         self.deploy_cfg = deploy_cfg
         self.model_cfg = model_cfg
         self.device = device
+        # resolve the configs used by postprocessing once
+        self.model_type = self.model_cfg.model.type if \
+            self.model_cfg is not None else None
+        if self.model_type == 'RTMDet':
+            self.export_postprocess_mask = True
+        else:
+            self.export_postprocess_mask = False
+            if self.deploy_cfg is not None:
+                mmdet_deploy_cfg = get_post_processing_params(self.deploy_cfg)
+                # this flag enable postprocess when export.
+                self.export_postprocess_mask = mmdet_deploy_cfg.get(
+                    'export_postprocess_mask', False)
         self._init_wrapper(
             backend=backend, backend_files=backend_files, device=device)
 
@@ -96,33 +108,102 @@ class End2EndModel(BaseBackendModel):
         outputs = [[None for _ in range(batch_size)]
                    for _ in range(num_outputs)]
 
+        # compute the masks of the whole batch at once
+        batch_inds = test_outputs[0][..., 4] > 0.0
         for i in range(batch_size):
-            inds = test_outputs[0][i, :, 4] > 0.0
+            inds = batch_inds[i]
             outputs[0][i] = test_outputs[0][i, inds, ...]
             outputs[1][i] = test_outputs[1][i, inds, ...]
             if num_outputs >= 3 and test_outputs[2][i] is not None:
                 outputs[2][i] = test_outputs[2][i, inds, ...]
         return outputs
 
+    @staticmethod
+    def get_scale_factors(img_metas: Sequence[dict],
+                          batch_dets: Tensor) -> Tuple[Tensor, Tensor]:
+        """Stack the scale factors and pad offsets of a batch.
+
+        Most of models in mmdetection 3.x use `pad_param`, but some models
+        like CenterNet uses `border`. They are the offset pixel of the
+        top-left corners between original image and padded/enlarged image.
+
+        Args:
+            img_metas (Sequence[dict]): The meta info of images.
+            batch_dets (Tensor): The detections, only used to get the dtype
+                and device.
+
+        Returns:
+            Tuple[Tensor, Tensor]: The scale factors of shape [N, 4] and the
+                pad offsets of shape [N, 2] in (x, y) order.
+        """
+        scale_factors = []
+        offsets = []
+        for img_meta in img_metas:
+            scale_factor = [1., 1., 1., 1.]
+            # get scale_factor
+            if 'scale_factor' in img_meta:
+                scale_factor = img_meta['scale_factor']
+                if isinstance(scale_factor, np.ndarray):
+                    scale_factor = scale_factor.squeeze(0).tolist()
+
+                if isinstance(scale_factor, (list, tuple)):
+                    scale_factor = list(scale_factor)
+                    if len(scale_factor) == 2:
+                        scale_factor = scale_factor + scale_factor
+                elif isinstance(scale_factor, torch.Tensor):
+                    scale_factor = scale_factor.tolist()
+                assert len(scale_factor) == 4
+            scale_factors.append(scale_factor)
+
+            pad_key = None
+            if 'pad_param' in img_meta:
+                pad_key = 'pad_param'
+            elif 'border' in img_meta:
+                pad_key = 'border'
+            if pad_key is not None:
+                pad = img_meta[pad_key]
+                offsets.append([float(pad[2]), float(pad[0])])
+            else:
+                offsets.append([0., 0.])
+        scale_factors = batch_dets.new_tensor(scale_factors)
+        offsets = batch_dets.new_tensor(offsets)
+        # offsets are in the rescaled image
+        offsets = offsets / scale_factors[:, [1, 0]]
+        return scale_factors, offsets
+
     @staticmethod
     def postprocessing_masks(det_bboxes: Union[np.ndarray, Tensor],
                              det_masks: Union[np.ndarray, Tensor],
                              img_w: int,
                              img_h: int,
-                             device: str = 'cpu') -> Tensor:
+                             device: str = 'cpu',
+                             mem_limit: int = 1024**3,
+                             out_dtype: torch.dtype = torch.float32,
+                             mask_thr: float = 0.5) -> Tensor:
         """Additional processing of masks. Resizes masks from [num_det, 28, 28]
         to [num_det, img_w, img_h]. Analog of the 'mmdeploy.codebase.mmdet.
         models.roi_heads.fcn_mask_head._do_paste_mask' function.
 
+        Each mask is only sampled in the region of its bbox, the pixels out of
+        it are always zero. Masks are processed in chunks so that the sampling
+        grids and results of a chunk fit in `mem_limit` bytes.
+
         Args:
             det_bboxes (np.ndarray | Tensor): Bbox of shape [num_det, 4]
             det_masks (np.ndarray | Tensor): Masks of shape [num_det, 28, 28].
             img_w (int): Width of the original image.
             img_h (int): Height of the original image.
             device :(str): The device type.
+            mem_limit (int): The memory budget in bytes of a chunk. Defaults
+                to 1024**3.
+            out_dtype (torch.dtype): The dtype of the output, masks are
+                binarized with `mask_thr` if it is `torch.bool` or
+                `torch.uint8`. Defaults to `torch.float32`.
+            mask_thr (float): The threshold to binarize masks. Defaults to
+                0.5.
 
         Returns:
-            Tensor: masks of shape [N, num_det, img_h, img_w].
+            Tensor: masks of shape [num_det, img_h, img_w].
         """
         masks = det_masks
         bboxes = det_bboxes
@@ -130,49 +211,90 @@ class End2EndModel(BaseBackendModel):
         num_det = bboxes.shape[0]
         # Skip postprocessing if no detections are found.
         if num_det == 0:
-            return torch.zeros(
-                0, img_h, img_w, dtype=torch.float32, device=device)
+            return torch.zeros(0, img_h, img_w, dtype=out_dtype, device=device)
 
         if isinstance(masks, np.ndarray):
             masks = torch.tensor(masks, device=device)
             bboxes = torch.tensor(bboxes, device=device)
 
-        masks = masks.to(device)
-        bboxes = bboxes.to(device)
-
-        result_masks = []
-        for bbox, mask in zip(bboxes, masks):
-
-            x0_int, y0_int = 0, 0
-            x1_int, y1_int = img_w, img_h
-
-            img_y = torch.arange(
-                y0_int, y1_int, dtype=torch.float32, device=device) + 0.5
+        masks = masks.to(device=device, dtype=torch.float32)
+        bboxes = bboxes.to(device=device, dtype=torch.float32)
+        mask_h, mask_w = masks.shape[-2:]
+
+        # The sampled values are zero beyond half a mask cell out of the bbox,
+        # sample a region with one more pixel on each side. Boxes with zero
+        # width or height, or flipped ones, cover the whole image.
+        x0, y0, x1, y1 = bboxes.unbind(1)
+        box_w = x1 - x0
+        box_h = y1 - y0
+        region = torch.stack([
+            torch.floor(x0 - box_w / mask_w) - 1,
+            torch.floor(y0 - box_h / mask_h) - 1,
+            torch.ceil(x1 + box_w / mask_w) + 1,
+            torch.ceil(y1 + box_h / mask_h) + 1
+        ], 1)
+        region = torch.nan_to_num(region).cpu()
+        region[:, 0::2] = region[:, 0::2].clamp(0, img_w)
+        region[:, 1::2] = region[:, 1::2].clamp(0, img_h)
+        degenerate = ((box_w <= 0) | (box_h <= 0)).cpu()
+        region[degenerate] = torch.tensor([0., 0., img_w, img_h])
+        region = region.long().tolist()
+
+        result_masks = torch.zeros(
+            num_det, img_h, img_w, dtype=out_dtype, device=device)
+        # the sampling grid, the sampled masks and the output of each pixel
+        bytes_per_pixel = 4 * 3 + result_masks.element_size()
+
+        start = 0
+        while start < num_det:
+            # grow the chunk while the padded regions fit in the budget
+            end = start
+            max_w, max_h = 0, 0
+            while end < num_det:
+                rx0, ry0, rx1, ry1 = region[end]
+                new_w = max(max_w, rx1 - rx0)
+                new_h = max(max_h, ry1 - ry0)
+                new_bytes = (end - start + 1) * new_w * new_h * bytes_per_pixel
+                if end > start and new_bytes > mem_limit:
+                    break
+                max_w, max_h = new_w, new_h
+                end += 1
+            if max_w == 0 or max_h == 0:
+                start = end
+                continue
+
+            chunk_region = torch.tensor(
+                region[start:end], dtype=torch.float32, device=device)
             img_x = torch.arange(
-                x0_int, x1_int, dtype=torch.float32, device=device) + 0.5
-            x0, y0, x1, y1 = bbox
-
-            img_y = (img_y - y0) / (y1 - y0) * 2 - 1
-            img_x = (img_x - x0) / (x1 - x0) * 2 - 1
-            if torch.isinf(img_x).any():
-                inds = torch.where(torch.isinf(img_x))
-                img_x[inds] = 0
-            if torch.isinf(img_y).any():
-                inds = torch.where(torch.isinf(img_y))
-                img_y[inds] = 0
-
-            gx = img_x[None, :].expand(img_y.size(0), img_x.size(0))
-            gy = img_y[:, None].expand(img_y.size(0), img_x.size(0))
-            grid = torch.stack([gx, gy], dim=2)
-
-            img_masks = F.grid_sample(
-                mask.to(dtype=torch.float32)[None, None, :, :],
-                grid[None, :, :, :],
-                align_corners=False)
-
-            result_masks.append(img_masks)
-        result_masks = torch.cat(result_masks, 1)
-        return result_masks.squeeze(0)
+                max_w, dtype=torch.float32,
+                device=device)[None, :] + chunk_region[:, 0:1] + 0.5
+            img_y = torch.arange(
+                max_h, dtype=torch.float32,
+                device=device)[None, :] + chunk_region[:, 1:2] + 0.5
+            img_x = (img_x - x0[start:end, None]) / box_w[start:end,
+                                                          None] * 2 - 1
+            img_y = (img_y - y0[start:end, None]) / box_h[start:end,
+                                                          None] * 2 - 1
+            img_x[torch.isinf(img_x)] = 0
+            img_y[torch.isinf(img_y)] = 0
+
+            num_chunk = end - start
+            gx = img_x[:, None, :].expand(num_chunk, max_h, max_w)
+            gy = img_y[:, :, None].expand(num_chunk, max_h, max_w)
+            grid = torch.stack([gx, gy], dim=3)
+
+            chunk_masks = F.grid_sample(
+                masks[start:end, None], grid, align_corners=False)[:, 0]
+            if out_dtype in (torch.bool, torch.uint8):
+                chunk_masks = chunk_masks >= mask_thr
+            chunk_masks = chunk_masks.to(out_dtype)
+
+            for i in range(num_chunk):
+                rx0, ry0, rx1, ry1 = region[start + i]
+                result_masks[start + i, ry0:ry1, rx0:rx1] = \
+                    chunk_masks[i, :ry1 - ry0, :rx1 - rx0]
+            start = end
+        return result_masks
 
     def postprocessing_results(self,
                                batch_dets: torch.Tensor,
@@ -182,6 +304,27 @@ class End2EndModel(BaseBackendModel):
                                rescale: bool = True):
         """Post-processing dets, labels, masks."""
         batch_size = len(batch_dets)
+        img_metas = [data_sample.metainfo for data_sample in data_samples]
+        model_type = self.model_type
+        export_postprocess_mask = self.export_postprocess_mask
+
+        # rescale and unpad the bboxes of the whole batch
+        if batch_size > 0:
+            scale_factors, offsets = End2EndModel.get_scale_factors(
+                img_metas, batch_dets)
+            bboxes = batch_dets[..., :4]
+            if rescale:
+                bboxes = bboxes / scale_factors[:, None, :]
+            has_pad = [('pad_param' in img_meta or 'border' in img_meta)
+                       for img_meta in img_metas]
+            if any(has_pad):
+                unpad_bboxes = bboxes - offsets.repeat(1, 2)[:, None, :]
+                unpad_bboxes = unpad_bboxes * (unpad_bboxes > 0)
+                has_pad = torch.tensor(has_pad, device=bboxes.device)
+                bboxes = torch.where(has_pad[:, None, None], unpad_bboxes,
+                                     bboxes)
+            batch_dets = torch.cat([bboxes, batch_dets[..., 4:]], dim=-1)
+
         tmp_outputs = [batch_dets, batch_labels]
         has_mask = batch_masks is not None
         if has_mask:
@@ -189,9 +332,6 @@ class End2EndModel(BaseBackendModel):
         outputs = End2EndModel.__clear_outputs(tmp_outputs)
         batch_dets, batch_labels = outputs[:2]
         batch_masks = outputs[2] if has_mask else None
-        img_metas = [data_sample.metainfo for data_sample in data_samples]
-        model_type = self.model_cfg.model.type if \
-            self.model_cfg is not None else None
         for i in range(batch_size):
             dets, labels = batch_dets[i], batch_labels[i]
             pred_instances = InstanceData()
@@ -199,37 +339,6 @@ class End2EndModel(BaseBackendModel):
             labels = labels.to(device)
             bboxes = dets[:, :4]
             scores = dets[:, 4]
-            scale_factor = bboxes.new_ones(4)
-            # get scale_factor
-            if 'scale_factor' in img_metas[i]:
-                scale_factor = img_metas[i]['scale_factor']
-                if isinstance(scale_factor, np.ndarray):
-                    scale_factor = scale_factor.squeeze(0).tolist()
-
-                if isinstance(scale_factor, (list, tuple)):
-                    if len(scale_factor) == 2:
-                        scale_factor = scale_factor + scale_factor
-                assert len(scale_factor) == 4
-                scale_factor = torch.tensor(scale_factor).to(dets)
-            if rescale:
-                bboxes /= scale_factor.view(1, 4)
-
-            # Most of models in mmdetection 3.x use `pad_param`, but some
-            # models like CenterNet uses `border`.
-            # offset pixel of the top-left corners between original image
-            # and padded/enlarged image, 'pad_param' is used when exporting
-            # CornerNet and CentripetalNet to onnx
-            pad_key = None
-            if 'pad_param' in img_metas[i]:
-                pad_key = 'pad_param'
-            elif 'border' in img_metas[i]:
-                pad_key = 'border'
-            if pad_key is not None:
-                x_off = img_metas[i][pad_key][2] / scale_factor[1]
-                y_off = img_metas[i][pad_key][0] / scale_factor[0]
-                bboxes[:, ::2] -= x_off
-                bboxes[:, 1::2] -= y_off
-                bboxes *= (bboxes > 0)
 
             pred_instances.scores = scores
             pred_instances.bboxes = bboxes
@@ -241,21 +350,16 @@ class End2EndModel(BaseBackendModel):
                 masks = batch_masks[i]
                 img_h, img_w = img_metas[i]['img_shape'][:2]
                 ori_h, ori_w = img_metas[i]['ori_shape'][:2]
-                if model_type == 'RTMDet':
-                    export_postprocess_mask = True
+                if not export_postprocess_mask:
+                    masks = End2EndModel.postprocessing_masks(
+                        dets[:, :4],
+                        masks,
+                        ori_w,
+                        ori_h,
+                        self.device,
+                        out_dtype=torch.bool)
                 else:
-                    export_postprocess_mask = False
-                    if self.deploy_cfg is not None:
-                        mmdet_deploy_cfg = get_post_processing_params(
-                            self.deploy_cfg)
-                        # this flag enable postprocess when export.
-                        export_postprocess_mask = mmdet_deploy_cfg.get(
-                            'export_postprocess_mask', False)
-                    if not export_postprocess_mask:
-                        masks = End2EndModel.postprocessing_masks(
-                            dets[:, :4], masks, ori_w, ori_h, self.device)
-                    else:
-                        masks = masks[:, :img_h, :img_w]
+                    masks = masks[:, :img_h, :img_w]
                 # avoid to resize masks with zero dim
                 if export_postprocess_mask and rescale and masks.shape[0] != 0:
                     masks = torch.nn.functional.interpolate(
@@ -45,6 +45,11 @@ class VoxelDetectionModel(BaseBackendModel):
         self.model_cfg = model_cfg
         self.deploy_cfg = deploy_cfg
         self.device = device
+        # the head used by postprocessing is built once and reused
+        self.head_info = None
+        if 'bbox_head' in model_cfg.model or \
+                'pts_bbox_head' in model_cfg.model:
+            self.head_info = VoxelDetectionModel.build_head_info(model_cfg)
         self._init_wrapper(
             backend=backend, backend_files=backend_files, device=device)
 
@@ -105,7 +110,8 @@ class VoxelDetectionModel(BaseBackendModel):
             model_cfg=self.model_cfg,
             deploy_cfg=self.deploy_cfg,
             outs=outputs,
-            metas=data_samples)
+            metas=data_samples,
+            head_info=self.head_info)
 
         return prediction
 
@@ -200,9 +206,59 @@ class VoxelDetectionModel(BaseBackendModel):
             data_sample.pred_instances = data_instances_2d[i]
         return data_samples
 
+    @staticmethod
+    def build_head_info(model_cfg: Union[str, Config]) -> Dict:
+        """Build the head used by postprocessing and its task tables.
+
+        Args:
+            model_cfg (Union[str, Config]): The model config from
+                trainning repo
+
+        Raises:
+            NotImplementedError: Only support mmdet3d model with `bbox_head`
+
+        Returns:
+            Dict: The head, its test config, and for heads with multiple
+                tasks, the index and mask that gather the classes of each
+                task into a [num_tasks, max_num_classes] table.
+        """
+        from mmengine.registry import MODELS
+        if 'bbox_head' in model_cfg.model:
+            # pointpillars postprocess
+            head = MODELS.build(model_cfg.model['bbox_head'])
+            cfg = model_cfg.model.test_cfg
+        elif 'pts_bbox_head' in model_cfg.model:
+            # centerpoint postprocess
+            head = MODELS.build(model_cfg.model['pts_bbox_head'])
+            cfg = model_cfg.model.test_cfg.pts
+        else:
+            raise NotImplementedError('mmdet3d model bbox_head not found')
+        head.eval()
+
+        head_info = dict(head=head, cfg=cfg)
+        if hasattr(head, 'task_heads'):
+            num_classes = list(head.num_classes)
+            max_num_classes = max(num_classes)
+            class_index = torch.zeros(
+                len(num_classes), max_num_classes, dtype=torch.long)
+            class_valid = torch.zeros(
+                len(num_classes), max_num_classes, dtype=torch.bool)
+            start = 0
+            for task_id, num_class in enumerate(num_classes):
+                class_index[task_id, :num_class] = torch.arange(
+                    start, start + num_class)
+                class_valid[task_id, :num_class] = True
+                start += num_class
+            head_info.update(
+                class_index=class_index.flatten(), class_valid=class_valid)
+        return head_info
+
     @staticmethod
     def postprocess(model_cfg: Union[str, Config],
-                    deploy_cfg: Union[str, Config], outs: Dict, metas: Dict):
+                    deploy_cfg: Union[str, Config],
+                    outs: Dict,
+                    metas: Dict,
+                    head_info: Optional[Dict] = None):
         """postprocess outputs to datasamples.
 
         Args:
@@ -212,6 +268,8 @@ class VoxelDetectionModel(BaseBackendModel):
                 backend and input shape
             outs (Dict): output bbox, cls and score
             metas (Dict): DataSample3D for bbox3d render
+            head_info (Dict, optional): The head built by `build_head_info`.
+                It is built from `model_cfg` if not given. Defaults to None.
 
         Raises:
             NotImplementedError: Only support mmdet3d model with `bbox_head`
@@ -225,24 +283,15 @@ class VoxelDetectionModel(BaseBackendModel):
         if 'test_cfg' not in model_cfg.model:
             raise RuntimeError('test_cfg not found')
 
-        from mmengine.registry import MODELS
         cls_score = outs['cls_score']
         bbox_pred = outs['bbox_pred']
         dir_cls_pred = outs['dir_cls_pred']
         batch_input_metas = [data_samples.metainfo for data_samples in metas]
 
-        head = None
-        cfg = None
-        if 'bbox_head' in model_cfg.model:
-            # pointpillars postprocess
-            head = MODELS.build(model_cfg.model['bbox_head'])
-            cfg = model_cfg.model.test_cfg
-        elif 'pts_bbox_head' in model_cfg.model:
-            # centerpoint postprocess
-            head = MODELS.build(model_cfg.model['pts_bbox_head'])
-            cfg = model_cfg.model.test_cfg.pts
-        else:
-            raise NotImplementedError('mmdet3d model bbox_head not found')
+        if head_info is None:
+            head_info = VoxelDetectionModel.build_head_info(model_cfg)
+        head = head_info['head']
+        cfg = head_info['cfg']
 
         if not hasattr(head, 'task_heads'):
             data_instances_3d = head.predict_by_feat(
@@ -262,57 +311,50 @@ class VoxelDetectionModel(BaseBackendModel):
 
             pts = model_cfg.model.test_cfg.pts
 
+            # decode all the tasks as one batch of size num_tasks * batch,
+            # the classes of each task are padded to the same number with
+            # scores lower than any valid one.
+            num_tasks = len(head.num_classes)
+            batch_size, _, height, width = cls_score.shape
+            class_index = head_info['class_index'].to(cls_score.device)
+            class_valid = head_info['class_valid'].to(cls_score.device)
+            batch_heatmap = cls_score.sigmoid()[:, class_index]
+            batch_heatmap = batch_heatmap.view(batch_size, num_tasks, -1,
+                                               height, width)
+            batch_heatmap = batch_heatmap.masked_fill(
+                ~class_valid[None, :, :, None, None], -1)
+
+            def _flatten_tasks(x):
+                """[B, T * C, H, W] -> [T * B, C, H, W]."""
+                x = x.view(batch_size, num_tasks, -1, height, width)
+                return x.transpose(0, 1).flatten(0, 1)
+
+            batch_heatmap = batch_heatmap.transpose(0, 1).flatten(0, 1)
+            task_bbox_pred = _flatten_tasks(bbox_pred)
+            task_dir_cls_pred = _flatten_tasks(dir_cls_pred)
+
+            batch_reg = task_bbox_pred[:, 0:2]
+            batch_hei = task_bbox_pred[:, 2:3]
+            batch_dim = task_bbox_pred[:, 3:6]
+            if head.norm_bbox:
+                batch_dim = torch.exp(batch_dim)
+            batch_vel = task_bbox_pred[:, 6:]
+            batch_rots = task_dir_cls_pred[:, 0:1]
+            batch_rotc = task_dir_cls_pred[:, 1:2]
+
+            decoded = head.bbox_coder.decode(
+                batch_heatmap,
+                batch_rots,
+                batch_rotc,
+                batch_hei,
+                batch_dim,
+                batch_vel,
+                reg=batch_reg)
+
             rets = []
-            scores_range = [0]
-            bbox_range = [0]
-            dir_range = [0]
-            for i, _ in enumerate(head.task_heads):
-                scores_range.append(scores_range[i] + head.num_classes[i])
-                bbox_range.append(bbox_range[i] + 8)
-                dir_range.append(dir_range[i] + 2)
-
-            for task_id in range(len(head.num_classes)):
+            for task_id in range(num_tasks):
                 num_class_with_bg = head.num_classes[task_id]
-
-                batch_heatmap = cls_score[:,
-                                          scores_range[task_id]:scores_range[
-                                              task_id + 1], ...].sigmoid()
-
-                batch_reg = bbox_pred[:,
-                                      bbox_range[task_id]:bbox_range[task_id] +
-                                      2, ...]
-                batch_hei = bbox_pred[:, bbox_range[task_id] +
-                                      2:bbox_range[task_id] + 3, ...]
-
-                if head.norm_bbox:
-                    batch_dim = torch.exp(bbox_pred[:, bbox_range[task_id] +
-                                                    3:bbox_range[task_id] + 6,
-                                                    ...])
-                else:
-                    batch_dim = bbox_pred[:, bbox_range[task_id] +
-                                          3:bbox_range[task_id] + 6, ...]
-
-                batch_vel = bbox_pred[:, bbox_range[task_id] +
-                                      6:bbox_range[task_id + 1], ...]
-
-                batch_rots = dir_cls_pred[:,
-                                          dir_range[task_id]:dir_range[task_id
-                                                                       + 1],
-                                          ...][:, 0].unsqueeze(1)
-                batch_rotc = dir_cls_pred[:,
-                                          dir_range[task_id]:dir_range[task_id
-                                                                       + 1],
-                                          ...][:, 1].unsqueeze(1)
-
-                temp = head.bbox_coder.decode(
-                    batch_heatmap,
-                    batch_rots,
-                    batch_rotc,
-                    batch_hei,
-                    batch_dim,
-                    batch_vel,
-                    reg=batch_reg,
-                    task_id=task_id)
+                temp = decoded[task_id * batch_size:(task_id + 1) * batch_size]
 
                 assert pts['nms_type'] in ['circle', 'rotate']
                 batch_reg_preds = [box['bboxes'] for box in temp]
@@ -1,8 +1,11 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-from typing import List, Optional, Sequence, Union
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple, Union
 
 import cv2
 import mmengine
+import numpy as np
 import torch
 from mmengine.registry import Registry
 from mmengine.structures import BaseDataElement, InstanceData
@@ -15,6 +18,83 @@ from mmdeploy.utils import (Backend, get_backend, get_codebase_config,
 __BACKEND_MODEL = Registry('backend_text_detectors')
 
 
+def crop_masks(
+        masks: torch.Tensor
+) -> Tuple[List[np.ndarray], np.ndarray, np.ndarray]:
+    """Crop binary masks to the bounding boxes of their foreground.
+
+    Args:
+        masks (torch.Tensor): Binary masks of shape (N, H, W).
+
+    Returns:
+        tuple[list[np.ndarray], np.ndarray, np.ndarray]: The crops of the
+        non-empty masks, the (x, y) offsets of the crops with shape (K, 2)
+        and the indices of the non-empty masks with shape (K, ).
+    """
+    masks = masks.cpu().numpy()
+    rows = masks.any(axis=2)
+    cols = masks.any(axis=1)
+    keep = np.flatnonzero(rows.any(axis=1))
+    rows, cols = rows[keep], cols[keep]
+    y0 = rows.argmax(axis=1)
+    y1 = rows.shape[1] - rows[:, ::-1].argmax(axis=1)
+    x0 = cols.argmax(axis=1)
+    x1 = cols.shape[1] - cols[:, ::-1].argmax(axis=1)
+    crops = [
+        np.ascontiguousarray(masks[k, top:bottom, left:right])
+        for k, top, bottom, left, right in zip(keep, y0, y1, x0, x1)
+    ]
+    offsets = np.stack([x0, y0], axis=1)
+    return crops, offsets, keep
+
+
+def crops_to_polygons(
+        crops: Sequence[np.ndarray],
+        offsets: np.ndarray,
+        scores: np.ndarray,
+        text_repr_type: str = 'poly') -> Tuple[List[np.ndarray], np.ndarray]:
+    """Extract the polygons of cropped binary masks.
+
+    Args:
+        crops (Sequence[np.ndarray]): The cropped masks.
+        offsets (np.ndarray): The (x, y) offsets of the crops in the image
+            with shape (K, 2).
+        scores (np.ndarray): The scores of the masks with shape (K, ).
+        text_repr_type (str): The boundary encoding type, 'poly' or 'quad'.
+            Defaults to 'poly'.
+
+    Returns:
+        tuple[list[np.ndarray], np.ndarray]: The flattened polygons with at
+        least 3 points and their scores.
+    """
+    polygons = []
+    num_contours = np.zeros(len(crops), dtype=np.int64)
+    for i, (crop, (x, y)) in enumerate(zip(crops, offsets)):
+        # pad the crop with zeros so that the contours are the same as the
+        # ones found in the full mask.
+        crop = np.pad(crop.astype(np.uint8), 1)
+        contours = cv2.findContours(
+            crop,
+            cv2.RETR_CCOMP,
+            cv2.CHAIN_APPROX_NONE,
+            offset=(int(x) - 1, int(y) - 1))[-2]
+        num_contours[i] = len(contours)
+        polygons += contours
+    scores = np.repeat(np.asarray(scores, dtype=np.float32), num_contours)
+
+    # filter invalid polygons
+    num_points = np.fromiter(map(len, polygons), dtype=np.int64)
+    keep = np.flatnonzero(num_points >= 3)
+    if text_repr_type == 'quad':
+        polygons = [
+            cv2.boxPoints(cv2.minAreaRect(polygons[k])).reshape(-1)
+            for k in keep
+        ]
+    else:
+        polygons = [polygons[k].reshape(-1) for k in keep]
+    return polygons, scores[keep]
+
+
 @__BACKEND_MODEL.register_module('end2end')
 class End2EndModel(BaseBackendModel):
     """End to end model for inference of text detection.
@@ -53,6 +133,17 @@ class End2EndModel(BaseBackendModel):
             self.det_head = MODELS.build(model_cfg.model.det_head)
         else:
             self.text_repr_type = model_cfg.model.get('text_repr_type', 'poly')
+            post_params = dict()
+            if deploy_cfg is not None:
+                post_params = get_codebase_config(deploy_cfg).get(
+                    'post_processing', dict())
+            # this flag enable postprocess when export.
+            self.export_postprocess_mask = post_params.get(
+                'export_postprocess_mask', True)
+            # number of processes to extract polygons from masks, 0 means
+            # extracting in the main process.
+            self.num_workers = post_params.get('num_workers', 0)
+            self._pool = None
         self._init_wrapper(
             backend=backend,
             backend_files=backend_files,
@@ -113,14 +204,13 @@ class End2EndModel(BaseBackendModel):
         if hasattr(self, 'det_head'):
             return self.det_head.postprocessor(x[0], data_samples)
         # post-process of mmdet models
-        from mmdet.structures.mask import bitmap_to_polygon
         from mmocr.utils.bbox_utils import bbox2poly
 
-        from mmdeploy.codebase.mmdet.deploy import get_post_processing_params
         from mmdeploy.codebase.mmdet.deploy.object_detection_model import \
             End2EndModel as DetModel
         if len(x) == 3:  # instance seg
             batch_dets, _, batch_masks = x
+            batch_crops = []
             for i in range(batch_dets.size(0)):
                 masks = batch_masks[i]
                 bboxes = batch_dets[i, :, :4]
@@ -128,15 +218,7 @@ class End2EndModel(BaseBackendModel):
                 bboxes[:, 1::2] /= data_samples[i].scale_factor[1]
                 ori_h, ori_w = data_samples[i].ori_shape[:2]
                 img_h, img_w = data_samples[i].img_shape[:2]
-                export_postprocess_mask = True
-                polygons = []
-                scores = []
-                if self.deploy_cfg is not None:
-                    codebase_cfg = get_post_processing_params(self.deploy_cfg)
-                    # this flag enable postprocess when export.
-                    export_postprocess_mask = codebase_cfg.get(
-                        'export_postprocess_mask', True)
-                if not export_postprocess_mask:
+                if not self.export_postprocess_mask:
                     masks = DetModel.postprocessing_masks(
                         bboxes, masks, ori_w, ori_h, batch_masks.device)
                 else:
@@ -146,30 +228,15 @@ class End2EndModel(BaseBackendModel):
                 masks = masks.squeeze(0)
                 if masks.dtype != bool:
                     masks = masks >= 0.5
+                crops, offsets, keep = crop_masks(masks)
+                scores = batch_dets[i, :, 4].cpu().numpy()[keep]
+                batch_crops.append((crops, offsets, scores))
 
-                for mask_idx, mask in enumerate(masks.cpu()):
-                    contours, _ = bitmap_to_polygon(mask)
-                    polygons += [contour.reshape(-1) for contour in contours]
-                    scores += [batch_dets[i, :, 4][mask_idx].cpu()
-                               ] * len(contours)
-                # filter invalid polygons
-                filterd_polygons = []
-                keep_idx = []
-                for poly_idx, polygon in enumerate(polygons):
-                    if len(polygon) < 6:
-                        continue
-                    filterd_polygons.append(polygon)
-                    keep_idx.append(poly_idx)
-                # convert by text_repr_type
-                if self.text_repr_type == 'quad':
-                    for j, poly in enumerate(filterd_polygons):
-                        rect = cv2.minAreaRect(poly)
-                        vertices = cv2.boxPoints(rect)
-                        poly = vertices.flatten()
-                        filterd_polygons[j] = poly
+            for i, (polygons,
+                    scores) in enumerate(self._crops_to_polygons(batch_crops)):
                 pred_instances = InstanceData()
-                pred_instances.polygons = filterd_polygons
-                pred_instances.scores = torch.FloatTensor(scores)[keep_idx]
+                pred_instances.polygons = polygons
+                pred_instances.scores = torch.from_numpy(scores)
                 data_samples[i].pred_instances = pred_instances
         else:
             dets = x[0]
@@ -184,6 +251,53 @@ class End2EndModel(BaseBackendModel):
                 data_samples[i].pred_instances = pred_instances
         return data_samples
 
+    def _crops_to_polygons(
+        self, batch_crops: Sequence[Tuple[List[np.ndarray], np.ndarray,
+                                          np.ndarray]]
+    ) -> List[Tuple[List[np.ndarray], np.ndarray]]:
+        """Extract the polygons of a batch of cropped masks.
+
+        The crops of each image are split into ``num_workers`` chunks and
+        extracted by a process pool if ``num_workers`` > 0, so that a single
+        image with many text instances is also spread over the workers.
+
+        Args:
+            batch_crops (Sequence[tuple]): The outputs of `crop_masks` and
+                the scores of the masks for each image.
+
+        Returns:
+            list[tuple[list[np.ndarray], np.ndarray]]: The polygons and the
+            scores of each image.
+        """
+        if self.num_workers <= 0:
+            return [
+                crops_to_polygons(crops, offsets, scores, self.text_repr_type)
+                for crops, offsets, scores in batch_crops
+            ]
+
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.num_workers)
+        batch_futures = []
+        for crops, offsets, scores in batch_crops:
+            chunk_size = max(1, math.ceil(len(crops) / self.num_workers))
+            batch_futures.append([
+                self._pool.submit(crops_to_polygons,
+                                  crops[start:start + chunk_size],
+                                  offsets[start:start + chunk_size],
+                                  scores[start:start + chunk_size],
+                                  self.text_repr_type)
+                for start in range(0, len(crops), chunk_size)
+            ])
+        results = []
+        for futures in batch_futures:
+            polygons, scores = [], [np.zeros(0, dtype=np.float32)]
+            for future in futures:
+                chunk_polygons, chunk_scores = future.result()
+                polygons += chunk_polygons
+                scores.append(chunk_scores)
+            results.append((polygons, np.concatenate(scores)))
+        return results
+
     def extract_feat(self, batch_inputs: torch.Tensor) -> torch.Tensor:
         """The interface for forward test.
 
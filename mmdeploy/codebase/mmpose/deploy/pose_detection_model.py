@@ -1,8 +1,10 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 from itertools import zip_longest
-from typing import List, Optional, Sequence, Union
+from operator import itemgetter
+from typing import Any, Callable, List, Optional, Sequence, Union
 
 import mmengine
+import numpy as np
 import torch
 import torch.nn as nn
 from mmengine import Config
@@ -17,6 +19,23 @@ from mmdeploy.utils import (Backend, get_backend, get_codebase_config,
 __BACKEND_MODEL = Registry('backend_segmentors')
 
 
+def _concat(
+    arrays: Sequence[Union[np.ndarray, torch.Tensor]]
+) -> Union[np.ndarray, torch.Tensor]:
+    """Concatenate np.ndarray or tensors along the first dimension."""
+    if isinstance(arrays[0], torch.Tensor):
+        return torch.cat(arrays)
+    return np.concatenate(arrays)
+
+
+def _split(array: Union[np.ndarray, torch.Tensor],
+           sizes: Sequence[int]) -> List[Union[np.ndarray, torch.Tensor]]:
+    """Split np.ndarray or tensor into views along the first dimension."""
+    if isinstance(array, torch.Tensor):
+        return list(torch.split(array, sizes))
+    return np.split(array, np.cumsum(sizes)[:-1])
+
+
 @__BACKEND_MODEL.register_module('end2end')
 class End2EndModel(BaseBackendModel):
     """End to end model for inference of pose detection.
@@ -32,6 +51,9 @@ class End2EndModel(BaseBackendModel):
             object.
         data_preprocessor (dict | nn.Module | None): Input data pre-
                 processor. Default is ``None``.
+        to_numpy (bool): Whether to convert the predicted keypoints and
+            bboxes to np.ndarray. Set it to False to keep them as tensors.
+            Default is True.
     """
 
     def __init__(self,
@@ -41,6 +63,7 @@ class End2EndModel(BaseBackendModel):
                  deploy_cfg: Union[str, mmengine.Config] = None,
                  model_cfg: Union[str, mmengine.Config] = None,
                  data_preprocessor: Optional[Union[dict, nn.Module]] = None,
+                 to_numpy: bool = True,
                  **kwargs):
         super(End2EndModel, self).__init__(
             deploy_cfg=deploy_cfg, data_preprocessor=data_preprocessor)
@@ -48,6 +71,8 @@ class End2EndModel(BaseBackendModel):
         self.deploy_cfg = deploy_cfg
         self.model_cfg = model_cfg
         self.device = device
+        self.to_numpy = to_numpy
+        self.is_yolox_pose = model_cfg.model.type == 'YOLODetector'
         self._init_wrapper(
             backend=backend,
             backend_files=backend_files,
@@ -56,6 +81,32 @@ class End2EndModel(BaseBackendModel):
         # create head for decoding heatmap
         self.head = builder.build_head(model_cfg.model.head) if hasattr(
             model_cfg.model, 'head') else None
+        # resolve how the backend outputs are fed to the head once
+        self.head_inputs_fn = None
+        if self.head is not None and not self.is_yolox_pose:
+            self.head_inputs_fn = self.get_head_inputs_fn(model_cfg)
+
+    @staticmethod
+    def get_head_inputs_fn(
+            model_cfg: mmengine.Config) -> Callable[[List[torch.Tensor]], Any]:
+        """Get the function converting the backend outputs to the inputs
+        of `head.decode` according to the codec.
+
+        Args:
+            model_cfg (mmengine.Config): The model config.
+
+        Returns:
+            Callable: The function taking the list of backend outputs.
+        """
+        codec = model_cfg.codec
+        if isinstance(codec, (list, tuple)):
+            codec = codec[-1]
+        if codec.type == 'SimCCLabel':
+            # (batch_pred_x, batch_pred_y)
+            return tuple
+        elif codec.type in ['RegressionLabel', 'IntegralRegressionLabel']:
+            return list
+        return itemgetter(0)
 
     def _init_wrapper(self, backend: Backend, backend_files: Sequence[str],
                       device: str, **kwargs):
@@ -98,19 +149,10 @@ class End2EndModel(BaseBackendModel):
         inputs = inputs.contiguous().to(self.device)
         batch_outputs = self.wrapper({self.input_name: inputs})
         batch_outputs = self.wrapper.output_to_list(batch_outputs)
-        if self.model_cfg.model.type == 'YOLODetector':
+        if self.is_yolox_pose:
             return self.pack_yolox_pose_result(batch_outputs, data_samples)
 
-        codec = self.model_cfg.codec
-        if isinstance(codec, (list, tuple)):
-            codec = codec[-1]
-        if codec.type == 'SimCCLabel':
-            batch_pred_x, batch_pred_y = batch_outputs
-            preds = self.head.decode((batch_pred_x, batch_pred_y))
-        elif codec.type in ['RegressionLabel', 'IntegralRegressionLabel']:
-            preds = self.head.decode(batch_outputs)
-        else:
-            preds = self.head.decode(batch_outputs[0])
+        preds = self.head.decode(self.head_inputs_fn(batch_outputs))
         results = self.pack_result(preds, data_samples)
         return results
 
@@ -138,19 +180,42 @@ class End2EndModel(BaseBackendModel):
         if batch_pred_fields is None:
             batch_pred_fields = []
 
+        # convert keypoint coordinates from input space to image space for
+        # all the instances of the batch at once
+        if convert_coordinate and len(data_samples) > 0:
+            keypoints = [
+                pred_instances.keypoints
+                for pred_instances in batch_pred_instances
+            ]
+            num_instances = [len(kpts) for kpts in keypoints]
+            keypoints = _concat(keypoints)
+            input_sizes, bbox_centers, bbox_scales = [], [], []
+            for data_sample, num in zip(data_samples, num_instances):
+                input_sizes += [data_sample.metainfo['input_size']] * num
+                bbox_centers.append(data_sample.gt_instances.bbox_centers)
+                bbox_scales.append(data_sample.gt_instances.bbox_scales)
+            input_sizes = np.array(input_sizes)
+            bbox_centers = _concat(bbox_centers)
+            bbox_scales = _concat(bbox_scales)
+            if isinstance(keypoints, torch.Tensor):
+                input_sizes, bbox_centers, bbox_scales = (
+                    torch.as_tensor(x, device=keypoints.device)
+                    for x in (input_sizes, bbox_centers, bbox_scales))
+            keypoints = keypoints / input_sizes[:, None] * bbox_scales[:, None]
+            keypoints += (bbox_centers - 0.5 * bbox_scales)[:, None]
+            keypoints = _split(keypoints, num_instances)
+            for pred_instances, kpts in zip(batch_pred_instances, keypoints):
+                pred_instances.keypoints = kpts
+
         for pred_instances, pred_fields, data_sample in zip_longest(
                 batch_pred_instances, batch_pred_fields, data_samples):
 
             gt_instances = data_sample.gt_instances
-            # convert keypoint coordinates from input space to image space
-            if convert_coordinate:
-                input_size = data_sample.metainfo['input_size']
-                bbox_centers = gt_instances.bbox_centers
-                bbox_scales = gt_instances.bbox_scales
-                keypoints = pred_instances.keypoints
-                keypoints = keypoints / input_size * bbox_scales
-                keypoints += bbox_centers - 0.5 * bbox_scales
-                pred_instances.keypoints = keypoints
+            if not self.to_numpy:
+                for key in ('keypoints', 'keypoint_scores'):
+                    if isinstance(pred_instances.get(key, None), np.ndarray):
+                        pred_instances.set_field(
+                            torch.from_numpy(pred_instances.get(key)), key)
 
             pred_instances.bboxes = gt_instances.bboxes
             pred_instances.bbox_scores = gt_instances.bbox_scores
@@ -175,31 +240,38 @@ class End2EndModel(BaseBackendModel):
         """
         assert preds[0].shape[0] == len(data_samples)
         batched_dets, batched_kpts = preds
-        for data_sample_idx, data_sample in enumerate(data_samples):
-            bboxes = batched_dets[data_sample_idx, :, :4]
-            bbox_scores = batched_dets[data_sample_idx, :, 4]
-            keypoints = batched_kpts[data_sample_idx, :, :, :2]
-            keypoint_scores = batched_kpts[data_sample_idx, :, :, 2]
-
-            # filter zero or negative scores
-            inds = bbox_scores > 0.0
-            bboxes = bboxes[inds, :]
-            bbox_scores = bbox_scores[inds]
-            keypoints = keypoints[inds, :]
-            keypoint_scores = keypoint_scores[inds]
+        # rescale the whole batch at once
+        scale_factors = batched_dets.new_tensor(
+            [data_sample.scale_factor for data_sample in data_samples])
+        batched_bboxes = batched_dets[..., :4] / scale_factors.repeat(
+            1, 2)[:, None]
+        batched_bbox_scores = batched_dets[..., 4]
+        batched_keypoints = batched_kpts[..., :2] / scale_factors[:, None,
+                                                                  None]
+        batched_keypoint_scores = batched_kpts[..., 2]
+        # filter zero or negative scores
+        batched_inds = batched_bbox_scores > 0.0
+        if self.to_numpy:
+            # the precision test requires keypoints to be np.ndarray
+            batched_bboxes = batched_bboxes.cpu().numpy()
+            batched_keypoints = batched_keypoints.cpu().numpy()
+            batched_inds_np = batched_inds.cpu().numpy()
+        else:
+            batched_inds_np = batched_inds
+        labels = batched_bbox_scores.new_zeros(batched_bbox_scores.shape[1])
 
+        for data_sample_idx, data_sample in enumerate(data_samples):
+            inds = batched_inds[data_sample_idx]
+            inds_np = batched_inds_np[data_sample_idx]
             pred_instances = InstanceData()
-            # rescale
-            scale_factor = data_sample.scale_factor
-            scale_factor = keypoints.new_tensor(scale_factor)
-            keypoints /= keypoints.new_tensor(scale_factor).reshape(1, 1, 2)
-            bboxes /= keypoints.new_tensor(scale_factor).repeat(1, 2)
-            pred_instances.bboxes = bboxes.cpu().numpy()
-            pred_instances.bbox_scores = bbox_scores
-            # the precision test requires keypoints to be np.ndarray
-            pred_instances.keypoints = keypoints.cpu().numpy()
-            pred_instances.keypoint_scores = keypoint_scores
-            pred_instances.lebels = torch.zeros(bboxes.shape[0])
+            pred_instances.bboxes = batched_bboxes[data_sample_idx][inds_np]
+            pred_instances.bbox_scores = batched_bbox_scores[data_sample_idx][
+                inds]
+            pred_instances.keypoints = batched_keypoints[data_sample_idx][
+                inds_np]
+            pred_instances.keypoint_scores = batched_keypoint_scores[
+                data_sample_idx][inds]
+            pred_instances.labels = labels[:len(pred_instances.bboxes)]
 
             data_sample.pred_instances = pred_instances
         return data_samples
@@ -4,6 +4,8 @@ import re
 import onnx
 from packaging import version
 
+from .optimize import GraphIndex
+
 
 def parse_extractor_io_string(io_str) -> tuple:
     """Parse IO string for extractor."""
@@ -19,30 +21,30 @@ def parse_extractor_io_string(io_str) -> tuple:
     return name, func_id, io_type
 
 
-def _dfs_search_reachable_nodes_fast(self, node_output_name, graph_input_nodes,
-                                     reachable_nodes):
-    """Using DFS to search reachable nodes."""
-    outputs = {}
-    for index, node in enumerate(self.graph.node):
-        for name in node.output:
-            if name not in outputs:
-                outputs[name] = set()
-            outputs[name].add(index)
-
-    def impl(node_output_name, graph_input_nodes, reachable_nodes):
-        if node_output_name in graph_input_nodes:
-            return
-        if node_output_name not in outputs:
-            return
-        for index in outputs[node_output_name]:
-            node = self.graph.node[index]
-            if node in reachable_nodes:
-                continue
-            reachable_nodes.append(node)
-            for name in node.input:
-                impl(name, graph_input_nodes, reachable_nodes)
+def _collect_reachable_nodes_fast(self, input_names, output_names):
+    """Collect the nodes between the inputs and the outputs in topological
+    order, the search is iterative and indexed by the value names.
 
-    impl(node_output_name, graph_input_nodes, reachable_nodes)
+    The index is built once for each extractor and shared by all the
+    partitions extracted from it.
+    """
+    index = getattr(self, '_graph_index', None)
+    if index is None:
+        index = GraphIndex(self.graph)
+        self._graph_index = index
+    input_names = set(input_names)
+    reachable = set()
+    stack = list(output_names)
+    while len(stack) > 0:
+        name = stack.pop()
+        if name in input_names:
+            continue
+        for node in index.producers.get(name, []):
+            if id(node) in reachable:
+                continue
+            reachable.add(id(node))
+            stack.extend(node.input)
+    return [node for node in self.graph.node if id(node) in reachable]
 
 
 def create_extractor(model: onnx.ModelProto) -> onnx.utils.Extractor:
@@ -56,8 +58,8 @@ def create_extractor(model: onnx.ModelProto) -> onnx.utils.Extractor:
     """
     assert version.parse(onnx.__version__) >= version.parse('1.8.0')
     # patch extractor
-    onnx.utils.Extractor._dfs_search_reachable_nodes = \
-        _dfs_search_reachable_nodes_fast
+    onnx.utils.Extractor._collect_reachable_nodes = \
+        _collect_reachable_nodes_fast
 
     extractor = onnx.utils.Extractor(model)
     return extractor
@@ -88,7 +88,8 @@ def forward_of_mark(ctx, x, dtype, shape, func, func_id, type, name, id,
         from mmdeploy.apis import get_predefined_partition_cfg
         partition_cfgs = get_predefined_partition_cfg(deploy_cfg,
                                                       partition_type)
-        assert hasattr(rewriter, 'calib_file')
+        assert hasattr(rewriter, 'calib_file') or hasattr(
+            rewriter, 'calib_writer')
 
         for partition_id, partition_cfg in enumerate(partition_cfgs):
             start = partition_cfg['start']
@@ -100,10 +101,18 @@ def forward_of_mark(ctx, x, dtype, shape, func, func_id, type, name, id,
             dynamic_axes = partition_cfg.get('dynamic_axes', None)
             if dynamic_axes is not None:
                 input_name = name
+            partition_name = f'partition{partition_id}'
+            data_id = rewriter.data_id
+            x_np = x.detach().cpu().numpy()
+
+            calib_writer = getattr(rewriter, 'calib_writer', None)
+            if calib_writer is not None:
+                calib_writer.write(partition_name, input_name, data_id, x_np)
+                continue
+
             calib_file = rewriter.calib_file
 
             calib_data_group = calib_file['calib_data']
-            partition_name = f'partition{partition_id}'
 
             if partition_name not in calib_data_group:
                 calib_data_group.create_group(partition_name)
@@ -113,8 +122,6 @@ def forward_of_mark(ctx, x, dtype, shape, func, func_id, type, name, id,
                 partition_group.create_group(input_name)
             input_data_group = partition_group[input_name]
 
-            data_id = rewriter.data_id
-            x_np = x.detach().cpu().numpy()
             input_data_group.create_dataset(
                 str(data_id),
                 shape=x_np.shape,
@@ -1,5 +1,6 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-from typing import Callable, Dict, Iterable, Optional
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional
 
 import onnx
 from onnx.helper import get_attribute_value
@@ -25,36 +26,186 @@ def attribute_to_dict(attr: onnx.AttributeProto) -> Dict:
     return ret
 
 
+def remove_items(container, predicate: Callable) -> int:
+    """Remove the items of a protobuf repeated field in one pass.
+
+    The items are deleted from the back, so the remaining items are neither
+    copied nor moved to new python objects.
+
+    Args:
+        container: The repeated field, e.g. `graph.node`.
+        predicate (Callable): A function to predicate an item.
+
+    Returns:
+        int: The number of removed items.
+    """
+    num_removed = 0
+    for i in reversed(range(len(container))):
+        if predicate(container[i]):
+            del container[i]
+            num_removed += 1
+    return num_removed
+
+
+def _unique_nodes(nodes: Iterable[onnx.NodeProto]) -> List[onnx.NodeProto]:
+    """Remove the duplicated nodes by identity."""
+    return list({id(node): node for node in nodes}.values())
+
+
+class GraphIndex:
+    """The producers and consumers of the values of an ONNX graph.
+
+    The index maps every value name to the nodes producing and consuming it
+    and to the graph inputs, outputs and value infos of the same name, so
+    that values can be renamed and nodes removed without scanning the whole
+    graph. The graph should only be modified through the index while the
+    index is in use.
+
+    Args:
+        graph (onnx.GraphProto): The graph to be indexed.
+
+    Examples:
+        >>> index = GraphIndex(model.graph)
+        >>> index.rename_value('onnx::Add_3', 'scores')
+        >>> index.remove_nodes(
+        >>>     [node for node in model.graph.node if is_identity(node)])
+    """
+
+    def __init__(self, graph: onnx.GraphProto):
+        self.graph = graph
+        self.producers = defaultdict(list)
+        self.consumers = defaultdict(list)
+        self.inputs = defaultdict(list)
+        self.outputs = defaultdict(list)
+        self.value_info = defaultdict(list)
+        for node in graph.node:
+            for name in node.output:
+                self.producers[name].append(node)
+            for name in node.input:
+                self.consumers[name].append(node)
+        for infos, container in ((self.inputs, graph.input), (self.outputs,
+                                                              graph.output),
+                                 (self.value_info, graph.value_info)):
+            for info in container:
+                infos[info.name].append(info)
+
+    def replace_inputs(self, old_name: str, new_name: str):
+        """Make the consumers of a value consume another value.
+
+        Args:
+            old_name (str): The value consumed now.
+            new_name (str): The value to be consumed.
+        """
+        if old_name == new_name:
+            return
+        for node in _unique_nodes(self.consumers.pop(old_name, [])):
+            for i, input in enumerate(node.input):
+                if input == old_name:
+                    node.input[i] = new_name
+                    self.consumers[new_name].append(node)
+
+    def rename_value(self,
+                     old_name: str,
+                     new_name: str,
+                     nodes_only: bool = False):
+        """Rename a value.
+
+        Args:
+            old_name (str): Original value name.
+            new_name (str): New value name.
+            nodes_only (bool): Only rename the inputs and outputs of nodes
+                and keep the graph inputs, outputs and value infos. Defaults
+                to False.
+        """
+        if old_name == new_name:
+            return
+        for node in _unique_nodes(self.producers.pop(old_name, [])):
+            for i, output in enumerate(node.output):
+                if output == old_name:
+                    node.output[i] = new_name
+                    self.producers[new_name].append(node)
+        self.replace_inputs(old_name, new_name)
+        if nodes_only:
+            return
+        for infos in (self.inputs, self.outputs, self.value_info):
+            for info in infos.pop(old_name, []):
+                info.name = new_name
+                infos[new_name].append(info)
+
+    def add_value_info(self, value_info: onnx.ValueInfoProto):
+        """Append a value info to the graph.
+
+        Args:
+            value_info (onnx.ValueInfoProto): The value info.
+        """
+        self.graph.value_info.append(value_info)
+        self.value_info[value_info.name].append(self.graph.value_info[-1])
+
+    def remove_nodes(self, nodes: Iterable[onnx.NodeProto]):
+        """Remove nodes from the graph in one pass.
+
+        The consumers of the outputs of the removed nodes are not
+        reconnected, which is left to the caller.
+
+        Args:
+            nodes (Iterable[onnx.NodeProto]): The nodes to be removed.
+        """
+        nodes = _unique_nodes(nodes)
+        removed = set(id(node) for node in nodes)
+        for node in nodes:
+            for name in set(node.output):
+                self.producers[name] = [
+                    n for n in self.producers[name] if n is not node
+                ]
+            for name in set(node.input):
+                self.consumers[name] = [
+                    n for n in self.consumers[name] if n is not node
+                ]
+        remove_items(self.graph.node, lambda node: id(node) in removed)
+
+
 def remove_nodes(model: onnx.ModelProto,
-                 predicate: Callable) -> onnx.ModelProto:
+                 predicate: Callable,
+                 index: Optional[GraphIndex] = None) -> onnx.ModelProto:
     """Remove nodes from ONNX model.
 
     Args:
         model (onnx.ModelProto): Input onnx model.
         predicate (Callable): A function to predicate a node.
+        index (GraphIndex): The index of the graph, a new one is built if
+            not given. Defaults to `None`.
 
     Returns:
         onnx.ModelProto: Modified onnx model.
     """
     # ! this doesn't handle inputs/outputs
     logger = get_root_logger()
-    while True:
-        connect = None
-        for i, node in enumerate(model.graph.node):
-            if predicate(node):
-                assert len(node.input) == 1
-                assert len(node.output) == 1
-                connect = (node.input[0], node.output[0])
-                logger.info(f'remove node {node.name}')
-                del model.graph.node[i]
-                break
-        if not connect:
-            break
-        src, dst = connect
-        for node in model.graph.node:
-            for i, input in enumerate(node.input):
-                if input == dst:
-                    node.input[i] = src
+    if index is None:
+        index = GraphIndex(model.graph)
+    nodes = []
+    for node in model.graph.node:
+        if predicate(node):
+            assert len(node.input) == 1
+            assert len(node.output) == 1
+            logger.info(f'remove node {node.name}')
+            nodes.append(node)
+    index.remove_nodes(nodes)
+
+    # connect the consumers to the first value not produced by the removed
+    # nodes, so that chains of removed nodes are resolved in any order.
+    sources = {node.output[0]: node.input[0] for node in nodes}
+
+    def _resolve(name):
+        path = []
+        while name in sources:
+            path.append(name)
+            name = sources[name]
+        for value in path:
+            sources[value] = name
+        return name
+
+    for node in nodes:
+        index.replace_inputs(node.output[0], _resolve(node.output[0]))
     return model
 
 
@@ -113,34 +264,26 @@ def get_new_name(attrs: Dict[str, str],
     return new_name
 
 
-def rename_value(model: onnx.ModelProto, old_name: str, new_name: str):
+def rename_value(model: onnx.ModelProto,
+                 old_name: str,
+                 new_name: str,
+                 index: Optional[GraphIndex] = None):
     """Rename a node in an ONNX model.
 
     Args:
         model (onnx.ModelProto): Input onnx model.
         old_name (str): Original node name in the model.
         new_name (str): New node name in the model.
+        index (GraphIndex): The index of the graph to rename the value
+            without scanning the graph. Defaults to `None`.
     """
     if old_name == new_name:
         return
     logger = get_root_logger()
     logger.info(f'rename {old_name} -> {new_name}')
-    for n in model.graph.node:
-        for i, output in enumerate(n.output):
-            if output == old_name:
-                n.output[i] = new_name
-        for i, input in enumerate(n.input):
-            if input == old_name:
-                n.input[i] = new_name
-    for v in model.graph.value_info:
-        if v.name == old_name:
-            v.name = new_name
-    for i, input in enumerate(model.graph.input):
-        if input.name == old_name:
-            input.name = new_name
-    for i, output in enumerate(model.graph.output):
-        if output.name == old_name:
-            output.name = new_name
+    if index is None:
+        index = GraphIndex(model.graph)
+    index.rename_value(old_name, new_name)
 
 
 def remove_identity(model: onnx.ModelProto):
@@ -150,62 +293,34 @@ def remove_identity(model: onnx.ModelProto):
         model (onnx.ModelProto): Input onnx model.
     """
     graph = model.graph
+    index = GraphIndex(graph)
+    logger = get_root_logger()
 
-    def simplify_inputs():
-        connect = None
-        logger = get_root_logger()
-        for input in graph.input:
-            for i, node in enumerate(graph.node):
-                if node.op_type == 'Identity' and node.input[0] == input.name:
-                    connect = (node.input[0], node.output[0])
-                    logger.info(f'remove node {node.name}')
-                    del graph.node[i]
-                    break
-            if connect:
-                break
-        if not connect:
-            return False
-        src, dst = connect
-        for node in graph.node:
-            for i, input_name in enumerate(node.input):
-                if input_name == dst:
-                    node.input[i] = src
-        # the input just changed won't be an output
-        return True
-
-    def simplify_outputs():
-        connect = None
-        logger = get_root_logger()
-        for output in graph.output:
-            for i, node in enumerate(graph.node):
-                if node.op_type == 'Identity' and \
-                        node.output[0] == output.name:
-                    connect = (node.input[0], node.output[0])
-                    logger.info(f'remove node {node.name}')
-                    del graph.node[i]
-                    break
-            if connect:
-                break
-        if not connect:
-            return False
-        src, dst = connect
-        for node in graph.node:
-            for i, output_name in enumerate(node.output):
-                if output_name == src:
-                    node.output[i] = dst
+    # connect the consumers of the identities of inputs to the inputs
+    for input in graph.input:
+        nodes = index.consumers[input.name]
+        while any(node.op_type == 'Identity' for node in nodes):
+            for node in _unique_nodes(nodes):
+                if node.op_type != 'Identity':
+                    continue
+                logger.info(f'remove node {node.name}')
+                index.remove_nodes([node])
+                # the input just changed won't be an output
+                index.replace_inputs(node.output[0], node.input[0])
+            nodes = index.consumers[input.name]
+
+    # rename the inputs of the identities of outputs to the outputs
+    for output in graph.output:
+        nodes = index.producers[output.name]
+        while nodes and nodes[0].op_type == 'Identity':
+            node = nodes[0]
+            logger.info(f'remove node {node.name}')
+            index.remove_nodes([node])
             # the output just renamed may be someone's input
-            for i, input_name in enumerate(node.input):
-                if input_name == src:
-                    node.input[i] = dst
-        return True
-
-    while simplify_inputs():
-        pass
+            index.rename_value(node.input[0], node.output[0], nodes_only=True)
+            nodes = index.producers[output.name]
 
-    while simplify_outputs():
-        pass
-
-    remove_nodes(model, is_identity)
+    remove_nodes(model, is_identity, index=index)
 
 
 def remove_imports(model: onnx.ModelProto):
@@ -218,12 +333,15 @@ def remove_imports(model: onnx.ModelProto):
         model (onnx.ModelProto): Input onnx model.
     """
     logger = get_root_logger()
-    dst_domain = ['']
+    dst_domain = {''}
     for node in model.graph.node:
-        if hasattr(node, 'module') and (node.module not in dst_domain):
-            dst_domain.append(node.module)
-    src_domains = [oi.domain for oi in model.opset_import]
-    for i, src_domain in enumerate(src_domains):
-        if src_domain not in dst_domain:
-            logger.info(f'remove opset_import {src_domain}')
-            model.opset_import.pop(i)
+        if hasattr(node, 'module'):
+            dst_domain.add(node.module)
+
+    def is_useless(opset_import):
+        if opset_import.domain not in dst_domain:
+            logger.info(f'remove opset_import {opset_import.domain}')
+            return True
+        return False
+
+    remove_items(model.opset_import, is_useless)
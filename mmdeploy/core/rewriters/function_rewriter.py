@@ -6,8 +6,8 @@ from typing import (Any, Callable, Dict, List, MutableSequence, Optional,
 
 from mmdeploy.utils import IR, Backend, get_root_logger
 from .rewriter_utils import (Checker, ContextCaller, RewriterRegistry,
-                             copy_function, get_frame_func, get_func_qualname,
-                             import_function)
+                             copy_function, eval_with_import, get_frame_func,
+                             get_func_qualname)
 
 try:
     try:
@@ -21,89 +21,89 @@ except ImportError:
     _wrapped_fns_to_patch = []
 
 
-def _replace_all_obj(obj: Any,
-                     new_obj: Any,
-                     ignore_refs: Tuple[Any] = tuple(),
-                     ignore_keys: Tuple[str] = tuple()):
-    """Replace all object reference with new_object.
+def _replace_all_objs(replacements: Dict[int, Tuple[Any, Any]],
+                      ignore_keys: Tuple[str] = ('origin_func', )):
+    """Replace all references of the objects with the new objects.
+
+    The referrers of all the objects are collected in one scan of the heap.
 
     Args:
-        obj (Any): The object to be replaced.
-        new_obj (Any): The object to replace obj.
-        ignore_refs (Tuple[Any]): These refs will be ignored.
+        replacements (Dict[int, Tuple[Any, Any]]): The id of the objects to
+            the objects and the new objects.
         ignore_keys (Tuple[str]): object with these keys will be ignored.
     """
+    if len(replacements) == 0:
+        return
     import gc
-    refs = gc.get_referrers(obj)
-    obj_id = id(obj)
+    objs = tuple(obj for obj, _ in replacements.values())
+    refs = gc.get_referrers(*objs)
     for ref in refs:
-        if ref in ignore_refs:
-            continue
-        elif isinstance(ref, MutableSequence):
+        if isinstance(ref, MutableSequence):
             for i, v in enumerate(ref):
-                if id(v) == obj_id:
-                    ref[i] = new_obj
+                if id(v) in replacements:
+                    ref[i] = replacements[id(v)][1]
         elif isinstance(ref, Dict):
             for k, v in ref.items():
-                if id(v) == obj_id and k not in ignore_keys:
-                    ref[k] = new_obj
+                if id(v) in replacements and k not in ignore_keys:
+                    ref[k] = replacements[id(v)][1]
         else:
             # TODO: check if we can replace tuple
             pass
 
 
-def _set_func(origin_func_path: str,
-              rewrite_func: Callable,
-              ignore_refs: Tuple[Any] = tuple(),
-              ignore_keys: Tuple[str] = ('origin_func', )):
-    """Rewrite a function by executing a python statement.
+def _import_target(path: str) -> Tuple[Any, str]:
+    """Import the module or the class that owns a function.
 
     Args:
-        origin_func_path (str): The path to origin function.
-        rewrite_func (Callable): The new function instance.
-        ignore_refs (Tuple[Any]): These refs will be ignored.
-        ignore_keys (Tuple[str]): object with these keys will be ignored.
+        path (str): The path to the function.
+
+    Returns:
+        Any: The module or the class.
+        str: The name of the function.
     """
+    assert '.' in path, f'Can not import {path}'
+    owner_path, name = path.rsplit('.', 1)
+    return eval_with_import(owner_path), name
+
 
-    # Import necessary module
-    split_path = origin_func_path.split('.')
-    for i in range(len(split_path), 0, -1):
-        try:
-            exec('import {}'.format('.'.join(split_path[:i])))
-            break
-        except Exception:
-            continue
-    origin_func = eval(origin_func_path)
-    method_class = False
-    if len(split_path) > 1:
-        module_or_class = eval('.'.join(split_path[:-1]))
-        if isinstance(module_or_class, type):
-            method_class = True
-    # Assign function
-    if not method_class:
-        _replace_all_obj(
-            origin_func,
-            rewrite_func,
-            ignore_refs=ignore_refs,
-            ignore_keys=ignore_keys)
-    exec(f'{origin_func_path} = rewrite_func')
-
-
-def _del_func(path: str):
-    """Delete a function that is denoted by a path.
+def _set_funcs(targets: List[Tuple[Any, str, Callable]]):
+    """Rewrite functions, replacing the references of the module functions.
 
     Args:
-        path (str): The path to evaluate.
+        targets (List[Tuple[Any, str, Callable]]): The owner, the name and the
+            new function instance of the functions.
+    """
+    replacements = dict()
+    for owner, name, new_func in targets:
+        # the methods are only rewritten in the class
+        if not isinstance(owner, type):
+            origin_func = getattr(owner, name)
+            replacements.setdefault(id(origin_func), (origin_func, new_func))
+    _replace_all_objs(replacements)
+    for owner, name, new_func in targets:
+        setattr(owner, name, new_func)
+
+
+class _BoundRewriter:
+    """The function rewriter seen by a rewritten function.
+
+    The globals of a rewritten function are copied, the rewriter in them is
+    replaced with this object, so `get_context()` returns the context of the
+    function without inspecting the frames.
     """
 
-    split_path = path.split('.')
-    for i in range(len(split_path), 0, -1):
-        try:
-            exec('import {}'.format('.'.join(split_path[:i])))
-            exec(f'del {path}')
-            break
-        except Exception:
-            continue
+    def __init__(self, rewriter: 'FunctionRewriter', context: ContextCaller):
+        self._rewriter = rewriter
+        self._context = context
+
+    def get_context(self, key: Optional[str] = None) -> ContextCaller:
+        """Get the context of rewriter."""
+        if key is None:
+            return self._context
+        return self._rewriter.get_context(key)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._rewriter, name)
 
 
 def _fx_wrap_copied_fn(func: types.FunctionType,
@@ -148,6 +148,11 @@ class FunctionRewriter:
     def __init__(self):
         self._registry = RewriterRegistry()
         self._func_contexts = defaultdict(list)
+        # function path -> (owner, name), or None if it can not be imported
+        self._targets = dict()
+        # function path -> (rewrite function, copied function, names of the
+        # rewriter in the globals of the copied function)
+        self._copied_functions = dict()
 
     def register_rewriter(
             self,
@@ -172,6 +177,36 @@ class FunctionRewriter:
         return self._registry.register_object(func_name, backend, ir,
                                               extra_checkers, **kwargs)
 
+    def _get_target(self, function_path: str) -> Optional[Tuple[Any, str]]:
+        """Get the owner and the name of the function to rewrite, the imports
+        are cached."""
+        if function_path not in self._targets:
+            try:
+                owner, name = _import_target(function_path)
+                getattr(owner, name)
+                self._targets[function_path] = (owner, name)
+            except Exception:
+                self._targets[function_path] = None
+                logger = get_root_logger()
+                logger.warning(
+                    f'Can not find {function_path}, function rewrite will '
+                    'not be applied')
+        return self._targets[function_path]
+
+    def _copy_function(self, function_path: str,
+                       rewrite_function: Callable) -> Tuple[Callable, List]:
+        """Copy the rewrite function once for each function path."""
+        copied = self._copied_functions.get(function_path, None)
+        if copied is None or copied[0] is not rewrite_function:
+            # The func before and after copy has different globals
+            copied_function = copy_function(rewrite_function)
+            names = [
+                k for k, v in copied_function.__globals__.items() if v is self
+            ]
+            copied = (rewrite_function, copied_function, names)
+            self._copied_functions[function_path] = copied
+        return copied[1], copied[2]
+
     def enter(self, cfg: Dict = dict(), env: Dict = dict(), **kwargs):
         """The implementation of function rewrite."""
         self._func_contexts.clear()
@@ -186,44 +221,41 @@ class FunctionRewriter:
         for function_path, record_dict in functions_records:
 
             # Check if the origin function exists
-            try:
-                origin_func, origin_class = import_function(function_path)
-            except Exception:
-                origin_func = None
-                logger = get_root_logger()
-                logger.warning(
-                    f'Can not find {function_path}, function rewrite will '
-                    'not be applied')
+            target = self._get_target(function_path)
 
             # Only rewrite functions that exist
-            if origin_func is not None:
+            if target is not None:
+                owner, function_name = target
+                origin_func = getattr(owner, function_name)
 
                 is_addition_function = False
-                if origin_class is not None:
-                    function_name = function_path.split('.')[-1]
+                if isinstance(owner, type):
                     try:
-                        origin_class.__getattribute__(origin_class,
-                                                      function_name)
+                        owner.__getattribute__(owner, function_name)
                     except Exception:
                         # The function is a method and it is derived from base
                         # class.
                         is_addition_function = True
 
                 if is_addition_function:
-                    self._additional_functions.append(function_path)
+                    self._additional_functions.append(target)
 
                 # Save origin function
                 self._origin_functions.append(
-                    dict(func_path=function_path, origin_func=origin_func))
+                    dict(target=target, origin_func=origin_func))
 
                 # Create context_caller
-                rewrite_function = record_dict['_object']
-                # The func before and after copy has different globals
-                rewrite_function = copy_function(rewrite_function)
+                rewrite_function, rewriter_names = self._copy_function(
+                    function_path, record_dict['_object'])
                 extra_kwargs = kwargs.copy()
                 extra_kwargs.update(record_dict)
                 context_caller = ContextCaller(rewrite_function, origin_func,
                                                cfg, **extra_kwargs)
+                # The copied function resolves its context from its globals
+                glb = rewrite_function.__globals__
+                glb[rewrite_function.__name__] = rewrite_function
+                for name in rewriter_names:
+                    glb[name] = _BoundRewriter(self, context_caller)
                 # If there is a function wrapped by torch.fx.wrap in
                 # rewrite_function's globals, we need to wrap the same name
                 # function in copied function's globals.
@@ -234,15 +266,10 @@ class FunctionRewriter:
                 self._func_contexts[function_path].append(context_caller)
 
                 # Cache new the function to avoid homonymic bug
-                new_functions.append(
-                    dict(
-                        func_path=function_path, origin_func=rewrite_function))
+                new_functions.append((owner, function_name, rewrite_function))
 
-        for func_dict in new_functions:
-            function_path = func_dict['func_path']
-            new_function = func_dict['origin_func']
-            # Rewrite functions
-            _set_func(function_path, new_function)
+        # Rewrite functions
+        _set_funcs(new_functions)
 
     def exit(self):
         """Recover the function rewrite."""
@@ -251,12 +278,10 @@ class FunctionRewriter:
         for _ in range(cur_fx_wrap_num - self._ori_fx_wrap_num):
             _wrapped_fns_to_patch.pop(-1)
 
-        for func_dict in self._origin_functions:
-            func_path = func_dict['func_path']
-            func = func_dict['origin_func']
-            _set_func(func_path, func)
-        for func_path in self._additional_functions:
-            _del_func(func_path)
+        _set_funcs([(*func_dict['target'], func_dict['origin_func'])
+                    for func_dict in self._origin_functions])
+        for owner, name in self._additional_functions:
+            delattr(owner, name)
 
         self._func_contexts.clear()
 
@@ -1,6 +1,7 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import functools
 import inspect
+import sys
 import types
 import warnings
 from abc import ABCMeta, abstractmethod
@@ -204,6 +205,8 @@ class RewriterRegistry:
 
     def __init__(self):
         self._rewrite_records = dict()
+        # env -> valid records, cleared when the records change
+        self._records_cache = dict()
 
     def get_records(self, env: Dict) -> List:
         """Get all registered records that are valid in the given environment
@@ -216,6 +219,9 @@ class RewriterRegistry:
         activate the first one (The order is determined by the time when
         rewriters are loaded).
 
+        The records of each environment are cached until the registry is
+        changed.
+
         Args:
             env (dict): Environment dictionary that includes backend, IR,
                 codebase version, etc.
@@ -223,6 +229,17 @@ class RewriterRegistry:
         Returns:
             List: A list that includes valid records.
         """
+        try:
+            env_key = tuple(sorted(env.items()))
+            hash(env_key)
+        except TypeError:
+            return self._get_records(env)
+        if env_key not in self._records_cache:
+            self._records_cache[env_key] = self._get_records(env)
+        return list(self._records_cache[env_key])
+
+    def _get_records(self, env: Dict) -> List:
+        """The implementation of get_records."""
         default_records = list()
         records = list()
 
@@ -274,6 +291,7 @@ class RewriterRegistry:
     def _register(self, name: str, backend: Backend, ir: IR,
                   extra_checkers: List[Checker], **kwargs):
         """The implementation of register."""
+        self._records_cache.clear()
 
         # Merge checkers to kwargs
         record_dict = kwargs
@@ -345,6 +363,7 @@ class RewriterRegistry:
                             continue
                     key_to_pop.append((key, rec))
 
+        self._records_cache.clear()
         for key, rec in key_to_pop:
             records = self._rewrite_records[key]
             records.remove(rec)
@@ -422,11 +441,10 @@ def get_func_qualname(func: Callable) -> str:
 
 def get_frame_func(top: int = 1) -> Callable:
     """get func of frame."""
-    frameinfo = inspect.stack()[top]
-    frame = frameinfo.frame
+    frame = sys._getframe(top)
 
     g_vars = frame.f_globals
-    func_name = frameinfo.function
+    func_name = frame.f_code.co_name
     assert func_name in g_vars, \
         f'Can not find function: {func_name} in global.'
     func = g_vars[func_name]
@@ -435,11 +453,10 @@ def get_frame_func(top: int = 1) -> Callable:
 
 def get_frame_qualname(top: int = 1) -> str:
     """get frame name."""
-    frameinfo = inspect.stack()[top]
-    frame = frameinfo.frame
+    frame = sys._getframe(top)
 
     g_vars = frame.f_globals
-    func_name = frameinfo.function
+    func_name = frame.f_code.co_name
     assert func_name in g_vars, \
         f'Can not find function: {func_name} in global.'
     func = g_vars[func_name]
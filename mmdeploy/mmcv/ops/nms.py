@@ -10,6 +10,23 @@ from mmdeploy.utils.constants import Backend
 from .nms_rotated import multiclass_nms_rotated
 
 
+def _get_group_positions(group_inds: Tensor) -> Tensor:
+    """Get the position of each element in its group.
+
+    Args:
+        group_inds (Tensor): The sorted group indices of shape [num].
+
+    Returns:
+        Tensor: The positions of the elements in their groups.
+    """
+    prev_inds = torch.cat([group_inds.new_full((1, ), -1), group_inds])[:-1]
+    is_first = group_inds != prev_inds
+    first_inds = is_first.nonzero().squeeze(1)
+    inds = torch.arange(
+        group_inds.shape[0], dtype=torch.long, device=group_inds.device)
+    return inds - first_inds[is_first.long().cumsum(0) - 1]
+
+
 class ONNXNMSop(torch.autograd.Function):
     """Create onnx::NonMaxSuppression op.
 
@@ -38,29 +55,34 @@ class ONNXNMSop(torch.autograd.Function):
             (num_selected_indices, 3) with each row of
             [batch_index, class_index, box_index].
         """
-        from mmcv.ops import nms
-        batch_size, num_class, _ = scores.shape
+        from torchvision.ops import batched_nms
+        num_class = scores.shape[1]
 
         score_threshold = float(score_threshold)
         iou_threshold = float(iou_threshold)
-        indices = []
-        for batch_id in range(batch_size):
-            for cls_id in range(num_class):
-                _boxes = boxes[batch_id, ...]
-                # score_threshold=0 requires scores to be contiguous
-                _scores = scores[batch_id, cls_id, ...].contiguous()
-                _, box_inds = nms(
-                    _boxes,
-                    _scores,
-                    iou_threshold,
-                    offset=0,
-                    score_threshold=score_threshold,
-                    max_num=max_output_boxes_per_class)
-                batch_inds = torch.zeros_like(box_inds) + batch_id
-                cls_inds = torch.zeros_like(box_inds) + cls_id
-                indices.append(
-                    torch.stack([batch_inds, cls_inds, box_inds], dim=-1))
-        indices = torch.cat(indices)
+        max_output_boxes_per_class = int(max_output_boxes_per_class)
+
+        # boxes of all images and classes are suppressed in one call
+        batch_inds, cls_inds, box_inds = (scores > score_threshold).nonzero(
+            as_tuple=True)
+        group_inds = batch_inds * num_class + cls_inds
+        _boxes = boxes[batch_inds, box_inds]
+        _scores = scores[batch_inds, cls_inds, box_inds]
+        # the boxes are offset by groups, use double to keep the iou accurate
+        keep = batched_nms(
+            _boxes.double(),
+            _scores.double(),
+            group_inds,
+            iou_threshold=iou_threshold)
+
+        # sort by image and class, the scores are kept in descending order
+        _, order = group_inds[keep].sort(stable=True)
+        keep = keep[order]
+        if max_output_boxes_per_class > 0:
+            keep = keep[_get_group_positions(group_inds[keep]) <
+                        max_output_boxes_per_class]
+        indices = torch.stack(
+            [batch_inds[keep], cls_inds[keep], box_inds[keep]], dim=-1)
         return indices
 
     @staticmethod
@@ -191,6 +213,10 @@ def _select_nms_index(scores: torch.Tensor,
                       output_index: bool = False):
     """Transform NMS output.
 
+    The detections are sorted by image and score, then scattered into a
+    buffer of [N, num_det, 5], so the memory is linear to the number of
+    detections.
+
     Args:
         scores (Tensor): The detection scores of shape
             [N, num_classes, num_boxes].
@@ -201,65 +227,56 @@ def _select_nms_index(scores: torch.Tensor,
             Defaults to -1.
         pre_inds (Tensor): The pre-topk indices of boxes before nms.
             Defaults to None.
-        return_index (bool): Whether to return indices of original bboxes.
+        output_index (bool): Whether to return indices of original bboxes.
             Defaults to False.
 
     Returns:
         tuple[Tensor, Tensor]: (dets, labels), `dets` of shape [N, num_det, 5]
-            and `labels` of shape [N, num_det].
+            and `labels` of shape [N, num_det]. The empty detections are
+            padded with zeros and labeled -1. The box indices of shape
+            [N, num_det] are also returned if `output_index` is True, with
+            -1 for the empty detections.
     """
     batch_inds, cls_inds = nms_index[:, 0], nms_index[:, 1]
     box_inds = nms_index[:, 2]
 
     # index by nms output
-    scores = scores[batch_inds, cls_inds, box_inds].unsqueeze(1)
+    scores = scores[batch_inds, cls_inds, box_inds]
     boxes = boxes[batch_inds, box_inds, ...]
-    dets = torch.cat([boxes, scores], dim=1)
-
-    # batch all
-    batched_dets = dets.unsqueeze(0).repeat(batch_size, 1, 1)
-    batch_template = torch.arange(
-        0, batch_size, dtype=batch_inds.dtype, device=batch_inds.device)
-    batched_dets = batched_dets.where(
-        (batch_inds == batch_template.unsqueeze(1)).unsqueeze(-1),
-        batched_dets.new_zeros(1))
-
-    batched_labels = cls_inds.unsqueeze(0).repeat(batch_size, 1)
-    batched_labels = batched_labels.where(
-        (batch_inds == batch_template.unsqueeze(1)),
-        batched_labels.new_ones(1) * -1)
-
-    N = batched_dets.shape[0]
-
-    # expand tensor to eliminate [0, ...] tensor
-    batched_dets = torch.cat((batched_dets, batched_dets.new_zeros((N, 1, 5))),
-                             1)
-    batched_labels = torch.cat((batched_labels, batched_labels.new_zeros(
-        (N, 1))), 1)
-    if output_index and pre_inds is not None:
-        # batch all
-        pre_inds = pre_inds[batch_inds, box_inds]
-        pre_inds = pre_inds.unsqueeze(0).repeat(batch_size, 1)
-        pre_inds = pre_inds.where((batch_inds == batch_template.unsqueeze(1)),
-                                  pre_inds.new_zeros(1))
-        pre_inds = torch.cat((pre_inds, -pre_inds.new_ones((N, 1))), 1)
-    # sort
+    dets = torch.cat([boxes, scores.unsqueeze(1)], dim=1)
+    num_dets = nms_index.shape[0]
+
+    # sort by score, then group by image with the score ranks as ties
+    _, order = scores.sort(descending=True)
+    ranks = torch.arange(
+        num_dets, dtype=batch_inds.dtype, device=batch_inds.device)
+    _, batch_order = (batch_inds[order] * num_dets + ranks).sort()
+    order = order[batch_order]
+    batch_inds = batch_inds[order]
+
+    positions = _get_group_positions(batch_inds)
+
+    # keep the top k, the output is padded as if sorted with empty detections
     is_use_topk = keep_top_k > 0 and \
-        (torch.onnx.is_in_onnx_export() or keep_top_k < batched_dets.shape[1])
-    if is_use_topk:
-        _, topk_inds = batched_dets[:, :, -1].topk(keep_top_k, dim=1)
-    else:
-        _, topk_inds = batched_dets[:, :, -1].sort(dim=1, descending=True)
-    topk_batch_inds = torch.arange(
-        batch_size, dtype=topk_inds.dtype,
-        device=topk_inds.device).view(-1, 1)
-    batched_dets = batched_dets[topk_batch_inds, topk_inds, ...]
-    batched_labels = batched_labels[topk_batch_inds, topk_inds, ...]
+        (torch.onnx.is_in_onnx_export() or keep_top_k < num_dets + 1)
+    num_out = keep_top_k if is_use_topk else num_dets + 1
+    keep = positions < num_out
+    order = order[keep]
+    batch_inds = batch_inds[keep]
+    positions = positions[keep]
+
+    batched_dets = dets.new_zeros((batch_size, num_out, 5))
+    batched_dets[batch_inds, positions] = dets[order]
+    batched_labels = cls_inds.new_full((batch_size, num_out), -1)
+    batched_labels[batch_inds, positions] = cls_inds[order]
     if output_index:
+        box_inds = box_inds[order]
         if pre_inds is not None:
-            topk_inds = pre_inds[topk_batch_inds, topk_inds, ...]
-        return batched_dets, batched_labels, topk_inds
-    # slice and recover the tensor
+            box_inds = pre_inds[batch_inds, box_inds]
+        # the empty detections index -1, e.g. an appended empty box
+        batched_inds = box_inds.new_full((batch_size, num_out), -1)
+        batched_inds[batch_inds, positions] = box_inds
+        return batched_dets, batched_labels, batched_inds
     return batched_dets, batched_labels
 
 
@@ -608,12 +625,13 @@ def multiclass_nms__torchscript(boxes: Tensor,
                                 output_index=False):
     """rewrite for torchscript batched nms.
 
-    Use batched_nms from torchvision instead of custom nms.
+    Use batched_nms from torchvision instead of custom nms. The boxes of all
+    images and classes are suppressed in one call. The detections below
+    `score_threshold` are not output.
     """
     # TODO: simplify inference for non-batch model
     from torchvision.ops import batched_nms
     batch_size = scores.shape[0]
-    num_boxes = scores.shape[1]
     num_classes = scores.shape[2]
     box_per_cls = len(boxes.shape) == 4
     scores = torch.where(scores > score_threshold, scores, scores.new_zeros(1))
@@ -626,25 +644,28 @@ def multiclass_nms__torchscript(boxes: Tensor,
         batch_inds = torch.arange(batch_size).view(-1, 1).long()
         boxes = boxes[batch_inds, topk_inds, ...]
         scores = scores[batch_inds, topk_inds, :]
-        num_boxes = scores.shape[1]
-
-    idxs = torch.arange(0, batch_size, device=scores.device).unsqueeze(1)
-    idxs = idxs.repeat(1, num_boxes).view(-1)
-
-    keeps = [None] * num_classes
-    for cls_id in range(num_classes):
-        box = boxes if not box_per_cls else boxes[:, :, cls_id, :]
-        score = scores[:, :, cls_id]
-        box = box.view(-1, 4)
-        score = score.view(-1)
-        box_keep = batched_nms(box, score, idxs, iou_threshold=iou_threshold)
-        box_keep = box_keep[:max_output_boxes_per_class * batch_size]
-        batch_keep = idxs[box_keep]
-        cls_keep = torch.ones_like(box_keep) * cls_id
-        box_keep = box_keep - batch_keep * num_boxes
-        keeps[cls_id] = torch.stack([batch_keep, cls_keep, box_keep], dim=1)
-
-    keeps = torch.cat(keeps)
+
+    batch_inds, box_inds, cls_inds = (scores > score_threshold).nonzero(
+        as_tuple=True)
+    if box_per_cls:
+        box = boxes[batch_inds, box_inds, cls_inds]
+    else:
+        box = boxes[batch_inds, box_inds]
+    score = scores[batch_inds, box_inds, cls_inds]
+    group_inds = batch_inds * num_classes + cls_inds
+    # the boxes are offset by groups, use double to keep the iou accurate
+    keep = batched_nms(
+        box.double(), score.double(), group_inds, iou_threshold=iou_threshold)
+
+    # keep the top boxes of each class in the batch
+    _, order = cls_inds[keep].sort(stable=True)
+    keep = keep[order]
+    if max_output_boxes_per_class > 0:
+        keep = keep[_get_group_positions(cls_inds[keep]) <
+                    max_output_boxes_per_class * batch_size]
+
+    keeps = torch.stack([batch_inds[keep], cls_inds[keep], box_inds[keep]],
+                        dim=1)
     scores = scores.permute(0, 2, 1)
     return _select_nms_index(
         scores,
@@ -0,0 +1,156 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import mmap
+import os
+import os.path as osp
+from typing import Iterator, List, Optional
+
+import onnx
+from onnx.external_data_helper import ExternalDataInfo, uses_external_data
+
+# protobuf can not serialize a message larger than 2GB
+MAX_PROTO_SIZE = 2**31 - 1
+
+
+def get_external_data_path(onnx_path: str) -> str:
+    """Get the path of the external data file of an ONNX model.
+
+    The weights of a model larger than 2GB are saved in one external data
+    file next to the model, named after the model.
+
+    Args:
+        onnx_path (str): The path of the ONNX model.
+
+    Returns:
+        str: The path of the external data file.
+    """
+    return onnx_path + '.data'
+
+
+def get_onnx_files(onnx_path: str) -> List[str]:
+    """Get the files of an ONNX model, including the external data file.
+
+    Args:
+        onnx_path (str): The path of the ONNX model.
+
+    Returns:
+        List[str]: The model file and its external data file if exists.
+    """
+    files = [onnx_path]
+    data_path = get_external_data_path(onnx_path)
+    if osp.exists(data_path):
+        files.append(data_path)
+    return files
+
+
+def _iter_tensors(graph: onnx.GraphProto) -> Iterator[onnx.TensorProto]:
+    """Iterate the initializers and the attribute tensors of a graph."""
+    yield from graph.initializer
+    for node in graph.node:
+        for attr in node.attribute:
+            if attr.HasField('t'):
+                yield attr.t
+            yield from attr.tensors
+            if attr.HasField('g'):
+                yield from _iter_tensors(attr.g)
+            for g in attr.graphs:
+                yield from _iter_tensors(g)
+
+
+def has_external_data(model: onnx.ModelProto) -> bool:
+    """Whether any tensor of the model is stored in external data files.
+
+    Args:
+        model (onnx.ModelProto): The ONNX model.
+
+    Returns:
+        bool: True if the model has external data.
+    """
+    return any(uses_external_data(t) for t in _iter_tensors(model.graph))
+
+
+def save_onnx(model: onnx.ModelProto,
+              onnx_path: str,
+              save_as_external_data: Optional[bool] = None):
+    """Save an ONNX model, the weights of large models are saved in the
+    external data file given by :func:`get_external_data_path`.
+
+    The tensors of the model must be loaded, and a stale external data file
+    of the path is removed. Like `onnx.save`, the tensors saved in the
+    external data file are cleared from the model.
+
+    Args:
+        model (onnx.ModelProto): The ONNX model to save.
+        onnx_path (str): The path to save the model.
+        save_as_external_data (bool): Whether to save the weights in the
+            external data file. Defaults to `None`, which means only the
+            models larger than 2GB use external data.
+    """
+    if save_as_external_data is None:
+        save_as_external_data = model.ByteSize() > MAX_PROTO_SIZE
+    data_path = get_external_data_path(onnx_path)
+    # onnx appends to the existing external data file
+    if osp.exists(data_path):
+        os.remove(data_path)
+    if save_as_external_data:
+        onnx.save(
+            model,
+            onnx_path,
+            save_as_external_data=True,
+            all_tensors_to_one_file=True,
+            location=osp.basename(data_path))
+    else:
+        onnx.save(model, onnx_path)
+
+
+def consolidate_external_data(onnx_path: str):
+    """Move the external data of an ONNX model into one file.
+
+    `torch.onnx.export` saves each weight of a model larger than 2GB in a
+    separate file. The weights are copied into the file given by
+    :func:`get_external_data_path` through memory maps, so neither the weights
+    nor the model are fully loaded into memory.
+
+    Args:
+        onnx_path (str): The path of the ONNX model.
+    """
+    model = onnx.load(onnx_path, load_external_data=False)
+    tensors = [t for t in _iter_tensors(model.graph) if uses_external_data(t)]
+    if len(tensors) == 0:
+        return
+
+    base_dir = osp.dirname(onnx_path)
+    data_path = get_external_data_path(onnx_path)
+    location = osp.basename(data_path)
+    maps = dict()
+    try:
+        with open(data_path + '.tmp', 'wb') as f:
+            for tensor in tensors:
+                info = ExternalDataInfo(tensor)
+                src_path = osp.join(base_dir, info.location)
+                if src_path not in maps:
+                    with open(src_path, 'rb') as src:
+                        maps[src_path] = mmap.mmap(
+                            src.fileno(), 0, access=mmap.ACCESS_READ
+                        ) if osp.getsize(src_path) > 0 else b''
+                data = maps[src_path]
+                start = info.offset or 0
+                end = len(data) if info.length is None else \
+                    start + info.length
+                offset = f.tell()
+                with memoryview(data) as view:
+                    f.write(view[start:end])
+                del tensor.external_data[:]
+                for key, value in (('location', location), ('offset', offset),
+                                   ('length', end - start)):
+                    entry = tensor.external_data.add()
+                    entry.key = key
+                    entry.value = str(value)
+    finally:
+        for data in maps.values():
+            if isinstance(data, mmap.mmap):
+                data.close()
+    os.replace(data_path + '.tmp', data_path)
+    for src_path in maps:
+        if osp.abspath(src_path) != osp.abspath(data_path):
+            os.remove(src_path)
+    onnx.save(model, onnx_path)
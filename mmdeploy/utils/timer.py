@@ -1,9 +1,15 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+import csv
+import json
+import math
+import os
+import threading
 import time
 import warnings
+from collections import deque
 from contextlib import contextmanager
 from logging import Logger
-from typing import Optional
+from typing import Dict, List, Optional
 
 import numpy as np
 import torch
@@ -11,9 +17,295 @@ import torch
 from mmdeploy.utils.logging import get_logger
 
 
+class LatencyHistogram:
+    """A fixed-memory histogram of latencies.
+
+    Samples are counted in logarithmic buckets, so the memory does not grow
+    with the number of samples and the percentiles have a bounded relative
+    error. The count, sum, min and max are exact.
+
+    Args:
+        min_value (float): The lower bound of the histogram in seconds.
+            Smaller samples are counted in the first bucket. Defaults to 1e-6.
+        max_value (float): The upper bound of the histogram in seconds.
+            Larger samples are counted in the last bucket. Defaults to 1e3.
+        precision (float): The relative width of each bucket. Defaults to
+            0.01.
+
+    Examples:
+        >>> from mmdeploy.utils.timer import LatencyHistogram
+        >>> hist = LatencyHistogram()
+        >>> for latency in [0.010, 0.012, 0.011, 0.050]:
+        >>>     hist.add(latency)
+        >>> hist.percentile(50)
+    """
+
+    def __init__(self,
+                 min_value: float = 1e-6,
+                 max_value: float = 1e3,
+                 precision: float = 0.01):
+        assert 0 < min_value < max_value
+        assert precision > 0
+        self.min_value = min_value
+        self._log_base = math.log1p(precision)
+        num_buckets = int(math.log(max_value / min_value) / self._log_base) + 2
+        self._counts = np.zeros(num_buckets, dtype=np.int64)
+        self.count = 0
+        self.total = 0.
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        """Add a sample.
+
+        Args:
+            value (float): The latency in seconds.
+        """
+        if value <= self.min_value:
+            index = 0
+        else:
+            index = min(
+                int(math.log(value / self.min_value) / self._log_base) + 1,
+                len(self._counts) - 1)
+        self._counts[index] += 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    @property
+    def mean(self) -> float:
+        """The mean of the samples."""
+        return self.total / self.count if self.count > 0 else math.nan
+
+    def percentile(self, q: float) -> float:
+        """Get the percentile of the samples.
+
+        Args:
+            q (float): The percentile in range [0, 100].
+
+        Returns:
+            float: The estimated latency of the percentile in seconds.
+        """
+        if self.count == 0:
+            return math.nan
+        rank = max(1, math.ceil(q / 100 * self.count))
+        index = int(np.searchsorted(np.cumsum(self._counts), rank))
+        if index == 0:
+            value = self.min_value
+        else:
+            # geometric center of the bucket
+            value = self.min_value * math.exp((index - 0.5) * self._log_base)
+        return min(max(value, self.min), self.max)
+
+    def summary(self) -> Dict[str, float]:
+        """Summarize the samples.
+
+        Returns:
+            Dict[str, float]: The count of samples and the mean, min, p50,
+                p90, p99 and max latencies in milliseconds.
+        """
+        return dict(
+            count=self.count,
+            mean=1000 * self.mean,
+            min=1000 * self.min if self.count > 0 else math.nan,
+            p50=1000 * self.percentile(50),
+            p90=1000 * self.percentile(90),
+            p99=1000 * self.percentile(99),
+            max=1000 * self.max if self.count > 0 else math.nan)
+
+
+class Profiler:
+    """A thread-safe profiler of named and nested scopes.
+
+    Each scope is recorded in a `LatencyHistogram` under its full path, e.g.
+    `model/backend` for a `backend` scope opened inside a `model` scope of
+    the same thread. The latest scopes are also kept as Chrome trace events.
+
+    Args:
+        warmup (int): The number of leading samples of each scope to be
+            ignored. Defaults to 0.
+        with_sync (bool): Whether to synchronize CUDA when entering and
+            leaving a scope. Defaults to `False`.
+        max_events (int): The max number of kept trace events. Defaults to
+            100000.
+
+    Examples:
+        >>> from mmdeploy.utils.timer import Profiler
+        >>> profiler = Profiler()
+        >>> with profiler.scope('model'):
+        >>>     with profiler.scope('preprocess'):
+        >>>         pass
+        >>>     with profiler.scope('backend'):
+        >>>         pass
+        >>> profiler.print_stats()
+        >>> profiler.export_chrome_trace('trace.json')
+    """
+
+    def __init__(self,
+                 warmup: int = 0,
+                 with_sync: bool = False,
+                 max_events: int = 100000):
+        self.warmup = warmup
+        self.with_sync = with_sync
+        self._histograms: Dict[str, LatencyHistogram] = dict()
+        self._num_calls: Dict[str, int] = dict()
+        self._events = deque(maxlen=max_events)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._start_time = time.perf_counter()
+
+    def _get_stack(self) -> List[str]:
+        """Get the scope stack of the current thread."""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _sync(self):
+        if self.with_sync and torch.cuda.is_available():
+            torch.cuda.synchronize()
+
+    @contextmanager
+    def scope(self, name: str):
+        """Time a scope.
+
+        Args:
+            name (str): The name of the scope.
+        """
+        stack = self._get_stack()
+        stack.append(name)
+        self._sync()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._sync()
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            self.record(name, start, elapsed)
+
+    def record(self, name: str, start: float, elapsed: float):
+        """Record a finished scope under the scopes opened in this thread.
+
+        Args:
+            name (str): The name of the scope.
+            start (float): The start time from `time.perf_counter()`.
+            elapsed (float): The elapsed time in seconds.
+        """
+        path = '/'.join(self._get_stack() + [name])
+        with self._lock:
+            num_calls = self._num_calls.get(path, 0) + 1
+            self._num_calls[path] = num_calls
+            if num_calls <= self.warmup:
+                return
+            if path not in self._histograms:
+                self._histograms[path] = LatencyHistogram()
+            self._histograms[path].add(elapsed)
+            self._events.append(
+                dict(
+                    name=name,
+                    ph='X',
+                    ts=1e6 * (start - self._start_time),
+                    dur=1e6 * elapsed,
+                    pid=os.getpid(),
+                    tid=threading.get_ident(),
+                    args=dict(path=path)))
+
+    def get_histogram(self, path: str) -> Optional[LatencyHistogram]:
+        """Get the histogram of a scope.
+
+        Args:
+            path (str): The full path of the scope.
+
+        Returns:
+            LatencyHistogram | None: The histogram, `None` if the scope has
+                not been recorded.
+        """
+        return self._histograms.get(path, None)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Summarize all scopes.
+
+        Returns:
+            Dict[str, Dict[str, float]]: The summary of each scope path in
+                order, see `LatencyHistogram.summary`.
+        """
+        with self._lock:
+            return dict((path, self._histograms[path].summary())
+                        for path in sorted(self._histograms))
+
+    def reset(self):
+        """Clear all records."""
+        with self._lock:
+            self._histograms.clear()
+            self._num_calls.clear()
+            self._events.clear()
+
+    def print_stats(self, batch_size: int = 1):
+        """Print the summary of all scopes.
+
+        Args:
+            batch_size (int): The batch size of each call, used to compute
+                the throughput. Defaults to 1.
+        """
+        from prettytable import PrettyTable
+        results = PrettyTable()
+        results.field_names = [
+            'Scope', 'Count', 'Mean/ms', 'P50/ms', 'P90/ms', 'P99/ms',
+            'Max/ms', 'FPS'
+        ]
+        for path, stats in self.stats().items():
+            results.add_row([
+                path, stats['count'], stats['mean'], stats['p50'],
+                stats['p90'], stats['p99'], stats['max'],
+                1000 * batch_size / stats['mean']
+            ])
+        results.float_format = '.3'
+        results.align['Scope'] = 'l'
+        print(results)
+
+    def export_json(self, file: str):
+        """Export the summary of all scopes to a json file.
+
+        Args:
+            file (str): The output file.
+        """
+        with open(file, 'w') as f:
+            json.dump(self.stats(), f, indent=4)
+
+    def export_csv(self, file: str):
+        """Export the summary of all scopes to a csv file.
+
+        Args:
+            file (str): The output file.
+        """
+        fields = ['count', 'mean', 'min', 'p50', 'p90', 'p99', 'max']
+        with open(file, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['scope'] + fields)
+            for path, stats in self.stats().items():
+                writer.writerow([path] + [stats[_] for _ in fields])
+
+    def export_chrome_trace(self, file: str):
+        """Export the kept scopes in Chrome trace format.
+
+        The file can be opened with `chrome://tracing` or Perfetto.
+
+        Args:
+            file (str): The output file.
+        """
+        with self._lock:
+            events = list(self._events)
+        with open(file, 'w') as f:
+            json.dump(dict(traceEvents=events), f)
+
+
 class TimeCounter:
     """A tool for counting inference time of backends."""
     names = dict()
+    profiler: Optional[Profiler] = None
+    _lock = threading.Lock()
 
     # Avoid instantiating every time
     @classmethod
@@ -24,6 +316,8 @@ class TimeCounter:
                    with_sync: bool = False):
         """Proceed time counting.
 
+        Functions registered with the same name share the statistics.
+
         Args:
             name (str): Name of this timer.
             warmup (int): The warm up steps, default 1.
@@ -34,53 +328,34 @@ class TimeCounter:
 
         def _register(func):
             assert warmup >= 1
-            assert name not in cls.names,\
-                'The registered function name cannot be repeated!'
             # When adding on multiple functions, we need to ensure that the
             # data does not interfere with each other
-            cls.names[name] = dict(
-                count=0,
-                execute_time=[],
-                log_interval=log_interval,
-                warmup=warmup,
-                with_sync=with_sync,
-                batch_size=1,
-                enable=False)
+            if name not in cls.names:
+                cls.names[name] = dict(
+                    count=0,
+                    execute_time=LatencyHistogram(),
+                    log_interval=log_interval,
+                    warmup=warmup,
+                    with_sync=with_sync,
+                    batch_size=1,
+                    enable=False)
 
             def fun(*args, **kwargs):
-                count = cls.names[name]['count']
-                execute_time = cls.names[name]['execute_time']
-                log_interval = cls.names[name]['log_interval']
-                warmup = cls.names[name]['warmup']
-                with_sync = cls.names[name]['with_sync']
-                batch_size = cls.names[name]['batch_size']
-                enable = cls.names[name]['enable']
-
-                count += 1
-                cls.names[name]['count'] = count
-
-                if enable:
-                    if with_sync and torch.cuda.is_available():
-                        torch.cuda.synchronize()
-                    start_time = time.perf_counter()
+                stats = cls.names[name]
+                enable = stats['enable']
+                if not enable:
+                    return func(*args, **kwargs)
 
-                result = func(*args, **kwargs)
+                with_sync = stats['with_sync']
+                if with_sync and torch.cuda.is_available():
+                    torch.cuda.synchronize()
+                start_time = time.perf_counter()
 
-                if enable:
-                    if with_sync and torch.cuda.is_available():
-                        torch.cuda.synchronize()
-                    elapsed = (time.perf_counter() - start_time) / batch_size
-
-                if enable and count > warmup:
-                    execute_time.append(elapsed)
+                result = func(*args, **kwargs)
 
-                    if (count - warmup) % log_interval == 0:
-                        times_per_count = 1000 * float(np.mean(execute_time))
-                        fps = 1000 / times_per_count
-                        msg = f'[{name}]-{count} times per count: '\
-                              f'{times_per_count:.2f} ms, '\
-                              f'{fps:.2f} FPS'
-                        cls.logger.info(msg)
+                if with_sync and torch.cuda.is_available():
+                    torch.cuda.synchronize()
+                cls.record_time(name, start_time, time.perf_counter())
 
                 return result
 
@@ -88,6 +363,42 @@ class TimeCounter:
 
         return _register
 
+    @classmethod
+    def record_time(cls, name: str, start_time: float, end_time: float):
+        """Record a call timed by the caller.
+
+        It is used for the calls which do not return in the function, such as
+        asynchronous requests, and shares the statistics of `count_time`.
+
+        Args:
+            name (str): Name of the timer registered with `count_time`.
+            start_time (float): The start time from `time.perf_counter`.
+            end_time (float): The end time from `time.perf_counter`.
+        """
+        stats = cls.names[name]
+        elapsed = (end_time - start_time) / stats['batch_size']
+
+        with cls._lock:
+            stats['count'] += 1
+            count = stats['count']
+            warmup = stats['warmup']
+            if count <= warmup:
+                return
+            execute_time = stats['execute_time']
+            execute_time.add(elapsed)
+            mean = execute_time.mean
+
+        if cls.profiler is not None:
+            cls.profiler.record(name, start_time, end_time - start_time)
+
+        if (count - warmup) % stats['log_interval'] == 0:
+            times_per_count = 1000 * mean
+            fps = 1000 / times_per_count
+            msg = f'[{name}]-{count} times per count: '\
+                  f'{times_per_count:.2f} ms, '\
+                  f'{fps:.2f} FPS'
+            cls.logger.info(msg)
+
     @classmethod
     @contextmanager
     def activate(cls,
@@ -98,6 +409,7 @@ class TimeCounter:
                  file: Optional[str] = None,
                  logger: Optional[Logger] = None,
                  batch_size: int = 1,
+                 profiler: Optional[Profiler] = None,
                  **kwargs):
         """Activate the time counter.
 
@@ -112,34 +424,34 @@ class TimeCounter:
                 is `None`.
             logger (Logger): The logger for the timer. Default to None.
             batch_size (int): The batch size. Default to 1.
+            profiler (Profiler | None): A profiler to record the counted
+                calls as scopes. Default to None.
         """
         assert warmup >= 1
         if logger is None:
             logger = get_logger('test', log_file=file)
         cls.logger = logger
+        cls.profiler = profiler
         if func_name is not None:
             warnings.warn('func_name must be globally unique if you call '
                           'activate multiple times')
             assert func_name in cls.names, '{} must be registered before '\
                 'setting params'.format(func_name)
-            cls.names[func_name]['warmup'] = warmup
-            cls.names[func_name]['log_interval'] = log_interval
-            cls.names[func_name]['with_sync'] = with_sync
-            cls.names[func_name]['batch_size'] = batch_size
-            cls.names[func_name]['enable'] = True
+            names = [func_name]
         else:
-            for name in cls.names:
-                cls.names[name]['warmup'] = warmup
-                cls.names[name]['log_interval'] = log_interval
-                cls.names[name]['with_sync'] = with_sync
-                cls.names[name]['batch_size'] = batch_size
-                cls.names[name]['enable'] = True
-        yield
-        if func_name is not None:
-            cls.names[func_name]['enable'] = False
-        else:
-            for name in cls.names:
+            names = list(cls.names)
+        for name in names:
+            cls.names[name]['warmup'] = warmup
+            cls.names[name]['log_interval'] = log_interval
+            cls.names[name]['with_sync'] = with_sync
+            cls.names[name]['batch_size'] = batch_size
+            cls.names[name]['enable'] = True
+        try:
+            yield
+        finally:
+            for name in names:
                 cls.names[name]['enable'] = False
+            cls.profiler = None
 
     @classmethod
     def print_stats(cls, name: str):
@@ -151,21 +463,11 @@ class TimeCounter:
         from prettytable import PrettyTable
 
         assert name in cls.names
-        stats = cls.names[name]
-        execute_time = stats['execute_time']
-        latency_mean = 1000 * float(np.mean(execute_time))
-        latency_median = 1000 * float(np.median(execute_time))
-        latency_min = 1000 * float(np.min(execute_time))
-        latency_max = 1000 * float(np.max(execute_time))
-        fps_mean, fps_median = 1000 / latency_mean, 1000 / latency_median
-        fps_min, fps_max = 1000 / latency_min, 1000 / latency_max
+        stats = cls.names[name]['execute_time'].summary()
         results = PrettyTable()
         results.field_names = ['Stats', 'Latency/ms', 'FPS']
-        results.add_rows([
-            ['Mean', latency_mean, fps_mean],
-            ['Median', latency_median, fps_median],
-            ['Min', latency_min, fps_min],
-            ['Max', latency_max, fps_max],
-        ])
+        for key in ['mean', 'p50', 'p90', 'p99', 'min', 'max']:
+            stat_name = 'Median' if key == 'p50' else key.capitalize()
+            results.add_row([stat_name, stats[key], 1000 / stats[key]])
         results.float_format = '.3'
         print(results)
@@ -12,14 +12,17 @@ from google.protobuf import symbol_database as _symbol_database
 _sym_db = _symbol_database.Default()
 
 DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(
-    b'\n\x0finference.proto\x12\x08mmdeploy\"\x91\x01\n\x05Model\x12\x11\n\x04name\x18\x01 \x01(\tH\x00\x88\x01\x01\x12\x0f\n\x07weights\x18\x02 \x01(\x0c\x12+\n\x06\x64\x65vice\x18\x03 \x01(\x0e\x32\x16.mmdeploy.Model.DeviceH\x01\x88\x01\x01\"#\n\x06\x44\x65vice\x12\x07\n\x03\x43PU\x10\x00\x12\x07\n\x03GPU\x10\x01\x12\x07\n\x03\x44SP\x10\x02\x42\x07\n\x05_nameB\t\n\x07_device\"\x07\n\x05\x45mpty\"Q\n\x06Tensor\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x12\n\x05\x64type\x18\x02 \x01(\tH\x00\x88\x01\x01\x12\x0c\n\x04\x64\x61ta\x18\x03 \x01(\x0c\x12\r\n\x05shape\x18\x04 \x03(\x05\x42\x08\n\x06_dtype\",\n\nTensorList\x12\x1e\n\x04\x64\x61ta\x18\x01 \x03(\x0b\x32\x10.mmdeploy.Tensor\"E\n\x05Reply\x12\x0e\n\x06status\x18\x01 \x01(\x05\x12\x0c\n\x04info\x18\x02 \x01(\t\x12\x1e\n\x04\x64\x61ta\x18\x03 \x03(\x0b\x32\x10.mmdeploy.Tensor\"\x16\n\x05Names\x12\r\n\x05names\x18\x01 \x03(\t2\xfb\x01\n\tInference\x12*\n\x04\x45\x63ho\x12\x0f.mmdeploy.Empty\x1a\x0f.mmdeploy.Reply\"\x00\x12*\n\x04Init\x12\x0f.mmdeploy.Model\x1a\x0f.mmdeploy.Reply\"\x00\x12\x31\n\x0bOutputNames\x12\x0f.mmdeploy.Empty\x1a\x0f.mmdeploy.Names\"\x00\x12\x34\n\tInference\x12\x14.mmdeploy.TensorList\x1a\x0f.mmdeploy.Reply\"\x00\x12-\n\x07\x44\x65stroy\x12\x0f.mmdeploy.Empty\x1a\x0f.mmdeploy.Reply\"\x00\x42%\n\rmmdeploy.snpeB\x0bSNPEWrapperP\x01\xa2\x02\x04SNPEb\x06proto3'
+    b'\n\x0finference.proto\x12\x08mmdeploy\"\xad\x01\n\x05Model\x12\x11\n\x04name\x18\x01 \x01(\tH\x00\x88\x01\x01\x12\x0f\n\x07weights\x18\x02 \x01(\x0c\x12+\n\x06\x64\x65vice\x18\x03 \x01(\x0e\x32\x16.mmdeploy.Model.DeviceH\x01\x88\x01\x01\x12\x11\n\x04hash\x18\x04 \x01(\tH\x02\x88\x01\x01\"#\n\x06\x44\x65vice\x12\x07\n\x03\x43PU\x10\x00\x12\x07\n\x03GPU\x10\x01\x12\x07\n\x03\x44SP\x10\x02\x42\x07\n\x05_nameB\t\n\x07_deviceB\x07\n\x05_hash\"\x19\n\tModelInfo\x12\x0c\n\x04hash\x18\x01 \x01(\t\"D\n\nModelChunk\x12\x0c\n\x04hash\x18\x01 \x01(\t\x12\x11\n\x04size\x18\x02 \x01(\x03H\x00\x88\x01\x01\x12\x0c\n\x04\x64\x61ta\x18\x03 \x01(\x0c\x42\x07\n\x05_size\"\x07\n\x05\x45mpty\"q\n\x06Tensor\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x12\n\x05\x64type\x18\x02 \x01(\tH\x00\x88\x01\x01\x12\x0c\n\x04\x64\x61ta\x18\x03 \x01(\x0c\x12\r\n\x05shape\x18\x04 \x03(\x05\x12\x13\n\x06layout\x18\x05 \x01(\tH\x01\x88\x01\x01\x42\x08\n\x06_dtypeB\t\n\x07_layout\"8\n\nTensorList\x12\x1e\n\x04\x64\x61ta\x18\x01 \x03(\x0b\x32\x10.mmdeploy.Tensor\x12\n\n\x02id\x18\x02 \x01(\x03\"Q\n\x05Reply\x12\x0e\n\x06status\x18\x01 \x01(\x05\x12\x0c\n\x04info\x18\x02 \x01(\t\x12\x1e\n\x04\x64\x61ta\x18\x03 \x03(\x0b\x32\x10.mmdeploy.Tensor\x12\n\n\x02id\x18\x04 \x01(\x03\"0\n\rServiceConfig\x12\x0f\n\x07layouts\x18\x01 \x03(\t\x12\x0e\n\x06stream\x18\x02 \x01(\x08\"\x16\n\x05Names\x12\r\n\x05names\x18\x01 \x03(\t2\xdf\x03\n\tInference\x12*\n\x04\x45\x63ho\x12\x0f.mmdeploy.Empty\x1a\x0f.mmdeploy.Reply\"\x00\x12*\n\x04Init\x12\x0f.mmdeploy.Model\x1a\x0f.mmdeploy.Reply\"\x00\x12\x32\n\x08HasModel\x12\x13.mmdeploy.ModelInfo\x1a\x0f.mmdeploy.Reply\"\x00\x12\x38\n\x0bUploadModel\x12\x14.mmdeploy.ModelChunk\x1a\x0f.mmdeploy.Reply\"\x00(\x01\x12\x31\n\x0bOutputNames\x12\x0f.mmdeploy.Empty\x1a\x0f.mmdeploy.Names\"\x00\x12\x34\n\tInference\x12\x14.mmdeploy.TensorList\x1a\x0f.mmdeploy.Reply\"\x00\x12\x34\n\x06\x43onfig\x12\x0f.mmdeploy.Empty\x1a\x17.mmdeploy.ServiceConfig\"\x00\x12>\n\x0fStreamInference\x12\x14.mmdeploy.TensorList\x1a\x0f.mmdeploy.Reply\"\x00(\x01\x30\x01\x12-\n\x07\x44\x65stroy\x12\x0f.mmdeploy.Empty\x1a\x0f.mmdeploy.Reply\"\x00\x42%\n\rmmdeploy.snpeB\x0bSNPEWrapperP\x01\xa2\x02\x04SNPEb\x06proto3'
 )
 
 _MODEL = DESCRIPTOR.message_types_by_name['Model']
+_MODELINFO = DESCRIPTOR.message_types_by_name['ModelInfo']
+_MODELCHUNK = DESCRIPTOR.message_types_by_name['ModelChunk']
 _EMPTY = DESCRIPTOR.message_types_by_name['Empty']
 _TENSOR = DESCRIPTOR.message_types_by_name['Tensor']
 _TENSORLIST = DESCRIPTOR.message_types_by_name['TensorList']
 _REPLY = DESCRIPTOR.message_types_by_name['Reply']
+_SERVICECONFIG = DESCRIPTOR.message_types_by_name['ServiceConfig']
 _NAMES = DESCRIPTOR.message_types_by_name['Names']
 _MODEL_DEVICE = _MODEL.enum_types_by_name['Device']
 Model = _reflection.GeneratedProtocolMessageType(
@@ -32,6 +35,26 @@ Model = _reflection.GeneratedProtocolMessageType(
     })
 _sym_db.RegisterMessage(Model)
 
+ModelInfo = _reflection.GeneratedProtocolMessageType(
+    'ModelInfo',
+    (_message.Message, ),
+    {
+        'DESCRIPTOR': _MODELINFO,
+        '__module__': 'inference_pb2'
+        # @@protoc_insertion_point(class_scope:mmdeploy.ModelInfo)
+    })
+_sym_db.RegisterMessage(ModelInfo)
+
+ModelChunk = _reflection.GeneratedProtocolMessageType(
+    'ModelChunk',
+    (_message.Message, ),
+    {
+        'DESCRIPTOR': _MODELCHUNK,
+        '__module__': 'inference_pb2'
+        # @@protoc_insertion_point(class_scope:mmdeploy.ModelChunk)
+    })
+_sym_db.RegisterMessage(ModelChunk)
+
 Empty = _reflection.GeneratedProtocolMessageType(
     'Empty',
     (_message.Message, ),
@@ -72,6 +95,16 @@ Reply = _reflection.GeneratedProtocolMessageType(
     })
 _sym_db.RegisterMessage(Reply)
 
+ServiceConfig = _reflection.GeneratedProtocolMessageType(
+    'ServiceConfig',
+    (_message.Message, ),
+    {
+        'DESCRIPTOR': _SERVICECONFIG,
+        '__module__': 'inference_pb2'
+        # @@protoc_insertion_point(class_scope:mmdeploy.ServiceConfig)
+    })
+_sym_db.RegisterMessage(ServiceConfig)
+
 Names = _reflection.GeneratedProtocolMessageType(
     'Names',
     (_message.Message, ),
@@ -88,19 +121,25 @@ if _descriptor._USE_C_DESCRIPTORS == False:
     DESCRIPTOR._options = None
     DESCRIPTOR._serialized_options = b'\n\rmmdeploy.snpeB\013SNPEWrapperP\001\242\002\004SNPE'
     _MODEL._serialized_start = 30
-    _MODEL._serialized_end = 175
-    _MODEL_DEVICE._serialized_start = 120
-    _MODEL_DEVICE._serialized_end = 155
-    _EMPTY._serialized_start = 177
-    _EMPTY._serialized_end = 184
-    _TENSOR._serialized_start = 186
-    _TENSOR._serialized_end = 267
-    _TENSORLIST._serialized_start = 269
-    _TENSORLIST._serialized_end = 313
-    _REPLY._serialized_start = 315
-    _REPLY._serialized_end = 384
-    _NAMES._serialized_start = 386
-    _NAMES._serialized_end = 408
-    _INFERENCE._serialized_start = 411
-    _INFERENCE._serialized_end = 662
+    _MODEL._serialized_end = 203
+    _MODEL_DEVICE._serialized_start = 139
+    _MODEL_DEVICE._serialized_end = 174
+    _MODELINFO._serialized_start = 205
+    _MODELINFO._serialized_end = 230
+    _MODELCHUNK._serialized_start = 232
+    _MODELCHUNK._serialized_end = 300
+    _EMPTY._serialized_start = 302
+    _EMPTY._serialized_end = 309
+    _TENSOR._serialized_start = 311
+    _TENSOR._serialized_end = 424
+    _TENSORLIST._serialized_start = 426
+    _TENSORLIST._serialized_end = 482
+    _REPLY._serialized_start = 484
+    _REPLY._serialized_end = 565
+    _SERVICECONFIG._serialized_start = 567
+    _SERVICECONFIG._serialized_end = 615
+    _NAMES._serialized_start = 617
+    _NAMES._serialized_end = 639
+    _INFERENCE._serialized_start = 642
+    _INFERENCE._serialized_end = 1121
 # @@protoc_insertion_point(module_scope)
@@ -25,6 +25,16 @@ class InferenceStub(object):
             request_serializer=inference__pb2.Model.SerializeToString,
             response_deserializer=inference__pb2.Reply.FromString,
         )
+        self.HasModel = channel.unary_unary(
+            '/mmdeploy.Inference/HasModel',
+            request_serializer=inference__pb2.ModelInfo.SerializeToString,
+            response_deserializer=inference__pb2.Reply.FromString,
+        )
+        self.UploadModel = channel.stream_unary(
+            '/mmdeploy.Inference/UploadModel',
+            request_serializer=inference__pb2.ModelChunk.SerializeToString,
+            response_deserializer=inference__pb2.Reply.FromString,
+        )
         self.OutputNames = channel.unary_unary(
             '/mmdeploy.Inference/OutputNames',
             request_serializer=inference__pb2.Empty.SerializeToString,
@@ -35,6 +45,16 @@ class InferenceStub(object):
             request_serializer=inference__pb2.TensorList.SerializeToString,
             response_deserializer=inference__pb2.Reply.FromString,
         )
+        self.Config = channel.unary_unary(
+            '/mmdeploy.Inference/Config',
+            request_serializer=inference__pb2.Empty.SerializeToString,
+            response_deserializer=inference__pb2.ServiceConfig.FromString,
+        )
+        self.StreamInference = channel.stream_stream(
+            '/mmdeploy.Inference/StreamInference',
+            request_serializer=inference__pb2.TensorList.SerializeToString,
+            response_deserializer=inference__pb2.Reply.FromString,
+        )
         self.Destroy = channel.unary_unary(
             '/mmdeploy.Inference/Destroy',
             request_serializer=inference__pb2.Empty.SerializeToString,
@@ -57,6 +77,18 @@ class InferenceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def HasModel(self, request, context):
+        """Check whether the model file with the hash is cached."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def UploadModel(self, request_iterator, context):
+        """Upload model file in chunks, the file is cached by its hash."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def OutputNames(self, request, context):
         """Get output names."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -69,6 +101,19 @@ class InferenceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def Config(self, request, context):
+        """Get the features supported by the service."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StreamInference(self, request_iterator, context):
+        """Inference with pipelined inputs, the replies are matched by request
+        id."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def Destroy(self, request, context):
         """Destroy handle."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -90,6 +135,18 @@ def add_InferenceServicer_to_server(servicer, server):
             request_deserializer=inference__pb2.Model.FromString,
             response_serializer=inference__pb2.Reply.SerializeToString,
         ),
+        'HasModel':
+        grpc.unary_unary_rpc_method_handler(
+            servicer.HasModel,
+            request_deserializer=inference__pb2.ModelInfo.FromString,
+            response_serializer=inference__pb2.Reply.SerializeToString,
+        ),
+        'UploadModel':
+        grpc.stream_unary_rpc_method_handler(
+            servicer.UploadModel,
+            request_deserializer=inference__pb2.ModelChunk.FromString,
+            response_serializer=inference__pb2.Reply.SerializeToString,
+        ),
         'OutputNames':
         grpc.unary_unary_rpc_method_handler(
             servicer.OutputNames,
@@ -102,6 +159,18 @@ def add_InferenceServicer_to_server(servicer, server):
             request_deserializer=inference__pb2.TensorList.FromString,
             response_serializer=inference__pb2.Reply.SerializeToString,
         ),
+        'Config':
+        grpc.unary_unary_rpc_method_handler(
+            servicer.Config,
+            request_deserializer=inference__pb2.Empty.FromString,
+            response_serializer=inference__pb2.ServiceConfig.SerializeToString,
+        ),
+        'StreamInference':
+        grpc.stream_stream_rpc_method_handler(
+            servicer.StreamInference,
+            request_deserializer=inference__pb2.TensorList.FromString,
+            response_serializer=inference__pb2.Reply.SerializeToString,
+        ),
         'Destroy':
         grpc.unary_unary_rpc_method_handler(
             servicer.Destroy,
@@ -154,6 +223,42 @@ class Inference(object):
             insecure, call_credentials, compression, wait_for_ready, timeout,
             metadata)
 
+    @staticmethod
+    def HasModel(request,
+                 target,
+                 options=(),
+                 channel_credentials=None,
+                 call_credentials=None,
+                 insecure=False,
+                 compression=None,
+                 wait_for_ready=None,
+                 timeout=None,
+                 metadata=None):
+        return grpc.experimental.unary_unary(
+            request, target, '/mmdeploy.Inference/HasModel',
+            inference__pb2.ModelInfo.SerializeToString,
+            inference__pb2.Reply.FromString, options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout,
+            metadata)
+
+    @staticmethod
+    def UploadModel(request_iterator,
+                    target,
+                    options=(),
+                    channel_credentials=None,
+                    call_credentials=None,
+                    insecure=False,
+                    compression=None,
+                    wait_for_ready=None,
+                    timeout=None,
+                    metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator, target, '/mmdeploy.Inference/UploadModel',
+            inference__pb2.ModelChunk.SerializeToString,
+            inference__pb2.Reply.FromString, options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout,
+            metadata)
+
     @staticmethod
     def OutputNames(request,
                     target,
@@ -190,6 +295,42 @@ class Inference(object):
             insecure, call_credentials, compression, wait_for_ready, timeout,
             metadata)
 
+    @staticmethod
+    def Config(request,
+               target,
+               options=(),
+               channel_credentials=None,
+               call_credentials=None,
+               insecure=False,
+               compression=None,
+               wait_for_ready=None,
+               timeout=None,
+               metadata=None):
+        return grpc.experimental.unary_unary(
+            request, target, '/mmdeploy.Inference/Config',
+            inference__pb2.Empty.SerializeToString,
+            inference__pb2.ServiceConfig.FromString, options,
+            channel_credentials, insecure, call_credentials, compression,
+            wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def StreamInference(request_iterator,
+                        target,
+                        options=(),
+                        channel_credentials=None,
+                        call_credentials=None,
+                        insecure=False,
+                        compression=None,
+                        wait_for_ready=None,
+                        timeout=None,
+                        metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator, target, '/mmdeploy.Inference/StreamInference',
+            inference__pb2.TensorList.SerializeToString,
+            inference__pb2.Reply.FromString, options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout,
+            metadata)
+
     @staticmethod
     def Destroy(request,
                 target,
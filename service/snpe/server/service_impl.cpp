@@ -2,7 +2,12 @@
 
 #include "service_impl.h"
 
+#include <sys/stat.h>
+
 #include <algorithm>
+#include <atomic>
+#include <cctype>
+#include <cstdio>
 #include <cstdlib>
 #include <cstring>
 #include <fstream>
@@ -13,6 +18,7 @@
 #include <vector>
 
 #include "scope_timer.h"
+#include "sha256.h"
 #include "text_table.h"
 
 zdl::DlSystem::Runtime_t InferenceServiceImpl::CheckRuntime(zdl::DlSystem::Runtime_t runtime,
@@ -69,6 +75,17 @@ void InferenceServiceImpl::SaveDLC(const ::mmdeploy::Model* request, const std::
   fout.close();
 }
 
+bool InferenceServiceImpl::IsValidHash(const std::string& hash) {
+  // sha256 in hex, which is also safe as a file name
+  return hash.size() == 64 && std::all_of(hash.begin(), hash.end(), ::isxdigit);
+}
+
+std::string InferenceServiceImpl::ModelCachePath(const std::string& hash) {
+  static std::string CacheDir = "./models/";
+  mkdir(CacheDir.c_str(), 0755);
+  return CacheDir + hash + ".dlc";
+}
+
 void InferenceServiceImpl::LoadFloatData(const std::string& data, std::vector<float>& vec) {
   size_t len = data.size();
   assert(len % sizeof(float) == 0);
@@ -85,6 +102,87 @@ void InferenceServiceImpl::LoadFloatData(const std::string& data, std::vector<fl
   return Status::OK;
 }
 
+::grpc::Status InferenceServiceImpl::HasModel(::grpc::ServerContext* context,
+                                              const ::mmdeploy::ModelInfo* request,
+                                              ::mmdeploy::Reply* response) {
+  struct stat st;
+  if (IsValidHash(request->hash()) && stat(ModelCachePath(request->hash()).c_str(), &st) == 0) {
+    response->set_status(0);
+    response->set_info("Stage HasModel: model cached");
+  } else {
+    response->set_status(1);
+    response->set_info("Stage HasModel: model not found");
+  }
+  return Status::OK;
+}
+
+::grpc::Status InferenceServiceImpl::UploadModel(
+    ::grpc::ServerContext* context, ::grpc::ServerReader<::mmdeploy::ModelChunk>* reader,
+    ::mmdeploy::Reply* response) {
+  static std::atomic<uint64_t> upload_count{0};
+  ::mmdeploy::ModelChunk chunk;
+  std::string filename, tmp_filename, hash;
+  int64_t size = -1;
+  int64_t received = 0;
+  SHA256 sha256;
+  std::ofstream fout;
+
+  while (reader->Read(&chunk)) {
+    if (!fout.is_open()) {
+      // the first chunk holds the hash and the size of the model file
+      if (!IsValidHash(chunk.hash())) {
+        response->set_status(-1);
+        response->set_info("Stage UploadModel: invalid model hash");
+        return Status::OK;
+      }
+      hash = chunk.hash();
+      std::transform(hash.begin(), hash.end(), hash.begin(), ::tolower);
+      filename = ModelCachePath(chunk.hash());
+      size = chunk.has_size() ? chunk.size() : -1;
+      // the concurrent uploads of the same model write their own files
+      tmp_filename = filename + "." + std::to_string(upload_count++) + ".tmp";
+      fout.open(tmp_filename, std::ios::binary | std::ios::out | std::ios::trunc);
+    }
+    fout.write(chunk.data().data(), chunk.data().size());
+    sha256.Update(chunk.data().data(), chunk.data().size());
+    received += chunk.data().size();
+  }
+
+  if (!fout.is_open()) {
+    response->set_status(-1);
+    response->set_info("Stage UploadModel: empty model file");
+    return Status::OK;
+  }
+  fout.close();
+
+  // keep the cache intact if the upload is broken
+  if (!fout) {
+    std::remove(tmp_filename.c_str());
+    response->set_status(-1);
+    response->set_info("Stage UploadModel: write model file failed");
+    return Status::OK;
+  }
+  if (size >= 0 && received != size) {
+    std::remove(tmp_filename.c_str());
+    response->set_status(-1);
+    response->set_info("Stage UploadModel: model file size not match");
+    return Status::OK;
+  }
+  if (sha256.HexDigest() != hash) {
+    std::remove(tmp_filename.c_str());
+    response->set_status(-1);
+    response->set_info("Stage UploadModel: model file hash not match");
+    return Status::OK;
+  }
+  // the rename is atomic, the cached file is always complete
+  std::rename(tmp_filename.c_str(), filename.c_str());
+  fprintf(stdout, "Stage UploadModel: saved model file to %s\n", filename.c_str());
+
+  response->set_status(0);
+  response->set_info("Stage UploadModel: success");
+  return Status::OK;
+}
+
 // Logic and data behind the server's behavior.
 ::grpc::Status InferenceServiceImpl::Init(::grpc::ServerContext* context,
                                           const ::mmdeploy::Model* request,
@@ -99,9 +197,19 @@ void InferenceServiceImpl::LoadFloatData(const std::string& data, std::vector<fl
     container.reset();
   }
 
-  auto model = request->weights();
-  container =
-      zdl::DlContainer::IDlContainer::open(reinterpret_cast<uint8_t*>(model.data()), model.size());
+  if (request->weights().empty() && request->has_hash()) {
+    // load the model file cached by UploadModel
+    if (!IsValidHash(request->hash())) {
+      response->set_status(-1);
+      response->set_info("Stage Init: invalid model hash");
+      return Status::OK;
+    }
+    container = zdl::DlContainer::IDlContainer::open(ModelCachePath(request->hash()));
+  } else {
+    auto model = request->weights();
+    container = zdl::DlContainer::IDlContainer::open(reinterpret_cast<uint8_t*>(model.data()),
+                                                     model.size());
+  }
   if (container == nullptr) {
     fprintf(stdout, "Stage Init: load dlc failed.\n");
 
@@ -346,6 +454,31 @@ std::string InferenceServiceImpl::ShapeStr(zdl::DlSystem::ITensor* pTensor) {
   return Status::OK;
 }
 
+::grpc::Status InferenceServiceImpl::Config(::grpc::ServerContext* context,
+                                            const ::mmdeploy::Empty* request,
+                                            ::mmdeploy::ServiceConfig* response) {
+  // snpe input layout is NHWC
+  response->add_layouts("NHWC");
+  response->set_stream(true);
+  return Status::OK;
+}
+
+::grpc::Status InferenceServiceImpl::StreamInference(
+    ::grpc::ServerContext* context,
+    ::grpc::ServerReaderWriter<::mmdeploy::Reply, ::mmdeploy::TensorList>* stream) {
+  // the next request is received by grpc while the current one is executed
+  ::mmdeploy::TensorList request;
+  while (stream->Read(&request)) {
+    ::mmdeploy::Reply response;
+    Inference(context, &request, &response);
+    response.set_id(request.id());
+    if (!stream->Write(response)) {
+      break;
+    }
+  }
+  return Status::OK;
+}
+
 ::grpc::Status InferenceServiceImpl::Destroy(::grpc::ServerContext* context,
                                              const ::mmdeploy::Empty* request,
                                              ::mmdeploy::Reply* response) {
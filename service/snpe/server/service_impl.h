@@ -33,7 +33,10 @@ using grpc::Status;
 using mmdeploy::Empty;
 using mmdeploy::Inference;
 using mmdeploy::Model;
+using mmdeploy::ModelChunk;
+using mmdeploy::ModelInfo;
 using mmdeploy::Reply;
+using mmdeploy::ServiceConfig;
 using mmdeploy::Tensor;
 using mmdeploy::TensorList;
 
@@ -45,18 +48,36 @@ class InferenceServiceImpl final : public Inference::Service {
   // Init Model with model file
   ::grpc::Status Init(::grpc::ServerContext* context, const ::mmdeploy::Model* request,
                       ::mmdeploy::Reply* response) override;
+  // Check whether the model file with the hash is cached
+  ::grpc::Status HasModel(::grpc::ServerContext* context, const ::mmdeploy::ModelInfo* request,
+                          ::mmdeploy::Reply* response) override;
+  // Upload model file in chunks, the file is cached by its hash
+  ::grpc::Status UploadModel(::grpc::ServerContext* context,
+                             ::grpc::ServerReader<::mmdeploy::ModelChunk>* reader,
+                             ::mmdeploy::Reply* response) override;
   // Get output names
   ::grpc::Status OutputNames(::grpc::ServerContext* context, const ::mmdeploy::Empty* request,
                              ::mmdeploy::Names* response) override;
   // Inference with inputs
   ::grpc::Status Inference(::grpc::ServerContext* context, const ::mmdeploy::TensorList* request,
                            ::mmdeploy::Reply* response) override;
+  // Get the input layouts and features supported by the service
+  ::grpc::Status Config(::grpc::ServerContext* context, const ::mmdeploy::Empty* request,
+                        ::mmdeploy::ServiceConfig* response) override;
+  // Inference with the inputs in a stream, each reply carries the id of its request
+  ::grpc::Status StreamInference(
+      ::grpc::ServerContext* context,
+      ::grpc::ServerReaderWriter<::mmdeploy::Reply, ::mmdeploy::TensorList>* stream) override;
   // Destroy handle
   ::grpc::Status Destroy(::grpc::ServerContext* context, const ::mmdeploy::Empty* request,
                          ::mmdeploy::Reply* response) override;
 
   void SaveDLC(const ::mmdeploy::Model* request, const std::string& name);
 
+  bool IsValidHash(const std::string& hash);
+
+  std::string ModelCachePath(const std::string& hash);
+
   void LoadFloatData(const std::string& data, std::vector<float>& vec);
 
   zdl::DlSystem::Runtime_t CheckRuntime(zdl::DlSystem::Runtime_t runtime, bool& staticQuantization);
@@ -0,0 +1,72 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import os
+import os.path as osp
+
+from mmengine import Config
+
+from mmdeploy.apis.core import ArtifactCache
+from mmdeploy.apis.core.cache import get_device_info, get_export_config
+
+
+def test_artifact_cache(tmp_path):
+    cache = ArtifactCache(str(tmp_path / 'cache'))
+    work_dir = str(tmp_path / 'work_dir')
+    os.makedirs(work_dir)
+    input_file = osp.join(work_dir, 'input.onnx')
+    with open(input_file, 'wb') as f:
+        f.write(b'input')
+
+    key = cache.get_key('extract_model', files=[input_file], start='a')
+    assert key == cache.get_key('extract_model', files=[input_file], start='a')
+    assert key != cache.get_key('extract_model', files=[input_file], start='b')
+    assert cache.fetch(key, work_dir) is None
+
+    output_file = osp.join(work_dir, 'output.onnx')
+    with open(output_file, 'wb') as f:
+        f.write(b'output')
+    cache.store(key, [output_file], work_dir)
+    os.remove(output_file)
+
+    files = cache.fetch(key, work_dir)
+    assert files == [output_file]
+    with open(output_file, 'rb') as f:
+        assert f.read() == b'output'
+
+    # the key follows the content of the input files
+    with open(input_file, 'wb') as f:
+        f.write(b'changed input')
+    assert key != cache.get_key('extract_model', files=[input_file], start='a')
+
+
+def test_get_export_config():
+    fp16_cfg = Config(
+        dict(
+            onnx_config=dict(type='onnx'),
+            backend_config=dict(
+                type='tensorrt',
+                common_config=dict(fp16_mode=True, max_workspace_size=1 << 30),
+                model_inputs=[dict(input_shapes=dict())])))
+    int8_cfg = fp16_cfg.copy()
+    int8_cfg.merge_from_dict(
+        dict(
+            backend_config=dict(common_config=dict(int8_mode=True)),
+            calib_config=dict(create_calib=True)))
+    assert get_export_config(fp16_cfg) == get_export_config(int8_cfg)
+
+    ort_cfg = Config(
+        dict(
+            onnx_config=dict(type='onnx'),
+            backend_config=dict(type='onnxruntime')))
+    assert get_export_config(fp16_cfg) != get_export_config(ort_cfg)
+
+
+def test_get_device_info(monkeypatch):
+    import torch
+    assert get_device_info('cpu') == dict(device='cpu')
+
+    # the same index on different GPUs
+    monkeypatch.setattr(torch.cuda, 'is_available', lambda: True)
+    monkeypatch.setattr(torch.cuda, 'get_device_name', lambda _: 'GPU A')
+    monkeypatch.setattr(torch.cuda, 'get_device_capability', lambda _: (8, 6))
+    assert get_device_info('cuda:0') == dict(
+        device='cuda:0', name='GPU A', capability='8.6')
@@ -233,3 +233,22 @@ def test_create_calib_parittion():
         p.start()
     finally:
         p.join()
+
+
+def test_calib_data_writer():
+    import h5py
+    import numpy as np
+
+    from mmdeploy.apis.utils.calibration import CalibDataWriter
+
+    with h5py.File(calib_file, mode='w') as file:
+        writer = CalibDataWriter(file, compression='lzf', batch_size=3)
+        for i in range(5):
+            writer.write('end2end', 'input', i, np.full((1, 3, 4, 4), i))
+        writer.close()
+
+    with h5py.File(calib_file, mode='r') as file:
+        input_group = file['calib_data']['end2end']['input']
+        assert len(input_group) == 5
+        assert input_group['4'].compression == 'lzf'
+        assert (input_group['4'][...] == 4).all()
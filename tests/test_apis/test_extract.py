@@ -1,11 +1,14 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+import os
+import os.path as osp
 import tempfile
 
 import onnx
 import torch
 
-from mmdeploy.apis.onnx import extract_partition
+from mmdeploy.apis.onnx import extract_partition, extract_partitions
 from mmdeploy.core import mark
+from mmdeploy.utils import save_onnx
 
 output_file = tempfile.NamedTemporaryFile(suffix='.onnx').name
 
@@ -39,3 +42,125 @@ def test_extract():
     assert extracted.graph.input[1].name == 'y'
     assert extracted.graph.output[0].name == 'z'
     assert extracted.graph.node[0].op_type == 'Add'
+
+
+def test_extract_partitions(tmp_path):
+
+    @mark('add', outputs='z')
+    def add(x, y):
+        return torch.add(x, y)
+
+    @mark('mul', inputs='w', outputs='v')
+    def mul(w):
+        return w * 2
+
+    class TestModel(torch.nn.Module):
+
+        def forward(self, x, y):
+            return mul(add(x, y))
+
+    model = TestModel().eval()
+    x = torch.rand(2, 3, 4)
+    y = torch.rand(2, 3, 4)
+    model_file = str(tmp_path / 'model.onnx')
+    torch.onnx.export(model, (x, y), model_file)
+
+    partition_cfgs = [
+        dict(
+            start='add:input',
+            end='add:output',
+            save_file=str(tmp_path / 'add.onnx')),
+        dict(
+            start='mul:input',
+            end='mul:output',
+            dynamic_axes=dict(w={0: 'batch'}),
+            save_file=str(tmp_path / 'mul.onnx'))
+    ]
+    extracted = extract_partitions(model_file, partition_cfgs)
+
+    assert [x.name for x in extracted[0].graph.input] == ['x', 'y']
+    assert [x.name for x in extracted[0].graph.output] == ['z']
+    assert [x.name for x in extracted[1].graph.input] == ['w']
+    assert [x.name for x in extracted[1].graph.output] == ['v']
+    assert extracted[1].graph.node[-1].op_type == 'Mul'
+    assert extracted[1].graph.input[0].type.tensor_type.shape.dim[
+        0].dim_param == 'batch'
+    for cfg, model in zip(partition_cfgs, extracted):
+        assert onnx.load(cfg['save_file']) == model
+
+
+def test_extract_partition_cross_type_markers(tmp_path):
+
+    @mark('add', outputs='z')
+    def add(x, y):
+        return torch.add(x, y)
+
+    @mark('mul', inputs='w', outputs='v')
+    def mul(w):
+        return w * 2
+
+    class TestModel(torch.nn.Module):
+
+        def forward(self, x, y):
+            return mul(add(x, y))
+
+    model = TestModel().eval()
+    x = torch.rand(2, 3, 4)
+    y = torch.rand(2, 3, 4)
+    model_file = str(tmp_path / 'model.onnx')
+    torch.onnx.export(model, (x, y), model_file)
+
+    # the end marker of type input ends the partition at the mark output
+    extracted = extract_partition(model_file, 'add:input', 'mul:input')
+    assert [x.name for x in extracted.graph.input] == ['x', 'y']
+    assert [x.name for x in extracted.graph.output] == ['w']
+    assert [node.op_type for node in extracted.graph.node] == ['Add']
+
+    # the start marker of type output starts the partition at the mark input
+    extracted = extract_partition(model_file, 'add:output', 'mul:output')
+    assert [x.name for x in extracted.graph.input] == ['z']
+    assert [x.name for x in extracted.graph.output] == ['v']
+    assert 'Mul' in [node.op_type for node in extracted.graph.node]
+
+
+def test_extract_partitions_external_data(tmp_path):
+    conv = torch.nn.Conv2d(8, 8, 3)
+
+    @mark('head', inputs='feat', outputs='out')
+    def head(x):
+        return conv(x)
+
+    class TestModel(torch.nn.Module):
+
+        def __init__(self):
+            super().__init__()
+            self.backbone = torch.nn.Conv2d(3, 8, 3)
+            self.conv = conv
+
+        def forward(self, x):
+            return head(self.backbone(x))
+
+    model = TestModel().eval()
+    model_file = str(tmp_path / 'model.onnx')
+    torch.onnx.export(model, torch.rand(1, 3, 8, 8), model_file)
+    save_onnx(onnx.load(model_file), model_file, save_as_external_data=True)
+
+    # the weights are loaded from the external data of the model
+    save_file = str(tmp_path / 'sub' / 'head.onnx')
+    os.makedirs(osp.dirname(save_file))
+    extract_partition(
+        model_file, 'head:input', 'head:output', save_file=save_file)
+    extracted = onnx.load(save_file)
+    assert [x.name for x in extracted.graph.input] == ['feat']
+    assert [x.name for x in extracted.graph.output] == ['out']
+    assert len(extracted.graph.initializer) == 2
+    for tensor in extracted.graph.initializer:
+        assert len(tensor.raw_data) > 0
+
+    # the returned models hold the weights without save_file
+    extracted_models = extract_partitions(
+        model_file, [dict(start='head:input', end='head:output')] * 2)
+    for extracted in extracted_models:
+        assert len(extracted.graph.initializer) == 2
+        for tensor in extracted.graph.initializer:
+            assert len(tensor.raw_data) > 0
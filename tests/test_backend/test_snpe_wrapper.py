@@ -0,0 +1,262 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import hashlib
+import importlib
+import os.path as osp
+import queue
+import random
+import sys
+import threading
+import time
+from concurrent import futures
+
+import numpy as np
+import pytest
+import torch
+
+grpc = pytest.importorskip('grpc')
+sys.path.insert(
+    0,
+    osp.join(
+        osp.dirname(osp.dirname(osp.dirname(osp.abspath(__file__)))),
+        'service', 'snpe', 'client'))
+inference_pb2 = importlib.import_module('inference_pb2')
+inference_pb2_grpc = importlib.import_module('inference_pb2_grpc')
+
+
+class InferenceServicer(inference_pb2_grpc.InferenceServicer):
+    """A local stand-in of the snpe inference service, which caches the
+    uploaded model files and echoes the inputs as outputs."""
+
+    def __init__(self):
+        self.models = dict()
+        self.num_uploads = 0
+        self.model = None
+        self.shapes = []
+        self.lock = threading.Lock()
+        self.num_in_flight = 0
+        self.max_in_flight = 0
+
+    def Echo(self, request, context):
+        return inference_pb2.Reply(info='echo')
+
+    def Init(self, request, context):
+        if request.weights:
+            self.model = request.weights
+        elif request.hash in self.models:
+            self.model = self.models[request.hash]
+        else:
+            return inference_pb2.Reply(status=-1, info='model not found')
+        return inference_pb2.Reply(status=0)
+
+    def HasModel(self, request, context):
+        return inference_pb2.Reply(
+            status=0 if request.hash in self.models else 1)
+
+    def UploadModel(self, request_iterator, context):
+        self.num_uploads += 1
+        chunks = list(request_iterator)
+        data = b''.join(chunk.data for chunk in chunks)
+        file_hash, size = chunks[0].hash, chunks[0].size
+        if len(data) != size or hashlib.sha256(data).hexdigest() != file_hash:
+            return inference_pb2.Reply(status=-1, info='broken model file')
+        self.models[file_hash] = data
+        return inference_pb2.Reply(status=0)
+
+    def OutputNames(self, request, context):
+        return inference_pb2.Names(names=['output'])
+
+    def Inference(self, request, context):
+        self.shapes += [list(tensor.shape) for tensor in request.data]
+        outputs = [
+            inference_pb2.Tensor(
+                name='output',
+                dtype=tensor.dtype,
+                data=tensor.data,
+                shape=tensor.shape,
+                layout=tensor.layout) for tensor in request.data
+        ]
+        return inference_pb2.Reply(status=0, data=outputs, id=request.id)
+
+    def Config(self, request, context):
+        return inference_pb2.ServiceConfig(
+            layouts=['NCHW', 'NHWC'], stream=True)
+
+    def StreamInference(self, request_iterator, context):
+        replies = queue.Queue()
+
+        def run(request):
+            # reply out of order
+            time.sleep(random.random() * 0.01)
+            reply = self.Inference(request, context)
+            with self.lock:
+                self.num_in_flight -= 1
+            replies.put(reply)
+
+        def receive():
+            try:
+                with futures.ThreadPoolExecutor(max_workers=4) as executor:
+                    for request in request_iterator:
+                        with self.lock:
+                            self.num_in_flight += 1
+                            self.max_in_flight = max(self.max_in_flight,
+                                                     self.num_in_flight)
+                        executor.submit(run, request)
+            except grpc.RpcError:
+                # the stream is cancelled by the client
+                pass
+            finally:
+                replies.put(None)
+
+        threading.Thread(target=receive, daemon=True).start()
+        yield from iter(replies.get, None)
+
+    def Destroy(self, request, context):
+        self.model = None
+        return inference_pb2.Reply(status=0)
+
+
+class LegacyInferenceServicer(InferenceServicer):
+    """A stand-in of the service without model cache and streaming."""
+    HasModel = inference_pb2_grpc.InferenceServicer.HasModel
+    UploadModel = inference_pb2_grpc.InferenceServicer.UploadModel
+    Config = inference_pb2_grpc.InferenceServicer.Config
+    StreamInference = inference_pb2_grpc.InferenceServicer.StreamInference
+
+
+def _start_server(servicer):
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+    inference_pb2_grpc.add_InferenceServicer_to_server(servicer, server)
+    port = server.add_insecure_port('localhost:0')
+    server.start()
+    return server, f'localhost:{port}'
+
+
+@pytest.fixture
+def dlc_file(tmp_path):
+    dlc_file = str(tmp_path / 'end2end.dlc')
+    with open(dlc_file, 'wb') as f:
+        f.write(np.random.bytes(3 << 20 | 123))
+    return dlc_file
+
+
+def test_snpe_wrapper_upload(dlc_file):
+    from mmdeploy.backend.snpe.wrapper import SNPEWrapper
+    servicer = InferenceServicer()
+    server, uri = _start_server(servicer)
+    try:
+        wrapper = SNPEWrapper(dlc_file, uri, chunk_size=1 << 20)
+        with open(dlc_file, 'rb') as f:
+            assert servicer.model == f.read()
+        assert servicer.num_uploads == 1
+        assert wrapper.output_names == ['output']
+
+        inputs = torch.rand(1, 3, 8, 8)
+        outputs = wrapper({'input': inputs})
+        torch.testing.assert_close(outputs['output'], inputs)
+
+        # the cached model is not uploaded again
+        SNPEWrapper(dlc_file, uri)
+        assert servicer.num_uploads == 1
+    finally:
+        server.stop(None)
+
+
+def test_snpe_wrapper_legacy_service(dlc_file):
+    from mmdeploy.backend.snpe.wrapper import SNPEWrapper
+    servicer = LegacyInferenceServicer()
+    server, uri = _start_server(servicer)
+    try:
+        wrapper = SNPEWrapper(dlc_file, uri)
+        with open(dlc_file, 'rb') as f:
+            assert servicer.model == f.read()
+        assert servicer.num_uploads == 0
+
+        # inputs are sent in NHWC with unary calls
+        inputs = torch.rand(1, 3, 8, 6)
+        outputs = wrapper.forward_async({'input': inputs}).result()
+        torch.testing.assert_close(outputs['output'], inputs)
+        assert servicer.shapes == [[1, 8, 6, 3]]
+    finally:
+        server.stop(None)
+
+
+def test_snpe_wrapper_forward_async(dlc_file):
+    from mmdeploy.backend.snpe.wrapper import SNPEWrapper
+    servicer = InferenceServicer()
+    server, uri = _start_server(servicer)
+    try:
+        wrapper = SNPEWrapper(dlc_file, uri, max_in_flight=3)
+        inputs = [torch.rand(1, 3, 8, 6) for _ in range(16)]
+        results = [wrapper.forward_async({'input': x}) for x in inputs]
+        for x, result in zip(inputs, results):
+            torch.testing.assert_close(result.result()['output'], x)
+        outputs = wrapper({'input': inputs[0]})
+        torch.testing.assert_close(outputs['output'], inputs[0])
+
+        # inputs are sent in NCHW without permutes
+        assert servicer.shapes == [[1, 3, 8, 6]] * 17
+        assert 1 < servicer.max_in_flight <= 3
+    finally:
+        server.stop(None)
+
+
+class BrokenReplyServicer(InferenceServicer):
+    """A stand-in of the service which sends the broken replies."""
+
+    def __init__(self, broken):
+        super().__init__()
+        self.broken = broken
+
+    def Inference(self, request, context):
+        reply = super().Inference(request, context)
+        if self.broken == 'id':
+            reply.id = request.id + 1000
+        elif self.broken == 'shape':
+            reply.data[0].shape[:] = [7]
+        return reply
+
+
+@pytest.mark.parametrize('broken', ['id', 'shape'])
+def test_snpe_wrapper_broken_reply(dlc_file, broken):
+    from mmdeploy.backend.snpe.wrapper import SNPEWrapper
+    servicer = BrokenReplyServicer(broken)
+    server, uri = _start_server(servicer)
+    try:
+        wrapper = SNPEWrapper(dlc_file, uri, max_in_flight=2)
+        inputs = torch.rand(1, 3, 8, 6)
+        results = [wrapper.forward_async({'input': inputs}) for _ in range(4)]
+        for result in results:
+            with pytest.raises(Exception):
+                result.result(timeout=10)
+
+        # the next request opens a new stream
+        servicer.broken = None
+        outputs = wrapper.forward_async({'input': inputs}).result(timeout=10)
+        torch.testing.assert_close(outputs['output'], inputs)
+    finally:
+        server.stop(None)
+
+
+def test_snpe_wrapper_stream_time_counter(dlc_file):
+    from mmdeploy.backend.snpe.wrapper import SNPEWrapper
+    from mmdeploy.utils import Backend
+    from mmdeploy.utils.timer import TimeCounter
+    servicer = InferenceServicer()
+    server, uri = _start_server(servicer)
+    try:
+        wrapper = SNPEWrapper(dlc_file, uri)
+        inputs = torch.rand(1, 3, 8, 6)
+        stats = TimeCounter.names[Backend.SNPE.value]
+        count = stats['count']
+        with TimeCounter.activate(Backend.SNPE.value, warmup=1):
+            results = [
+                wrapper.forward_async({'input': inputs}) for _ in range(3)
+            ]
+            wrapper({'input': inputs})
+            for result in results:
+                result.result()
+            # the done callbacks may run after the results are returned
+            time.sleep(0.1)
+        assert stats['count'] == count + 4
+    finally:
+        server.stop(None)
@@ -217,3 +217,156 @@ def test_wrapper(backend):
     assert wrapper is not None
     results = run_wrapper(backend, wrapper, test_img)
     assert results is not None
+
+
+def test_ort_wrapper_output_buffers():
+    check_backend(Backend.ONNXRUNTIME)
+    from mmdeploy.backend.onnxruntime import ORTWrapper
+    wrapper = ORTWrapper(
+        onnx_file, 'cpu', output_names, use_output_buffers=True)
+    inputs = torch.rand(1, 3, 8, 8)
+    expected = ORTWrapper(onnx_file, 'cpu', output_names)({
+        'input': inputs
+    })['output']
+    first = wrapper({'input': inputs})['output'].clone()
+    second = wrapper({'input': inputs})['output']
+    third = wrapper({'input': inputs})['output']
+    assert second.data_ptr() == third.data_ptr()
+    torch.testing.assert_close(first, expected)
+    torch.testing.assert_close(third, expected)
+
+
+def test_ort_wrapper_output_buffers_dynamic_shape():
+    check_backend(Backend.ONNXRUNTIME)
+    from mmdeploy.backend.onnxruntime import ORTWrapper
+    from mmdeploy.utils.test import WrapFunction
+
+    nonzero_file = tempfile.NamedTemporaryFile(suffix='.onnx').name
+    nonzero_model = WrapFunction(lambda x: torch.nonzero(x > 0.5))
+    torch.onnx.export(
+        nonzero_model,
+        test_img,
+        nonzero_file,
+        input_names=input_names,
+        output_names=output_names,
+        opset_version=11)
+    wrapper = ORTWrapper(
+        nonzero_file, 'cpu', output_names, use_output_buffers=True)
+    for _ in range(3):
+        inputs = torch.rand(1, 3, 8, 8)
+        results = wrapper({'input': inputs})['output']
+        torch.testing.assert_close(results, torch.nonzero(inputs > 0.5))
+
+
+def test_ort_wrapper_output_buffers_eviction():
+    check_backend(Backend.ONNXRUNTIME)
+    from mmdeploy.backend.onnxruntime import ORTWrapper
+    from mmdeploy.utils.test import WrapFunction
+
+    dynamic_file = tempfile.NamedTemporaryFile(suffix='.onnx').name
+    dynamic_model = WrapFunction(lambda x: x * 2)
+    torch.onnx.export(
+        dynamic_model,
+        test_img,
+        dynamic_file,
+        input_names=input_names,
+        output_names=output_names,
+        opset_version=11,
+        dynamic_axes={'input': {
+            2: 'height',
+            3: 'width'
+        }})
+    wrapper = ORTWrapper(
+        dynamic_file, 'cpu', output_names, use_output_buffers=True)
+    wrapper._max_cached_shapes = 2
+    for size in (8, 16, 8, 32):
+        inputs = torch.rand(1, 3, size, size)
+        wrapper({'input': inputs})
+    # 16x16 is the least recently used one
+    assert len(wrapper._output_buffers) == 2
+    cached_sizes = [key[0][1][-1] for key in wrapper._output_buffers]
+    assert cached_sizes == [8, 32]
+
+
+def test_trt_wrapper_output_buffers():
+    check_backend(Backend.TENSORRT)
+    from mmdeploy.backend.tensorrt import TRTWrapper
+    engine_file = ir2backend(Backend.TENSORRT, onnx_file, ts_file)
+    wrapper = TRTWrapper(
+        engine_file, output_names=output_names, use_output_buffers=True)
+    inputs = test_img.cuda()
+    first = wrapper({'input': inputs})['output']
+    second = wrapper({'input': inputs})['output']
+    assert first.data_ptr() == second.data_ptr()
+    assert len(wrapper._binding_cache) == 1
+
+
+def test_trt_wrapper_cuda_graph():
+    check_backend(Backend.TENSORRT)
+    from mmdeploy.backend.tensorrt import TRTWrapper
+    engine_file = ir2backend(Backend.TENSORRT, onnx_file, ts_file)
+    wrapper = TRTWrapper(
+        engine_file, output_names=output_names, use_cuda_graph=True)
+    inputs = test_img.cuda()
+    eager_wrapper = TRTWrapper(engine_file, output_names=output_names)
+    expected = eager_wrapper({'input': inputs})['output']
+    for _ in range(3):
+        results = wrapper({'input': inputs})['output']
+        torch.testing.assert_close(results, expected)
+
+    # the graph does not share the context of the eager calls
+    assert len(wrapper._graph_contexts) == 1
+    assert wrapper.context not in wrapper._graph_contexts.values()
+
+
+def test_cuda_graph_cache_key():
+    from mmdeploy.backend.base.cuda_graph import CUDAGraphCache
+    key = CUDAGraphCache.get_key([torch.rand(1, 3, 8, 8)])
+    assert key == CUDAGraphCache.get_key([torch.rand(1, 3, 8, 8)])
+    assert key != CUDAGraphCache.get_key([torch.rand(2, 3, 8, 8)])
+    assert key != CUDAGraphCache.get_key([torch.rand(1, 3, 8, 8).half()])
+    assert key != CUDAGraphCache.get_key([
+        torch.rand(1, 3, 8, 8), torch.rand(1, 3, 8, 8)
+    ])
+
+
+def test_cuda_graph_cache_fallback():
+    from mmdeploy.backend.base.cuda_graph import CUDAGraphCache
+    graphs = CUDAGraphCache()
+    inputs = [torch.rand(1, 3, 8, 8)]
+    for _ in range(3):
+        outputs = graphs.run(lambda x: (x + 1, ), inputs)
+        torch.testing.assert_close(outputs[0], inputs[0] + 1)
+    assert len(graphs._graphs) == 0
+
+    # the inputs not captured run with eager_func
+    outputs = graphs.run(
+        lambda x: (x + 1, ), inputs, eager_func=lambda x: (x + 2, ))
+    torch.testing.assert_close(outputs[0], inputs[0] + 2)
+
+
+def test_torchscript_wrapper_cuda_graph():
+    check_backend(Backend.TORCHSCRIPT)
+    from mmdeploy.backend.torchscript import TorchscriptWrapper
+    wrapper = TorchscriptWrapper(
+        ts_file, input_names, output_names, use_cuda_graph=True)
+    eager_wrapper = TorchscriptWrapper(ts_file, input_names, output_names)
+    expected = eager_wrapper({'input': test_img})['output']
+    for _ in range(3):
+        results = wrapper({'input': test_img})['output']
+        torch.testing.assert_close(results, expected)
+
+
+def test_ncnn_wrapper_num_workers():
+    check_backend(Backend.NCNN, True)
+    from mmdeploy.backend.ncnn import NCNNWrapper
+    param_file, bin_file = ir2backend(Backend.NCNN, onnx_file, ts_file)
+    inputs = torch.rand(4, 3, 8, 8)
+    wrapper = NCNNWrapper(param_file, bin_file, output_names)
+    expected = wrapper({'input': inputs})['output']
+    wrapper = NCNNWrapper(
+        param_file, bin_file, output_names, num_workers=4, num_threads=1)
+    for _ in range(2):
+        results = wrapper({'input': inputs})['output']
+        torch.testing.assert_close(results, expected)
+    wrapper.destroy()
@@ -161,6 +161,25 @@ def test_can_postprocess_masks():
             f'did not match actual shape {actual_shape}.'
 
 
+def test_postprocess_masks_in_chunks():
+    from mmdeploy.codebase.mmdet.deploy.object_detection_model import \
+        End2EndModel
+    xy = torch.rand(10, 2) * 30
+    det_bboxes = torch.cat([xy, xy + torch.rand(10, 2) * 20], 1)
+    det_masks = torch.rand(10, 28, 28)
+    img_w, img_h = (50, 40)
+    masks = End2EndModel.postprocessing_masks(det_bboxes, det_masks, img_w,
+                                              img_h)
+    chunked_masks = End2EndModel.postprocessing_masks(
+        det_bboxes, det_masks, img_w, img_h, mem_limit=1024)
+    assert torch.equal(masks, chunked_masks)
+
+    binary_masks = End2EndModel.postprocessing_masks(
+        det_bboxes, det_masks, img_w, img_h, out_dtype=torch.bool)
+    assert binary_masks.dtype == torch.bool
+    assert torch.equal(binary_masks, masks >= 0.5)
+
+
 @pytest.mark.parametrize('device', ['cpu', 'cuda:0'])
 def test_create_input(device):
     if device == 'cuda:0' and not torch.cuda.is_available():
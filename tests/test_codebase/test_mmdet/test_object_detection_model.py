@@ -142,6 +142,21 @@ class TestMaskEnd2EndModel:
         assert_forward_results(results, 'mask End2EndModel')
 
 
+def test_get_scale_factors():
+    img_metas = [
+        dict(scale_factor=(0.5, 0.25)),
+        dict(scale_factor=[0.5, 0.25, 0.5, 0.25], pad_param=[4, 0, 2, 0]),
+        dict(border=[8, 0, 4, 0]),
+        dict()
+    ]
+    scale_factors, offsets = End2EndModel.get_scale_factors(
+        img_metas, torch.rand(4, 10, 5))
+    assert scale_factors.tolist() == [[0.5, 0.25, 0.5, 0.25],
+                                      [0.5, 0.25, 0.5, 0.25], [1, 1, 1, 1],
+                                      [1, 1, 1, 1]]
+    assert offsets.tolist() == [[0, 0], [8, 8], [4, 8], [0, 0]]
+
+
 def get_test_cfg_and_post_processing():
     test_cfg = {
         'nms_pre': 100,
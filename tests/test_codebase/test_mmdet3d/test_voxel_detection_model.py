@@ -101,3 +101,84 @@ def test_build_voxel_detection_model():
                                                     deploy_cfg=deploy_cfg,
                                                     device='cpu')
         assert isinstance(voxeldetector, VoxelDetectionModel)
+
+
+centerpoint_cfg = 'tests/test_codebase/test_mmdet3d/data/' \
+    'centerpoint_pillar02_second_secfpn_8xb4-cyclic-20e_nus-3d.py'
+
+
+def test_build_head_info():
+    from mmdeploy.utils import load_config
+    model_cfg = load_config(centerpoint_cfg)[0]
+    head_info = VoxelDetectionModel.build_head_info(model_cfg)
+    assert list(head_info['head'].num_classes) == [1, 2, 2, 1, 2, 2]
+    assert head_info['cfg'] == model_cfg.model.test_cfg.pts
+
+    # the classes of the tasks with fewer classes are padded
+    class_index = head_info['class_index'].view(6, 2)
+    class_valid = head_info['class_valid']
+    assert class_valid.tolist() == [[True, False], [True, True], [True, True],
+                                    [True, False], [True, True], [True, True]]
+    assert class_index[class_valid].tolist() == list(range(10))
+
+
+def test_postprocess_centerpoint_decode():
+    from mmdet3d.structures import Det3DDataSample, LiDARInstance3DBoxes
+
+    from mmdeploy.utils import load_config
+    model_cfg = load_config(centerpoint_cfg)[0]
+    head_info = VoxelDetectionModel.build_head_info(model_cfg)
+    head = head_info['head']
+    batch_size, num_tasks = 2, len(head.num_classes)
+    cls_score = torch.randn(batch_size, 10, 32, 32)
+    bbox_pred = torch.randn(batch_size, 8 * num_tasks, 32, 32)
+    dir_cls_pred = torch.randn(batch_size, 2 * num_tasks, 32, 32)
+
+    # the tasks are decoded in one batch
+    decode = head.bbox_coder.decode
+    calls = []
+
+    def batched_decode(heat, *args, **kwargs):
+        calls.append((heat, decode(heat, *args, **kwargs)))
+        return calls[-1][1]
+
+    head.bbox_coder.decode = batched_decode
+    metas = [
+        Det3DDataSample(metainfo=dict(box_type_3d=LiDARInstance3DBoxes))
+        for _ in range(batch_size)
+    ]
+    results = VoxelDetectionModel.postprocess(
+        model_cfg=model_cfg,
+        deploy_cfg=None,
+        outs=dict(
+            cls_score=[cls_score],
+            bbox_pred=[bbox_pred],
+            dir_cls_pred=[dir_cls_pred]),
+        metas=metas,
+        head_info=head_info)
+    assert len(results) == batch_size
+    assert len(calls) == 1
+    heat, decoded = calls[0]
+    assert heat.shape == (num_tasks * batch_size, 2, 32, 32)
+    padded = ~head_info['class_valid'].repeat_interleave(batch_size, 0)
+    assert (heat[padded] == -1).all()
+
+    # same as the previous decode of each task
+    start = 0
+    for task_id, num_class in enumerate(head.num_classes):
+        bbox = bbox_pred[:, 8 * task_id:8 * task_id + 8]
+        rot = dir_cls_pred[:, 2 * task_id:2 * task_id + 2]
+        expected = decode(
+            cls_score[:, start:start + num_class].sigmoid(),
+            rot[:, 0:1],
+            rot[:, 1:2],
+            bbox[:, 2:3],
+            torch.exp(bbox[:, 3:6]),
+            bbox[:, 6:8],
+            reg=bbox[:, 0:2],
+            task_id=task_id)
+        start += num_class
+        for i in range(batch_size):
+            result = decoded[task_id * batch_size + i]
+            for key in ['bboxes', 'scores', 'labels']:
+                torch.testing.assert_close(result[key], expected[i][key])
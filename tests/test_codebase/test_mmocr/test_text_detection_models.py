@@ -92,3 +92,37 @@ def test_build_text_detection_model():
         segmentor = build_text_detection_model([''], model_cfg, deploy_cfg,
                                                'cpu')
         assert isinstance(segmentor, End2EndModel)
+
+
+@pytest.mark.parametrize('text_repr_type', ['poly', 'quad'])
+def test_crops_to_polygons(text_repr_type):
+    import cv2
+    import numpy as np
+
+    from mmdeploy.codebase.mmocr.deploy.text_detection_model import (
+        crop_masks, crops_to_polygons)
+    masks = torch.zeros(3, IMAGE_SIZE, IMAGE_SIZE, dtype=torch.bool)
+    masks[0, 2:10, 4:20] = True
+    masks[0, 20:30, 0:8] = True
+    masks[2, 24:, 24:] = True
+    scores = np.array([0.9, 0.8, 0.7], dtype=np.float32)
+
+    crops, offsets, keep = crop_masks(masks)
+    assert keep.tolist() == [0, 2]
+    assert offsets.tolist() == [[0, 2], [24, 24]]
+    polygons, poly_scores = crops_to_polygons(crops, offsets, scores[keep],
+                                              text_repr_type)
+
+    expected = []
+    for mask in masks.numpy():
+        contours = cv2.findContours(
+            mask.astype(np.uint8), cv2.RETR_CCOMP, cv2.CHAIN_APPROX_NONE)[-2]
+        expected += [contour.reshape(-1, 2) for contour in contours]
+    if text_repr_type == 'quad':
+        expected = [
+            cv2.boxPoints(cv2.minAreaRect(contour)) for contour in expected
+        ]
+    assert len(polygons) == len(expected) == 3
+    for polygon, contour in zip(polygons, expected):
+        assert np.array_equal(polygon, contour.reshape(-1))
+    assert poly_scores.tolist() == pytest.approx([0.9, 0.9, 0.7])
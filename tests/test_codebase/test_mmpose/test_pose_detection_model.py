@@ -58,6 +58,29 @@ class TestEnd2EndModel:
         assert results is not None, 'failed to get output using '\
             'End2EndModel'
 
+    def test_pack_result(self):
+        import numpy as np
+        from mmengine.structures import InstanceData
+        data_samples = [
+            generate_datasample((IMAGE_H, IMAGE_W)) for _ in range(2)
+        ]
+        input_size = np.array((IMAGE_W, IMAGE_H))
+        preds, expected = [], []
+        for data_sample in data_samples:
+            data_sample.set_metainfo(dict(input_size=input_size))
+            gt_instances = data_sample.gt_instances
+            gt_instances.bbox_centers = np.random.rand(1, 2) * 100
+            gt_instances.bbox_scales = np.random.rand(1, 2) * 100
+            keypoints = np.random.rand(1, 17, 2) * input_size
+            preds.append(InstanceData(keypoints=keypoints))
+            expected.append(keypoints / input_size * gt_instances.bbox_scales +
+                            gt_instances.bbox_centers -
+                            0.5 * gt_instances.bbox_scales)
+
+        results = self.end2end_model.pack_result(preds, data_samples)
+        for data_sample, keypoints in zip(results, expected):
+            assert np.allclose(data_sample.pred_instances.keypoints, keypoints)
+
 
 @backend_checker(Backend.ONNXRUNTIME)
 def test_build_pose_detection_model():
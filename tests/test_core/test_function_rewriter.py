@@ -187,3 +187,44 @@ def test_rewrite_derived_methods():
 
     assert base_obj.method() == 1
     assert derived_obj.method() == 1
+
+
+def test_rewriter_context_cache():
+    x = torch.tensor([1, 2, 3, 4, 5])
+
+    @FUNCTION_REWRITER.register_rewriter(
+        func_name='torch.neg', backend='tensorrt')
+    def neg_func(x):
+        ctx = FUNCTION_REWRITER.get_context()
+        return ctx.origin_func(x) + ctx.cfg['bias']
+
+    @FUNCTION_REWRITER.register_rewriter(
+        func_name='torch.abs', backend='tensorrt')
+    def abs_func(x):
+        ctx = FUNCTION_REWRITER.get_context()
+        # the context of the caller is restored after the nested rewrite
+        y = torch.neg(x)
+        assert FUNCTION_REWRITER.get_context() is ctx
+        return ctx.origin_func(y)
+
+    # the contexts follow the configs of the rewriter contexts
+    for bias in [1, 2]:
+        with RewriterContext(dict(bias=bias), backend='tensorrt'):
+            torch_assert_close(torch.neg(x), -x + bias)
+            torch_assert_close(torch.abs(x), (-x + bias).abs())
+    torch_assert_close(torch.neg(x), -x)
+
+    # the cached records are updated with the registry
+    @FUNCTION_REWRITER.register_rewriter(
+        func_name='torch.sign', backend='tensorrt')
+    def sign_func(x):
+        return x
+
+    with RewriterContext(dict(bias=0), backend='tensorrt'):
+        torch_assert_close(torch.sign(x), x)
+    FUNCTION_REWRITER._registry.remove_record(sign_func)
+    with RewriterContext(dict(bias=0), backend='tensorrt'):
+        torch_assert_close(torch.sign(x), torch.ones_like(x))
+
+    FUNCTION_REWRITER._registry.remove_record(neg_func)
+    FUNCTION_REWRITER._registry.remove_record(abs_func)
@@ -0,0 +1,55 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import onnx
+from onnx import TensorProto, helper
+
+from mmdeploy.core.optimizers import GraphIndex, remove_identity, rename_value
+
+
+def _make_model():
+    # x -> Identity -> a -> Identity -> b -> Relu -> c -> Identity -> y
+    #                  a -> Relu -> d -> Identity -> e -> Add(b, e) -> z
+    nodes = [
+        helper.make_node('Identity', ['x'], ['a'], name='id0'),
+        helper.make_node('Identity', ['a'], ['b'], name='id1'),
+        helper.make_node('Relu', ['b'], ['c'], name='relu0'),
+        helper.make_node('Identity', ['c'], ['y'], name='id2'),
+        helper.make_node('Relu', ['a'], ['d'], name='relu1'),
+        helper.make_node('Identity', ['d'], ['e'], name='id3'),
+        helper.make_node('Add', ['b', 'e'], ['z'], name='add'),
+    ]
+    graph = helper.make_graph(
+        nodes, 'graph',
+        [helper.make_tensor_value_info('x', TensorProto.FLOAT, [2])], [
+            helper.make_tensor_value_info('y', TensorProto.FLOAT, [2]),
+            helper.make_tensor_value_info('z', TensorProto.FLOAT, [2])
+        ])
+    return helper.make_model(graph)
+
+
+def test_graph_index():
+    model = _make_model()
+    index = GraphIndex(model.graph)
+    assert [node.name for node in index.consumers['a']] == ['id1', 'relu1']
+    assert [node.name for node in index.producers['c']] == ['relu0']
+
+    rename_value(model, 'c', 'scores', index=index)
+    assert model.graph.node[2].output[0] == 'scores'
+    assert model.graph.node[3].input[0] == 'scores'
+    assert [node.name for node in index.consumers['scores']] == ['id2']
+
+    index.remove_nodes([model.graph.node[1], model.graph.node[5]])
+    assert [node.name for node in model.graph.node
+            ] == ['id0', 'relu0', 'id2', 'relu1', 'add']
+    assert 'id1' not in [node.name for node in index.consumers['a']]
+
+
+def test_remove_identity():
+    model = _make_model()
+    remove_identity(model)
+    onnx.checker.check_model(model)
+    nodes = {node.name: node for node in model.graph.node}
+    assert list(nodes) == ['relu0', 'relu1', 'add']
+    assert list(nodes['relu0'].input) == ['x']
+    assert list(nodes['relu0'].output) == ['y']
+    assert list(nodes['relu1'].input) == ['x']
+    assert list(nodes['add'].input) == ['x', 'd']
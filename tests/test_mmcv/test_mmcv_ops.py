@@ -243,3 +243,162 @@ def test_modulated_deform_conv():
     jit_out = jit_model(x)
 
     torch.testing.assert_allclose(out, jit_out)
+
+
+@pytest.mark.parametrize('keep_top_k', [-1, 5, 100])
+def test_select_nms_index(keep_top_k):
+    from mmdeploy.mmcv.ops.nms import _select_nms_index
+    batch_size, num_classes, num_boxes, num_dets = 3, 4, 20, 30
+    scores = torch.rand(batch_size, num_classes, num_boxes)
+    boxes = torch.rand(batch_size, num_boxes, 4)
+    # the last image has no detection
+    nms_index = torch.stack([
+        torch.randint(batch_size - 1, (num_dets, )),
+        torch.randint(num_classes, (num_dets, )),
+        torch.randint(num_boxes, (num_dets, ))
+    ], 1)
+    pre_inds = torch.randint(1000, (batch_size, num_boxes))
+    dets, labels, inds = _select_nms_index(
+        scores,
+        boxes,
+        nms_index,
+        batch_size,
+        keep_top_k=keep_top_k,
+        pre_inds=pre_inds,
+        output_index=True)
+
+    num_out = keep_top_k if 0 < keep_top_k < num_dets + 1 else num_dets + 1
+    assert dets.shape == (batch_size, num_out, 5)
+    assert labels.shape == inds.shape == (batch_size, num_out)
+    for i in range(batch_size):
+        index = nms_index[nms_index[:, 0] == i]
+        score = scores[i, index[:, 1], index[:, 2]]
+        score, order = score.sort(descending=True)
+        index = index[order][:num_out]
+        num_valid = len(index)
+        expected_dets = torch.cat(
+            [boxes[i, index[:, 2]], score[:num_out, None]], 1)
+        assert torch.equal(dets[i, :num_valid], expected_dets)
+        assert torch.equal(labels[i, :num_valid], index[:, 1])
+        assert torch.equal(inds[i, :num_valid], pre_inds[i, index[:, 2]])
+        assert (dets[i, num_valid:] == 0).all()
+        assert (labels[i, num_valid:] == -1).all()
+        assert (inds[i, num_valid:] == -1).all()
+
+
+def _rand_boxes(*shape):
+    # boxes on a 1333x800 image, the offsets of the groups are large
+    xy = torch.rand(*shape, 2) * torch.tensor([1333., 800.])
+    wh = torch.rand(*shape, 2) * 200 + 10
+    return torch.cat([xy, xy + wh], -1)
+
+
+@pytest.mark.parametrize('batch_size', [1, 3])
+def test_ONNXNMSop_parity(batch_size):
+    from torchvision.ops import nms
+
+    from mmdeploy.mmcv.ops import ONNXNMSop
+    num_classes, max_output_boxes_per_class = 80, 5
+    iou_threshold, score_threshold = 0.5, 0.2
+    boxes = _rand_boxes(batch_size, 200)
+    scores = torch.rand(batch_size, num_classes, 200)
+
+    # nms of each image and class in float32, without the group offsets
+    expected = []
+    for batch_id in range(batch_size):
+        for cls_id in range(num_classes):
+            box_inds = (scores[batch_id, cls_id] >
+                        score_threshold).nonzero().squeeze(1)
+            keep = nms(boxes[batch_id, box_inds],
+                       scores[batch_id, cls_id, box_inds], iou_threshold)
+            box_inds = box_inds[keep[:max_output_boxes_per_class]]
+            expected.append(
+                torch.stack([
+                    torch.full_like(box_inds, batch_id),
+                    torch.full_like(box_inds, cls_id), box_inds
+                ], -1))
+    expected = torch.cat(expected)
+
+    indices = ONNXNMSop.apply(boxes, scores, max_output_boxes_per_class,
+                              iou_threshold, score_threshold)
+    assert torch.equal(indices, expected)
+
+
+@pytest.mark.parametrize('batch_size, pre_top_k, keep_top_k', [(1, -1, -1),
+                                                               (3, -1, 20),
+                                                               (3, 30, 50)])
+def test_multiclass_nms__torchscript_parity(batch_size, pre_top_k, keep_top_k):
+    from torchvision.ops import batched_nms
+
+    from mmdeploy.mmcv.ops.nms import (_select_nms_index,
+                                       multiclass_nms__torchscript)
+    num_boxes, num_classes, max_output_boxes_per_class = 60, 4, 5
+    iou_threshold, score_threshold = 0.5, 0.2
+    boxes = _rand_boxes(batch_size, num_boxes)
+    scores = torch.rand(batch_size, num_boxes, num_classes)
+    dets, labels, inds = multiclass_nms__torchscript(
+        boxes,
+        scores,
+        max_output_boxes_per_class=max_output_boxes_per_class,
+        iou_threshold=iou_threshold,
+        score_threshold=score_threshold,
+        pre_top_k=pre_top_k,
+        keep_top_k=keep_top_k,
+        output_index=True)
+
+    # batched nms of each class on the boxes above the score threshold
+    pre_inds = None
+    if pre_top_k > 0:
+        _, pre_inds = scores.max(-1)[0].topk(pre_top_k)
+        batch_inds = torch.arange(batch_size).view(-1, 1)
+        boxes = boxes[batch_inds, pre_inds]
+        scores = scores[batch_inds, pre_inds]
+    keeps = []
+    for cls_id in range(num_classes):
+        cls_scores = scores[..., cls_id]
+        batch_inds, box_inds = (cls_scores > score_threshold).nonzero(
+            as_tuple=True)
+        keep = batched_nms(boxes[batch_inds, box_inds].double(),
+                           cls_scores[batch_inds, box_inds].double(),
+                           batch_inds, iou_threshold)
+        keep = keep[:max_output_boxes_per_class * batch_size]
+        keeps.append(
+            torch.stack([
+                batch_inds[keep],
+                torch.full_like(keep, cls_id), box_inds[keep]
+            ], 1))
+    expected = _select_nms_index(
+        scores.permute(0, 2, 1),
+        boxes,
+        torch.cat(keeps),
+        batch_size,
+        keep_top_k=keep_top_k,
+        pre_inds=pre_inds,
+        output_index=True)
+    assert torch.equal(dets, expected[0])
+    assert torch.equal(labels, expected[1])
+    assert torch.equal(inds, expected[2])
+
+
+def test_multiclass_nms__torchscript_score_threshold():
+    from mmdeploy.mmcv.ops.nms import multiclass_nms__torchscript
+
+    # the second box overlaps nothing but is below the score threshold
+    boxes = torch.tensor([[[0., 0., 10., 10.], [20., 20., 30., 30.],
+                           [1., 1., 10., 10.]]])
+    scores = torch.tensor([[[0.9, 0.6], [0.1, 0.01], [0.8, 0.3]]])
+    dets, labels, inds = multiclass_nms__torchscript(
+        boxes,
+        scores,
+        iou_threshold=0.5,
+        score_threshold=0.2,
+        keep_top_k=-1,
+        output_index=True)
+
+    # the detections below the score threshold are not output, the output
+    # is padded by one empty detection
+    assert dets.shape == (1, 3, 5)
+    assert torch.allclose(dets[0, :2, 4], torch.tensor([0.9, 0.6]))
+    assert torch.equal(labels, torch.tensor([[0, 1, -1]]))
+    assert torch.equal(inds, torch.tensor([[0, 0, -1]]))
+    assert (dets[0, 2] == 0).all()
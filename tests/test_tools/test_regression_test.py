@@ -0,0 +1,150 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import importlib.util
+import os.path as osp
+import platform
+import time
+from functools import partial
+
+import pytest
+
+for module in ('openpyxl', 'pandas', 'tqdm'):
+    pytest.importorskip(module)
+
+pytestmark = pytest.mark.skipif(
+    platform.system() == 'Windows', reason='the jobs are shell commands')
+
+spec = importlib.util.spec_from_file_location(
+    'regression_test',
+    osp.join(
+        osp.dirname(osp.dirname(osp.dirname(osp.abspath(__file__)))), 'tools',
+        'regression_test.py'))
+regression_test = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(regression_test)
+
+
+def _shell_job(tmp_path, name, cmd, **kwargs):
+    func = partial(regression_test.run_cmd, [cmd], tmp_path / f'{name}.log')
+    return regression_test.Job(name, func, **kwargs)
+
+
+def _read_output(tmp_path, name):
+    """The last line of the output of a shell job."""
+    with open(tmp_path / f'{name}.log') as f:
+        return f.read().splitlines()[-1]
+
+
+def test_run_cmd(tmp_path):
+    log_path = tmp_path / 'logs' / 'echo.log'
+    env = dict(MESSAGE='hello')
+    assert regression_test.run_cmd(['echo $MESSAGE'], log_path, env=env) == 0
+    assert log_path.read_text().splitlines()[-1] == 'hello'
+    assert regression_test.run_cmd(['exit 3'], log_path) == 3
+
+    # the command and its children are killed after the timeout
+    start = time.time()
+    return_code = regression_test.run_cmd(['sleep 30 & sleep 30'],
+                                          log_path,
+                                          timeout=1)
+    assert return_code != 0
+    assert time.time() - start < 10
+    assert len(regression_test._running_processes) == 0
+
+
+def test_job_scheduler_resources(tmp_path, monkeypatch):
+    monkeypatch.delenv('CUDA_VISIBLE_DEVICES', raising=False)
+    scheduler = regression_test.JobScheduler(4, [0, 1], 16)
+    cmd = 'echo $(date +%s%N) $OMP_NUM_THREADS ' \
+        '"[$CUDA_VISIBLE_DEVICES]" && sleep 0.5 && echo $(date +%s%N)'
+    cpus = dict(cpu0=2, cpu1=2, cpu2=2, cpu3=2, gpu0=1, gpu1=1, large=4)
+    for name, num_cpus in cpus.items():
+        if name.startswith('gpu'):
+            job = _shell_job(tmp_path, name, cmd, cpus=num_cpus, gpus=1)
+        elif name == 'large':
+            # a job larger than the machine runs alone
+            job = _shell_job(tmp_path, name, cmd, cpus=64, ram=100)
+        else:
+            job = _shell_job(tmp_path, name, cmd, cpus=num_cpus, ram=4)
+        scheduler.add(job)
+    scheduler.add(_shell_job(tmp_path, 'many_gpus', cmd, gpus=3))
+    states = scheduler.run()
+    assert states.pop('many_gpus') == 'failed'
+    assert states == {name: 'done' for name in cpus}
+
+    intervals = dict()
+    for name in states:
+        with open(tmp_path / f'{name}.log') as f:
+            lines = f.read().splitlines()
+        start, num_threads, devices = lines[-2].split()
+        intervals[name] = (int(start), int(lines[-1]))
+        # the threads are limited to the cpus of the job, and only the gpu
+        # jobs see the GPUs
+        assert num_threads == str(cpus[name])
+        if name.startswith('gpu'):
+            assert devices in ('[0]', '[1]')
+        else:
+            assert devices == '[]'
+
+    max_running = 0
+    for name, (start, _) in intervals.items():
+        running = [
+            other for other, (begin, end) in intervals.items()
+            if begin <= start < end
+        ]
+        assert sum(cpus[other] for other in running) <= 4
+        if name == 'large':
+            assert running == ['large']
+        max_running = max(max_running, len(running))
+    assert max_running > 1
+
+
+def test_job_scheduler_failures(tmp_path):
+    scheduler = regression_test.JobScheduler(4, [], 16)
+    scheduler.add(_shell_job(tmp_path, 'fail', 'exit 1'))
+    scheduler.add(_shell_job(tmp_path, 'child', 'true', deps=['fail']))
+    scheduler.add(_shell_job(tmp_path, 'grandchild', 'true', deps=['child']))
+    scheduler.add(
+        _shell_job(tmp_path, 'timeout', 'sleep 30', timeout=1, retries=1))
+    # fails the first time only
+    flaky = f'test -f {tmp_path}/flaky || (touch {tmp_path}/flaky; exit 1)'
+    scheduler.add(_shell_job(tmp_path, 'flaky', flaky, retries=1))
+    scheduler.add(_shell_job(tmp_path, 'no_retry', 'exit 1', retries=0))
+
+    start = time.time()
+    states = scheduler.run()
+    assert time.time() - start < 10
+    assert states == dict(
+        fail='failed',
+        child='skipped',
+        grandchild='skipped',
+        timeout='failed',
+        flaky='done',
+        no_retry='failed')
+    assert not (tmp_path / 'child.log').exists()
+
+
+def test_job_scheduler_resume(tmp_path):
+    state_file = tmp_path / 'state.json'
+    count = f'echo x >> {tmp_path}/$JOB.count'
+    fail_once = f'{count} && test -f {tmp_path}/ok'
+
+    def build(resume):
+        scheduler = regression_test.JobScheduler(
+            2, [], 16, state_file=state_file, resume=resume)
+        scheduler.add(_shell_job(tmp_path, 'done', f'JOB=done; {count}'))
+        scheduler.add(
+            _shell_job(tmp_path, 'failed', f'JOB=failed; {fail_once}'))
+        scheduler.add(
+            _shell_job(
+                tmp_path, 'skipped', f'JOB=skipped; {count}', deps=['failed']))
+        return scheduler
+
+    assert build(False).run() == dict(
+        done='done', failed='failed', skipped='skipped')
+    assert state_file.exists()
+
+    # only the jobs not succeeded are run again
+    (tmp_path / 'ok').touch()
+    assert build(True).run() == dict(
+        done='done', failed='done', skipped='done')
+    for name, count in (('done', 1), ('failed', 2), ('skipped', 1)):
+        assert len((tmp_path / f'{name}.count').read_text().split()) == count
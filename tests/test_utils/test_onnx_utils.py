@@ -0,0 +1,72 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import os
+import os.path as osp
+
+import numpy as np
+import onnx
+from onnx import TensorProto, helper, numpy_helper
+
+from mmdeploy.utils import (consolidate_external_data, get_external_data_path,
+                            get_onnx_files, has_external_data, save_onnx)
+
+
+def _make_model():
+    weights = [
+        np.random.rand(64, 64).astype(np.float32),
+        np.random.rand(64).astype(np.float32)
+    ]
+    graph = helper.make_graph(
+        [
+            helper.make_node('MatMul', ['x', 'w'], ['y']),
+            helper.make_node('Add', ['y', 'b'], ['z'])
+        ],
+        'graph',
+        [helper.make_tensor_value_info('x', TensorProto.FLOAT, [1, 64])],
+        [helper.make_tensor_value_info('z', TensorProto.FLOAT, [1, 64])],
+        initializer=[
+            numpy_helper.from_array(weights[0], 'w'),
+            numpy_helper.from_array(weights[1], 'b')
+        ])
+    return helper.make_model(graph), weights
+
+
+def _get_weights(model):
+    return [numpy_helper.to_array(t) for t in model.graph.initializer]
+
+
+def test_save_onnx(tmp_path):
+    model, weights = _make_model()
+    onnx_path = str(tmp_path / 'model.onnx')
+    data_path = get_external_data_path(onnx_path)
+
+    save_onnx(model, onnx_path, save_as_external_data=True)
+    assert get_onnx_files(onnx_path) == [onnx_path, data_path]
+    assert has_external_data(onnx.load(onnx_path, load_external_data=False))
+    for x, y in zip(_get_weights(onnx.load(onnx_path)), weights):
+        np.testing.assert_array_equal(x, y)
+
+    # the stale external data is removed
+    model, weights = _make_model()
+    save_onnx(model, onnx_path)
+    assert get_onnx_files(onnx_path) == [onnx_path]
+    assert not has_external_data(onnx.load(onnx_path))
+
+
+def test_consolidate_external_data(tmp_path):
+    model, weights = _make_model()
+    onnx_path = str(tmp_path / 'model.onnx')
+    # save each tensor in a separate file like `torch.onnx.export`
+    onnx.save(
+        model,
+        onnx_path,
+        save_as_external_data=True,
+        all_tensors_to_one_file=False,
+        size_threshold=0)
+    assert sorted(os.listdir(tmp_path)) == ['b', 'model.onnx', 'w']
+
+    consolidate_external_data(onnx_path)
+    assert sorted(os.listdir(tmp_path)) == ['model.onnx', 'model.onnx.data']
+    assert osp.getsize(get_external_data_path(onnx_path)) == sum(
+        w.nbytes for w in weights)
+    for x, y in zip(_get_weights(onnx.load(onnx_path)), weights):
+        np.testing.assert_array_equal(x, y)
@@ -21,3 +21,79 @@ def test_count_time():
         t.fun1()
 
     TimeCounter.print_stats('fun1')
+
+
+def test_latency_histogram():
+    from mmdeploy.utils.timer import LatencyHistogram
+    hist = LatencyHistogram()
+    for i in range(1, 101):
+        hist.add(i / 1000)
+    assert hist.count == 100
+    assert abs(hist.mean - 0.0505) < 1e-9
+    assert hist.min == 0.001
+    assert hist.max == 0.1
+    for q, expected in [(50, 0.05), (90, 0.09), (99, 0.099)]:
+        assert abs(hist.percentile(q) - expected) / expected < 0.01
+    assert hist.percentile(100) == 0.1
+    summary = hist.summary()
+    assert abs(summary['p99'] - 99) < 1
+
+
+def test_profiler(tmp_path):
+    import csv
+    import json
+    import threading
+
+    from mmdeploy.utils.timer import Profiler
+    profiler = Profiler(warmup=1)
+
+    def run():
+        for _ in range(5):
+            with profiler.scope('model'):
+                with profiler.scope('backend'):
+                    time.sleep(0.001)
+
+    threads = [threading.Thread(target=run) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = profiler.stats()
+    assert set(stats.keys()) == {'model', 'model/backend'}
+    assert stats['model/backend']['count'] == 9
+    assert stats['model']['p50'] >= stats['model/backend']['p50']
+
+    json_file = str(tmp_path / 'stats.json')
+    profiler.export_json(json_file)
+    with open(json_file) as f:
+        assert json.load(f)['model']['count'] == 9
+
+    csv_file = str(tmp_path / 'stats.csv')
+    profiler.export_csv(csv_file)
+    with open(csv_file) as f:
+        rows = list(csv.reader(f))
+    assert rows[0][0] == 'scope' and len(rows) == 3
+
+    trace_file = str(tmp_path / 'trace.json')
+    profiler.export_chrome_trace(trace_file)
+    with open(trace_file) as f:
+        events = json.load(f)['traceEvents']
+    assert len(events) == 18
+    assert all(event['ph'] == 'X' for event in events)
+
+
+def test_count_time_with_profiler():
+    from mmdeploy.utils.timer import Profiler
+
+    @TimeCounter.count_time('fun2')
+    def fun2():
+        time.sleep(0.001)
+
+    profiler = Profiler()
+    with TimeCounter.activate('fun2', profiler=profiler):
+        for _ in range(3):
+            with profiler.scope('outer'):
+                fun2()
+    assert profiler.stats()['outer/fun2']['count'] == 2
+    assert TimeCounter.names['fun2']['execute_time'].count == 2
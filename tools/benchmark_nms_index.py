@@ -0,0 +1,145 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import argparse
+import time
+
+import torch
+from prettytable import PrettyTable
+
+from mmdeploy.mmcv.ops.nms import _select_nms_index
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the selection of the batched NMS output.')
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        nargs='+',
+        default=[1, 8, 32],
+        help='batch sizes to test.')
+    parser.add_argument(
+        '--num-classes', type=int, default=80, help='number of classes.')
+    parser.add_argument(
+        '--num-boxes', type=int, default=1000, help='number of boxes.')
+    parser.add_argument(
+        '--num-dets',
+        type=int,
+        default=1000,
+        help='number of kept detections per image after nms.')
+    parser.add_argument(
+        '--keep-top-k', type=int, default=100, help='keep top k after nms.')
+    parser.add_argument(
+        '--device', help='device type for benchmark', default='cpu')
+    parser.add_argument(
+        '--warmup', type=int, default=5, help='warmup iterations.')
+    parser.add_argument(
+        '--num-iter', type=int, default=20, help='number of iterations.')
+    args = parser.parse_args()
+    return args
+
+
+def select_nms_index_dense(scores: torch.Tensor,
+                           boxes: torch.Tensor,
+                           nms_index: torch.Tensor,
+                           batch_size: int,
+                           keep_top_k: int = -1):
+    """The previous implementation, which repeats all detections for each
+    image of the batch."""
+    batch_inds, cls_inds = nms_index[:, 0], nms_index[:, 1]
+    box_inds = nms_index[:, 2]
+
+    scores = scores[batch_inds, cls_inds, box_inds].unsqueeze(1)
+    boxes = boxes[batch_inds, box_inds, ...]
+    dets = torch.cat([boxes, scores], dim=1)
+
+    batched_dets = dets.unsqueeze(0).repeat(batch_size, 1, 1)
+    batch_template = torch.arange(
+        0, batch_size, dtype=batch_inds.dtype, device=batch_inds.device)
+    batched_dets = batched_dets.where(
+        (batch_inds == batch_template.unsqueeze(1)).unsqueeze(-1),
+        batched_dets.new_zeros(1))
+
+    batched_labels = cls_inds.unsqueeze(0).repeat(batch_size, 1)
+    batched_labels = batched_labels.where(
+        (batch_inds == batch_template.unsqueeze(1)),
+        batched_labels.new_ones(1) * -1)
+
+    N = batched_dets.shape[0]
+    batched_dets = torch.cat((batched_dets, batched_dets.new_zeros((N, 1, 5))),
+                             1)
+    batched_labels = torch.cat((batched_labels, batched_labels.new_zeros(
+        (N, 1))), 1)
+    is_use_topk = keep_top_k > 0 and keep_top_k < batched_dets.shape[1]
+    if is_use_topk:
+        _, topk_inds = batched_dets[:, :, -1].topk(keep_top_k, dim=1)
+    else:
+        _, topk_inds = batched_dets[:, :, -1].sort(dim=1, descending=True)
+    topk_batch_inds = torch.arange(
+        batch_size, dtype=topk_inds.dtype,
+        device=topk_inds.device).view(-1, 1)
+    batched_dets = batched_dets[topk_batch_inds, topk_inds, ...]
+    batched_labels = batched_labels[topk_batch_inds, topk_inds, ...]
+    return batched_dets, batched_labels
+
+
+def make_inputs(batch_size: int, num_classes: int, num_boxes: int,
+                num_dets: int, device: str):
+    """Generate random scores, boxes and nms indices."""
+    scores = torch.rand(batch_size, num_classes, num_boxes, device=device)
+    boxes = torch.rand(batch_size, num_boxes, 4, device=device)
+    num_index = batch_size * num_dets
+    nms_index = torch.stack([
+        torch.arange(batch_size, device=device).repeat_interleave(num_dets),
+        torch.randint(num_classes, (num_index, ), device=device),
+        torch.randint(num_boxes, (num_index, ), device=device)
+    ], 1)
+    return scores, boxes, nms_index
+
+
+def benchmark(func, inputs, warmup: int, num_iter: int, device: str):
+    """Return the latency in ms and the peak memory in MB if on cuda."""
+    is_cuda = torch.device(device).type == 'cuda'
+    for _ in range(warmup):
+        func(*inputs)
+    if is_cuda:
+        torch.cuda.synchronize()
+        torch.cuda.reset_peak_memory_stats()
+    start = time.perf_counter()
+    for _ in range(num_iter):
+        func(*inputs)
+    if is_cuda:
+        torch.cuda.synchronize()
+    latency = (time.perf_counter() - start) * 1000 / num_iter
+    memory = torch.cuda.max_memory_allocated() / 2**20 if is_cuda else None
+    return latency, memory
+
+
+def main():
+    args = parse_args()
+    table = PrettyTable()
+    table.field_names = [
+        'batch size', 'dense (ms)', 'scatter (ms)', 'dense (MB)',
+        'scatter (MB)'
+    ]
+    for batch_size in args.batch_size:
+        scores, boxes, nms_index = make_inputs(batch_size, args.num_classes,
+                                               args.num_boxes, args.num_dets,
+                                               args.device)
+        row = [batch_size]
+        results = [
+            benchmark(func,
+                      (scores, boxes, nms_index, batch_size, args.keep_top_k),
+                      args.warmup, args.num_iter, args.device)
+            for func in (select_nms_index_dense, _select_nms_index)
+        ]
+        row += [f'{latency:.3f}' for latency, _ in results]
+        row += [
+            '-' if memory is None else f'{memory:.1f}' for _, memory in results
+        ]
+        table.add_row(row)
+    print(table)
+
+
+if __name__ == '__main__':
+    with torch.no_grad():
+        main()
@@ -1,28 +1,43 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import argparse
+import json
 import logging
 import os
 import os.path as osp
+from collections import OrderedDict
 from functools import partial
+from typing import Callable, Dict, List, Optional, Sequence
 
 import mmengine
 import torch.multiprocessing as mp
 from torch.multiprocessing import Process, set_start_method
 
-from mmdeploy.apis import (create_calib_input_data, extract_model,
+from mmdeploy.apis import (create_calib_input_data, extract_models,
                            get_predefined_partition_cfg, torch2onnx,
                            torch2torchscript, visualize_model)
-from mmdeploy.apis.core import PIPELINE_MANAGER
+from mmdeploy.apis.core import PIPELINE_MANAGER, ArtifactCache
+from mmdeploy.apis.core.cache import (copy_file, get_device_info,
+                                      get_export_config, get_model_config)
+from mmdeploy.apis.core.pipeline_manager import PipelineResult
 from mmdeploy.apis.utils import to_backend
+from mmdeploy.backend.base import get_backend_manager
 from mmdeploy.backend.sdk.export_info import export2SDK
-from mmdeploy.utils import (IR, Backend, get_backend, get_calib_filename,
-                            get_ir_config, get_partition_config,
-                            get_root_logger, load_config, target_wrapper)
+from mmdeploy.utils import (IR, Backend, get_backend, get_backend_config,
+                            get_calib_config, get_calib_filename,
+                            get_ir_config, get_onnx_files,
+                            get_partition_config, get_root_logger, load_config,
+                            target_wrapper)
 
 
 def parse_args():
     parser = argparse.ArgumentParser(description='Export model to backends.')
-    parser.add_argument('deploy_cfg', help='deploy config path')
+    parser.add_argument(
+        'deploy_cfg',
+        nargs='+',
+        help='deploy config path. If multiple configs are given, the IR is '
+        'exported once for configs that share it and the backends are '
+        'converted concurrently, each into a sub directory of `--work-dir` '
+        'named after the config.')
     parser.add_argument('model_cfg', help='model config path')
     parser.add_argument('checkpoint', help='model checkpoint path')
     parser.add_argument('img', help='image used to convert model model')
@@ -62,11 +77,23 @@ def parse_args():
         '--uri',
         default='192.168.1.1:60000',
         help='Remote ipv4:port or ipv6:port for inference on edge device.')
+    parser.add_argument(
+        '--cache-dir',
+        default=None,
+        help='the dir to cache the outputs of conversion stages. Stages '
+        'whose inputs have been converted before are restored from it '
+        'instead of being run again.')
+    parser.add_argument(
+        '--ir-only',
+        action='store_true',
+        help='only export the IR and extract the partitions. With '
+        '`--cache-dir`, the IR is restored from the cache by the later '
+        'conversions of the deploy configs sharing it.')
     args = parser.parse_args()
     return args
 
 
-def create_process(name, target, args, kwargs, ret_value=None):
+def start_process(name, target, args, kwargs, ret_value=None):
     logger = get_root_logger()
     logger.info(f'{name} start.')
     log_level = logger.level
@@ -75,6 +102,11 @@ def create_process(name, target, args, kwargs, ret_value=None):
 
     process = Process(target=wrap_func, args=args, kwargs=kwargs)
     process.start()
+    return process
+
+
+def join_process(name, process, ret_value=None):
+    logger = get_root_logger()
     process.join()
 
     if ret_value is not None:
@@ -85,6 +117,11 @@ def create_process(name, target, args, kwargs, ret_value=None):
             logger.info(f'{name} success.')
 
 
+def create_process(name, target, args, kwargs, ret_value=None):
+    process = start_process(name, target, args, kwargs, ret_value=ret_value)
+    join_process(name, process, ret_value=ret_value)
+
+
 def torch2ir(ir_type: IR):
     """Return the conversion function from torch to the intermediate
     representation.
@@ -100,56 +137,96 @@ def torch2ir(ir_type: IR):
         raise KeyError(f'Unexpected IR type {ir_type}')
 
 
-def main():
-    args = parse_args()
-    set_start_method('spawn', force=True)
-    logger = get_root_logger()
-    log_level = logging.getLevelName(args.log_level)
-    logger.setLevel(log_level)
+def get_ir_key(deploy_cfg: mmengine.Config) -> str:
+    """Get the key of the IR exported with the deploy config.
 
-    pipeline_funcs = [
-        torch2onnx, torch2torchscript, extract_model, create_calib_input_data
-    ]
-    PIPELINE_MANAGER.enable_multiprocess(True, pipeline_funcs)
-    PIPELINE_MANAGER.set_log_level(log_level, pipeline_funcs)
+    Deploy configs with the same key share the same IR. The backend type is
+    part of the key since the rewriters are specialized for each backend,
+    while the options only used to build the backend model are not.
 
-    deploy_cfg_path = args.deploy_cfg
-    model_cfg_path = args.model_cfg
-    checkpoint_path = args.checkpoint
-    quant = args.quant
-    quant_image_dir = args.quant_image_dir
-
-    # load deploy_cfg
-    deploy_cfg, model_cfg = load_config(deploy_cfg_path, model_cfg_path)
+    Args:
+        deploy_cfg (mmengine.Config): The deploy config.
 
-    # create work_dir if not
-    mmengine.mkdir_or_exist(osp.abspath(args.work_dir))
+    Returns:
+        str: The key of the IR.
+    """
+    return json.dumps(
+        get_export_config(deploy_cfg), sort_keys=True, default=str)
 
-    if args.dump_info:
-        export2SDK(
-            deploy_cfg,
-            model_cfg,
-            args.work_dir,
-            pth=checkpoint_path,
-            device=args.device)
 
-    ret_value = mp.Value('d', 0, lock=False)
+def run_stage(name: str,
+              func: Callable,
+              args: Sequence,
+              kwargs: Dict,
+              work_dir: str,
+              outputs: Optional[List[str]] = None,
+              cache: Optional[ArtifactCache] = None,
+              key_files: Sequence[str] = (),
+              key_inputs: Optional[Dict] = None) -> List[str]:
+    """Run a conversion stage, or restore its outputs from the cache.
 
+    Args:
+        name (str): The name of the stage.
+        func (Callable): The function of the stage.
+        args (Sequence): The positional arguments of the function.
+        kwargs (Dict): The keyword arguments of the function.
+        work_dir (str): The work dir of the stage.
+        outputs (List[str] | None): The output files of the stage. The return
+            of the function is used if it is `None`.
+        cache (ArtifactCache | None): The artifact cache.
+        key_files (Sequence[str]): The input files of the stage.
+        key_inputs (Dict | None): The other inputs of the stage.
+
+    Returns:
+        List[str]: The output files of the stage.
+    """
+    if cache is not None:
+        key_inputs = dict() if key_inputs is None else key_inputs
+        key = cache.get_key(name, files=key_files, **key_inputs)
+        files = cache.fetch(key, work_dir)
+        if files is not None:
+            get_root_logger().info(f'{name} is restored from cache.')
+            return files if outputs is None else outputs
+    ret = func(*args, **kwargs)
+    if outputs is None:
+        outputs = ret
+    if cache is not None:
+        cache.store(key, with_external_data(outputs), work_dir)
+    return outputs
+
+
+def export_ir(img,
+              work_dir,
+              deploy_cfg,
+              deploy_cfg_path,
+              model_cfg,
+              model_cfg_path,
+              checkpoint_path,
+              device,
+              cache=None) -> List[str]:
+    """Export the IR and extract the partitions of the deploy config.
+
+    Returns:
+        List[str]: The IR files used to convert the backend model.
+    """
     # convert to IR
     ir_config = get_ir_config(deploy_cfg)
     ir_save_file = ir_config['save_file']
     ir_type = IR.get(ir_config['type'])
-    torch2ir(ir_type)(
-        args.img,
-        args.work_dir,
-        ir_save_file,
-        deploy_cfg_path,
-        model_cfg_path,
-        checkpoint_path,
-        device=args.device)
-
-    # convert backend
-    ir_files = [osp.join(args.work_dir, ir_save_file)]
+    ir_files = run_stage(
+        f'torch2{ir_type.value}',
+        torch2ir(ir_type),
+        args=(img, work_dir, ir_save_file, deploy_cfg_path, model_cfg_path,
+              checkpoint_path),
+        kwargs=dict(device=device),
+        work_dir=work_dir,
+        outputs=[osp.join(work_dir, ir_save_file)],
+        cache=cache,
+        key_files=[img, checkpoint_path],
+        key_inputs=dict(
+            deploy_cfg=get_export_config(deploy_cfg),
+            model_cfg=get_model_config(model_cfg),
+            device=device))
 
     # partition model
     partition_cfgs = get_partition_config(deploy_cfg)
@@ -163,39 +240,67 @@ def main():
             partition_cfgs = get_predefined_partition_cfg(
                 deploy_cfg, partition_cfgs['type'])
 
+        # restore the cached partitions, and extract the others in one pass
         origin_ir_file = ir_files[0]
         ir_files = []
+        extract_cfgs = []
+        extract_keys = []
         for partition_cfg in partition_cfgs:
             save_file = partition_cfg['save_file']
-            save_path = osp.join(args.work_dir, save_file)
-            start = partition_cfg['start']
-            end = partition_cfg['end']
-            dynamic_axes = partition_cfg.get('dynamic_axes', None)
-
-            extract_model(
-                origin_ir_file,
-                start,
-                end,
-                dynamic_axes=dynamic_axes,
-                save_file=save_path)
-
+            save_path = osp.join(work_dir, save_file)
             ir_files.append(save_path)
+            if cache is not None:
+                key = cache.get_key(
+                    'extract_model',
+                    files=[origin_ir_file],
+                    start=partition_cfg['start'],
+                    end=partition_cfg['end'],
+                    dynamic_axes=partition_cfg.get('dynamic_axes', None),
+                    save_file=save_file)
+                if cache.fetch(key, work_dir) is not None:
+                    get_root_logger().info(
+                        f'extract_model of {save_file} is restored from '
+                        'cache.')
+                    continue
+                extract_keys.append(key)
+            extract_cfgs.append(dict(partition_cfg, save_file=save_path))
+
+        if len(extract_cfgs) > 0:
+            extract_models(origin_ir_file, extract_cfgs)
+        if cache is not None:
+            for key, extract_cfg in zip(extract_keys, extract_cfgs):
+                cache.store(key,
+                            with_external_data([extract_cfg['save_file']]),
+                            work_dir)
+    return ir_files
+
+
+def with_external_data(files: List[str]) -> List[str]:
+    """Add the external data files of the ONNX models to the files."""
+    all_files = []
+    for file in files:
+        if file.endswith('.onnx'):
+            all_files += get_onnx_files(file)
+        else:
+            all_files.append(file)
+    return all_files
 
-    # calib data
-    calib_filename = get_calib_filename(deploy_cfg)
-    if calib_filename is not None:
-        calib_path = osp.join(args.work_dir, calib_filename)
-        create_calib_input_data(
-            calib_path,
-            deploy_cfg_path,
-            model_cfg_path,
-            checkpoint_path,
-            dataset_cfg=args.calib_dataset_cfg,
-            dataset_type='val',
-            device=args.device)
 
-    backend_files = ir_files
-    # convert backend
+def share_files(files: List[str], work_dir: str) -> List[str]:
+    """Copy the files and their external data into the work dir."""
+    shared_files = []
+    for file in files:
+        shared_file = osp.join(work_dir, osp.basename(file))
+        if osp.abspath(shared_file) != osp.abspath(file):
+            for src in with_external_data([file]):
+                copy_file(src, osp.join(work_dir, osp.basename(src)))
+        shared_files.append(shared_file)
+    return shared_files
+
+
+def prepare_backend(args, work_dir, ir_files, deploy_cfg, deploy_cfg_path,
+                    model_cfg, model_cfg_path, ret_value):
+    """Backend specific preparation before converting the backend model."""
     backend = get_backend(deploy_cfg)
 
     # preprocess deploy_cfg
@@ -224,7 +329,7 @@ def main():
         # TODO: Add this to backend manager in the future
         if args.dump_info:
             from mmdeploy.backend.ascend import update_sdk_pipeline
-            update_sdk_pipeline(args.work_dir)
+            update_sdk_pipeline(work_dir)
 
     if backend == Backend.VACC:
         # TODO: Add this to task_processor in the future
@@ -247,87 +352,253 @@ def main():
                 create_process(
                     'vacc quant dataset',
                     target=get_quant,
-                    args=(deploy_cfg, model_cfg, shape_dict, checkpoint_path,
-                          args.work_dir, args.device),
+                    args=(deploy_cfg, model_cfg, shape_dict, args.checkpoint,
+                          work_dir, args.device),
                     kwargs=dict(),
                     ret_value=ret_value)
 
-    # convert to backend
+
+def quantize_ncnn(args, work_dir, ir_files, backend_files, deploy_cfg_path,
+                  model_cfg_path, ret_value):
+    """Quantize the ncnn model to int8."""
+    from onnx2ncnn_quant_table import get_table
+
+    from mmdeploy.apis.ncnn import get_quant_model_file, ncnn2int8
+    model_param_paths = backend_files[::2]
+    model_bin_paths = backend_files[1::2]
+    backend_files = []
+    for onnx_path, model_param_path, model_bin_path in zip(
+            ir_files, model_param_paths, model_bin_paths):
+
+        deploy_cfg, model_cfg = load_config(deploy_cfg_path, model_cfg_path)
+        quant_onnx, quant_table, quant_param, quant_bin = get_quant_model_file(  # noqa: E501
+            onnx_path, work_dir)
+
+        create_process(
+            'ncnn quant table',
+            target=get_table,
+            args=(onnx_path, deploy_cfg, model_cfg, quant_onnx, quant_table,
+                  args.quant_image_dir, args.device),
+            kwargs=dict(),
+            ret_value=ret_value)
+
+        create_process(
+            'ncnn_int8',
+            target=ncnn2int8,
+            args=(model_param_path, model_bin_path, quant_table, quant_param,
+                  quant_bin),
+            kwargs=dict(),
+            ret_value=ret_value)
+        backend_files += [quant_param, quant_bin]
+    return backend_files
+
+
+def main():
+    args = parse_args()
+    set_start_method('spawn', force=True)
+    logger = get_root_logger()
+    log_level = logging.getLevelName(args.log_level)
+    logger.setLevel(log_level)
+
+    pipeline_funcs = [
+        torch2onnx, torch2torchscript, extract_models, create_calib_input_data
+    ]
+    PIPELINE_MANAGER.enable_multiprocess(True, pipeline_funcs)
+    PIPELINE_MANAGER.set_log_level(log_level, pipeline_funcs)
+
+    deploy_cfg_paths = args.deploy_cfg
+    model_cfg_path = args.model_cfg
+    checkpoint_path = args.checkpoint
+    num_deploy_cfgs = len(deploy_cfg_paths)
+    cache = None if args.cache_dir is None else ArtifactCache(args.cache_dir)
+
+    # each deploy config is converted in its own work dir if there are many
+    if num_deploy_cfgs == 1:
+        work_dirs = [args.work_dir]
+    else:
+        names = [osp.splitext(osp.basename(p))[0] for p in deploy_cfg_paths]
+        assert len(set(names)) == num_deploy_cfgs, \
+            f'Deploy configs should have different file names, got {names}'
+        work_dirs = [osp.join(args.work_dir, name) for name in names]
+
+    # load deploy_cfg
+    deploy_cfgs = []
+    for deploy_cfg_path in deploy_cfg_paths:
+        deploy_cfg, model_cfg = load_config(deploy_cfg_path, model_cfg_path)
+        deploy_cfgs.append(deploy_cfg)
+
+    for deploy_cfg, work_dir in zip(deploy_cfgs, work_dirs):
+        # create work_dir if not
+        mmengine.mkdir_or_exist(osp.abspath(work_dir))
+
+        if args.dump_info:
+            export2SDK(
+                deploy_cfg,
+                model_cfg,
+                work_dir,
+                pth=checkpoint_path,
+                device=args.device)
+
+    ret_value = mp.Value('d', 0, lock=False)
+
+    # export the IR once for the deploy configs sharing it
+    ir_groups = OrderedDict()
+    for idx, deploy_cfg in enumerate(deploy_cfgs):
+        ir_groups.setdefault(get_ir_key(deploy_cfg), []).append(idx)
+    if len(ir_groups) < num_deploy_cfgs:
+        logger.info(f'Export {len(ir_groups)} IR for '
+                    f'{num_deploy_cfgs} deploy configs.')
+
+    ir_files_list = [None] * num_deploy_cfgs
+    for indices in ir_groups.values():
+        idx = indices[0]
+        ir_files = export_ir(
+            args.img,
+            work_dirs[idx],
+            deploy_cfgs[idx],
+            deploy_cfg_paths[idx],
+            model_cfg,
+            model_cfg_path,
+            checkpoint_path,
+            args.device,
+            cache=cache)
+        for shared_idx in indices:
+            ir_files_list[shared_idx] = share_files(ir_files,
+                                                    work_dirs[shared_idx])
+
+    if args.ir_only:
+        logger.info('IR exported, skip the backend conversion.')
+        return
+
+    # calib data
+    calib_files_list = [[] for _ in range(num_deploy_cfgs)]
+    for idx, deploy_cfg in enumerate(deploy_cfgs):
+        calib_filename = get_calib_filename(deploy_cfg)
+        if calib_filename is not None:
+            calib_path = osp.join(work_dirs[idx], calib_filename)
+            dataset_cfg = None
+            if args.calib_dataset_cfg is not None:
+                dataset_cfg = load_config(args.calib_dataset_cfg)[0]
+            calib_files_list[idx] = run_stage(
+                'create_calib_input_data',
+                create_calib_input_data,
+                args=(calib_path, deploy_cfg_paths[idx], model_cfg_path,
+                      checkpoint_path),
+                kwargs=dict(
+                    dataset_cfg=args.calib_dataset_cfg,
+                    dataset_type='val',
+                    device=args.device),
+                work_dir=work_dirs[idx],
+                outputs=[calib_path],
+                cache=cache,
+                key_files=[checkpoint_path],
+                key_inputs=dict(
+                    deploy_cfg=get_export_config(deploy_cfg),
+                    model_cfg=get_model_config(model_cfg),
+                    dataset_cfg=dataset_cfg,
+                    calib_config=get_calib_config(deploy_cfg),
+                    device=args.device))
+
+    # convert to backend, concurrently if there are many deploy configs
+    backends = [get_backend(deploy_cfg) for deploy_cfg in deploy_cfgs]
     PIPELINE_MANAGER.set_log_level(log_level, [to_backend])
-    if backend == Backend.TENSORRT:
+    if num_deploy_cfgs > 1 or Backend.TENSORRT in backends:
         PIPELINE_MANAGER.enable_multiprocess(True, [to_backend])
-    backend_files = to_backend(
-        backend,
-        ir_files,
-        work_dir=args.work_dir,
-        deploy_cfg=deploy_cfg,
-        log_level=log_level,
-        device=args.device,
-        uri=args.uri)
+    PIPELINE_MANAGER.set_mp_async(num_deploy_cfgs > 1, to_backend)
+    backend_files_list = []
+    backend_keys = [None] * num_deploy_cfgs
+    for idx, deploy_cfg in enumerate(deploy_cfgs):
+        prepare_backend(args, work_dirs[idx], ir_files_list[idx], deploy_cfg,
+                        deploy_cfg_paths[idx], model_cfg, model_cfg_path,
+                        ret_value)
+        if cache is not None:
+            backend_keys[idx] = cache.get_key(
+                'to_backend',
+                files=ir_files_list[idx] + calib_files_list[idx],
+                backend=backends[idx].value,
+                backend_version=get_backend_manager(
+                    backends[idx].value).get_version(),
+                backend_config=get_backend_config(deploy_cfg),
+                ir_config=get_ir_config(deploy_cfg),
+                calib_config=get_calib_config(deploy_cfg),
+                device=get_device_info(args.device))
+            backend_files = cache.fetch(backend_keys[idx], work_dirs[idx])
+            if backend_files is not None:
+                logger.info('to_backend is restored from cache.')
+                backend_files_list.append(backend_files)
+                backend_keys[idx] = None
+                continue
+        backend_files = to_backend(
+            backends[idx],
+            ir_files_list[idx],
+            work_dir=work_dirs[idx],
+            deploy_cfg=deploy_cfg,
+            log_level=log_level,
+            device=args.device,
+            uri=args.uri)
+        backend_files_list.append(backend_files)
+    backend_files_list = [
+        backend_files.get()
+        if isinstance(backend_files, PipelineResult) else backend_files
+        for backend_files in backend_files_list
+    ]
+    for key, backend_files, work_dir in zip(backend_keys, backend_files_list,
+                                            work_dirs):
+        if key is not None:
+            cache.store(key, backend_files, work_dir)
 
     # ncnn quantization
-    if backend == Backend.NCNN and quant:
-        from onnx2ncnn_quant_table import get_table
-
-        from mmdeploy.apis.ncnn import get_quant_model_file, ncnn2int8
-        model_param_paths = backend_files[::2]
-        model_bin_paths = backend_files[1::2]
-        backend_files = []
-        for onnx_path, model_param_path, model_bin_path in zip(
-                ir_files, model_param_paths, model_bin_paths):
-
-            deploy_cfg, model_cfg = load_config(deploy_cfg_path,
-                                                model_cfg_path)
-            quant_onnx, quant_table, quant_param, quant_bin = get_quant_model_file(  # noqa: E501
-                onnx_path, args.work_dir)
-
-            create_process(
-                'ncnn quant table',
-                target=get_table,
-                args=(onnx_path, deploy_cfg, model_cfg, quant_onnx,
-                      quant_table, quant_image_dir, args.device),
-                kwargs=dict(),
-                ret_value=ret_value)
-
-            create_process(
-                'ncnn_int8',
-                target=ncnn2int8,
-                args=(model_param_path, model_bin_path, quant_table,
-                      quant_param, quant_bin),
-                kwargs=dict(),
-                ret_value=ret_value)
-            backend_files += [quant_param, quant_bin]
+    for idx, backend in enumerate(backends):
+        if backend == Backend.NCNN and args.quant:
+            backend_files_list[idx] = quantize_ncnn(args, work_dirs[idx],
+                                                    ir_files_list[idx],
+                                                    backend_files_list[idx],
+                                                    deploy_cfg_paths[idx],
+                                                    model_cfg_path, ret_value)
 
     if args.test_img is None:
         args.test_img = args.img
 
-    extra = dict(
-        backend=backend,
-        output_file=osp.join(args.work_dir, f'output_{backend.value}.jpg'),
-        show_result=args.show)
-    if backend == Backend.SNPE:
-        extra['uri'] = args.uri
-
-    # get backend inference result, try render
-    create_process(
-        f'visualize {backend.value} model',
+    # get backend inference results and pytorch model inference result, try
+    # render them concurrently
+    processes = []
+    for idx, backend in enumerate(backends):
+        extra = dict(
+            backend=backend,
+            output_file=osp.join(work_dirs[idx],
+                                 f'output_{backend.value}.jpg'),
+            show_result=args.show)
+        if backend == Backend.SNPE:
+            extra['uri'] = args.uri
+        name = f'visualize {backend.value} model'
+        if num_deploy_cfgs > 1:
+            name += f' of {osp.basename(deploy_cfg_paths[idx])}'
+        proc_ret_value = mp.Value('d', 0, lock=False)
+        process = start_process(
+            name,
+            target=visualize_model,
+            args=(model_cfg_path, deploy_cfg_paths[idx],
+                  backend_files_list[idx], args.test_img, args.device),
+            kwargs=extra,
+            ret_value=proc_ret_value)
+        processes.append((name, process, proc_ret_value))
+
+    name = 'visualize pytorch model'
+    proc_ret_value = mp.Value('d', 0, lock=False)
+    process = start_process(
+        name,
         target=visualize_model,
-        args=(model_cfg_path, deploy_cfg_path, backend_files, args.test_img,
-              args.device),
-        kwargs=extra,
-        ret_value=ret_value)
-
-    # get pytorch model inference result, try visualize if possible
-    create_process(
-        'visualize pytorch model',
-        target=visualize_model,
-        args=(model_cfg_path, deploy_cfg_path, [checkpoint_path],
+        args=(model_cfg_path, deploy_cfg_paths[0], [checkpoint_path],
               args.test_img, args.device),
         kwargs=dict(
             backend=Backend.PYTORCH,
             output_file=osp.join(args.work_dir, 'output_pytorch.jpg'),
             show_result=args.show),
-        ret_value=ret_value)
+        ret_value=proc_ret_value)
+    processes.append((name, process, proc_ret_value))
+
+    for name, process, proc_ret_value in processes:
+        join_process(name, process, ret_value=proc_ret_value)
     logger.info('All process success.')
 
 
@@ -49,15 +49,14 @@ def main():
 
     logger = get_root_logger(log_level=args.log_level)
 
-    model = onnx.load(args.input_model)
+    model = onnx.load(args.input_model, load_external_data=False)
     marks = collect_avaiable_marks(model)
     logger.info('Available marks:\n    {}'.format('\n    '.join(marks)))
 
-    extracted_model = extract_partition(model, args.start, args.end)
-
     if osp.splitext(args.output_model)[-1] != '.onnx':
         args.output_model += '.onnx'
-    onnx.save(extracted_model, args.output_model)
+    extract_partition(
+        args.input_model, args.start, args.end, save_file=args.output_model)
 
 
 if __name__ == '__main__':
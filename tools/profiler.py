@@ -1,7 +1,12 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import argparse
+import functools
 import glob
 import os.path as osp
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Iterator, Sequence
 
 import numpy as np
 import torch
@@ -9,10 +14,11 @@ from mmengine import DictAction
 from prettytable import PrettyTable
 
 from mmdeploy.apis import build_task_processor
+from mmdeploy.backend.base import BaseWrapper
 from mmdeploy.utils import get_root_logger
 from mmdeploy.utils.config_utils import (Backend, get_backend, get_input_shape,
                                          load_config)
-from mmdeploy.utils.timer import TimeCounter
+from mmdeploy.utils.timer import Profiler, TimeCounter
 
 
 def parse_args():
@@ -58,6 +64,37 @@ def parse_args():
         nargs='+',
         help='the file extensions for input images from `image_dir`.',
         default=['.jpg', '.jpeg', '.png', '.ppm', '.bmp', '.pgm', '.tif'])
+    parser.add_argument(
+        '--num-workers',
+        type=int,
+        default=0,
+        help='the number of workers preparing the inputs in background. '
+        'The inputs are prepared in the main thread if 0.')
+    parser.add_argument(
+        '--worker-type',
+        type=str,
+        default='thread',
+        choices=['thread', 'process'],
+        help='the type of workers preparing the inputs.')
+    parser.add_argument(
+        '--prefetch',
+        type=int,
+        default=2,
+        help='the max number of batches prepared ahead by the workers.')
+    parser.add_argument(
+        '--preload',
+        type=int,
+        default=0,
+        help='prepare this number of batches before testing and reuse them '
+        'in turn, so that only the model is measured.')
+    parser.add_argument(
+        '--export-json', type=str, help='export latency stats to json file.')
+    parser.add_argument(
+        '--export-csv', type=str, help='export latency stats to csv file.')
+    parser.add_argument(
+        '--export-trace',
+        type=str,
+        help='export timeline to file in Chrome trace format.')
     args = parser.parse_args()
     return args
 
@@ -72,6 +109,44 @@ def get_images(image_dir, extensions):
     return images
 
 
+def create_input_data(task_processor, input_shape: Sequence[int],
+                      imgs: Sequence[str]):
+    """Create the model inputs of a batch of images.
+
+    The data preprocessor is not applied since it runs in `test_step`.
+    """
+    data, _ = task_processor.create_input(
+        imgs, input_shape, data_preprocessor=None)
+    return data
+
+
+def prefetch(create_input: Callable, batches: Sequence, num_workers: int,
+             worker_type: str, num_prefetch: int) -> Iterator:
+    """Prepare the inputs of the batches in background workers.
+
+    At most `num_prefetch` batches are prepared ahead and the inputs are
+    yielded in order.
+    """
+    if num_workers == 0:
+        for batch in batches:
+            yield create_input(batch)
+        return
+
+    executor_type = ThreadPoolExecutor if worker_type == 'thread' \
+        else ProcessPoolExecutor
+    with executor_type(num_workers) as executor:
+        batch_iter = iter(batches)
+        futures = deque(
+            executor.submit(create_input, batch)
+            for _, batch in zip(range(max(num_prefetch, 1)), batch_iter))
+        while len(futures) > 0:
+            data = futures.popleft().result()
+            for batch in batch_iter:
+                futures.append(executor.submit(create_input, batch))
+                break
+            yield data
+
+
 class TorchWrapper(torch.nn.Module):
 
     def __init__(self, model):
@@ -84,6 +159,91 @@ class TorchWrapper(torch.nn.Module):
         return self.model.test_step(*args, **kwargs)
 
 
+def profile_method(profiler: Profiler, obj, method_name: str, scope_name: str):
+    """Time a method of an object as a profiler scope.
+
+    Recursive calls of the method are timed as a single scope.
+    """
+    func = getattr(obj, method_name)
+    depth = [0]
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if depth[0] > 0:
+            return func(*args, **kwargs)
+        depth[0] += 1
+        try:
+            with profiler.scope(scope_name):
+                return func(*args, **kwargs)
+        finally:
+            depth[0] -= 1
+
+    setattr(obj, method_name, wrapper)
+
+
+def profile_stages(profiler: Profiler, model: torch.nn.Module):
+    """Time the stages of the inference as profiler scopes.
+
+    The stages are the pipeline transforms (including image decoding), the
+    data preprocessor, the host to device transfer, the backend and the
+    postprocessing. The postprocessing is the time of the model forward
+    excluding the backend.
+    """
+    from mmcv.transforms import BaseTransform, Compose
+
+    transform_call = BaseTransform.__call__
+
+    @functools.wraps(transform_call)
+    def profile_transform(self, results):
+        if isinstance(self, Compose):
+            return transform_call(self, results)
+        with profiler.scope(type(self).__name__):
+            return transform_call(self, results)
+
+    BaseTransform.__call__ = profile_transform
+
+    data_preprocessor = getattr(model, 'data_preprocessor', None)
+    if isinstance(data_preprocessor, torch.nn.Module):
+        profile_method(profiler, data_preprocessor, 'forward', 'preprocess')
+        if hasattr(data_preprocessor, 'cast_data'):
+            profile_method(profiler, data_preprocessor, 'cast_data',
+                           'to_device')
+
+    wrappers = [_ for _ in model.modules() if isinstance(_, BaseWrapper)]
+    if len(wrappers) == 0:
+        profile_method(profiler, model, 'forward', 'forward')
+        return
+
+    backend_time = [0.]
+    for wrapper in wrappers:
+        wrapper_forward = wrapper.forward
+
+        @functools.wraps(wrapper_forward)
+        def profile_backend(*args, wrapper_forward=wrapper_forward, **kwargs):
+            start = time.perf_counter()
+            with profiler.scope('backend'):
+                outputs = wrapper_forward(*args, **kwargs)
+            backend_time[0] += time.perf_counter() - start
+            return outputs
+
+        wrapper.forward = profile_backend
+
+    model_forward = model.forward
+
+    @functools.wraps(model_forward)
+    def profile_forward(*args, **kwargs):
+        backend_time[0] = 0.
+        with profiler.scope('forward'):
+            start = time.perf_counter()
+            outputs = model_forward(*args, **kwargs)
+            elapsed = time.perf_counter() - start
+            profiler.record('postprocess', start + backend_time[0],
+                            elapsed - backend_time[0])
+        return outputs
+
+    model.forward = profile_forward
+
+
 def main():
     args = parse_args()
     deploy_cfg_path = args.deploy_cfg
@@ -139,18 +299,35 @@ def main():
                                       nrof_image)
         ]
     image_files = image_files[:total_nrof_image]
+    profiler = Profiler(with_sync=with_sync)
+    profile_stages(profiler, model.model if is_pytorch else model)
+    batches = [
+        image_files[i:(i + args.batch_size)]
+        for i in range(0, total_nrof_image, args.batch_size)
+    ]
+    create_input = functools.partial(create_input_data, task_processor,
+                                     input_shape)
+    if args.preload > 0:
+        preloaded = [create_input(batch) for batch in batches[:args.preload]]
+        inputs = iter(preloaded[i % len(preloaded)]
+                      for i in range(len(batches)))
+    else:
+        inputs = prefetch(create_input, batches, args.num_workers,
+                          args.worker_type, args.prefetch)
     with TimeCounter.activate(
             warmup=args.warmup,
             log_interval=20,
             with_sync=with_sync,
-            batch_size=args.batch_size):
-        for i in range(0, total_nrof_image, args.batch_size):
-            batch_files = image_files[i:(i + args.batch_size)]
-            data, _ = task_processor.create_input(
-                batch_files,
-                input_shape,
-                data_preprocessor=getattr(model, 'data_preprocessor', None))
-            model.test_step(data)
+            batch_size=args.batch_size,
+            profiler=profiler):
+        for i in range(len(batches)):
+            if i == args.warmup:
+                profiler.reset()
+            # the time waiting for the prefetched inputs if with workers
+            with profiler.scope('create_input'):
+                data = next(inputs)
+            with profiler.scope('test_step'):
+                model.test_step(data)
 
     print('----- Settings:')
     settings = PrettyTable()
@@ -159,9 +336,19 @@ def main():
     settings.add_row(['shape', f'{input_shape[1]}x{input_shape[0]}'])
     settings.add_row(['iterations', args.num_iter])
     settings.add_row(['warmup', args.warmup])
+    settings.add_row(['workers', f'{args.num_workers} {args.worker_type}'])
+    settings.add_row(['preload', args.preload])
     print(settings)
     print('----- Results:')
     TimeCounter.print_stats(backend)
+    print('----- Stages:')
+    profiler.print_stats(batch_size=args.batch_size)
+    if args.export_json:
+        profiler.export_json(args.export_json)
+    if args.export_csv:
+        profiler.export_csv(args.export_csv)
+    if args.export_trace:
+        profiler.export_chrome_trace(args.export_trace)
 
 
 if __name__ == '__main__':
@@ -1,24 +1,32 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import argparse
+import copy
 import glob
+import hashlib
+import json
 import logging
 import os
+import queue
+import signal
 import subprocess
+import threading
+from collections import OrderedDict
 from datetime import datetime
+from functools import partial
 from pathlib import Path
-from typing import List, Union
+from typing import Callable, Dict, List, Optional, Sequence, Union
 
 import mmengine
 import openpyxl
 import pandas as pd
 import yaml
-from torch.hub import download_url_to_file
 from torch.multiprocessing import set_start_method
 from tqdm import tqdm
 
 import mmdeploy.version
+from mmdeploy.apis.core.cache import get_export_config
 from mmdeploy.utils import (get_backend, get_codebase, get_root_logger,
-                            is_dynamic_shape)
+                            is_dynamic_shape, load_config)
 
 
 def parse_args():
@@ -51,11 +59,61 @@ def parse_args():
         type=str,
         help='the dir to save checkpoint for all model',
         default='../mmdeploy_checkpoints')
+    parser.add_argument(
+        '--cache-dir',
+        type=str,
+        help='the dir to cache the outputs of conversion stages, stages '
+        'that have been done are skipped when the tests are run again. '
+        '`cache` in the work dir by default',
+        default=None)
     parser.add_argument(
         '--device',
         type=str,
         help='Device type, cuda:id or cpu, cuda:0 as default',
         default='cuda:0')
+    parser.add_argument(
+        '--cpus',
+        type=int,
+        help='the number of CPU cores shared by the concurrent jobs, '
+        'all the cores by default',
+        default=os.cpu_count())
+    parser.add_argument(
+        '--gpus',
+        type=int,
+        help='the number of GPUs shared by the concurrent jobs, the GPU of '
+        '`--device` by default. The jobs run on cpu if it is 0',
+        default=None)
+    parser.add_argument(
+        '--ram',
+        type=float,
+        help='the RAM in GB shared by the concurrent jobs, all the physical '
+        'memory by default',
+        default=None)
+    parser.add_argument(
+        '--cpus-per-job',
+        type=int,
+        help='the number of CPU cores used by each job',
+        default=4)
+    parser.add_argument(
+        '--ram-per-job',
+        type=float,
+        help='the RAM in GB used by each job',
+        default=8)
+    parser.add_argument(
+        '--timeout',
+        type=float,
+        help='the timeout of each job in seconds, no timeout by default',
+        default=None)
+    parser.add_argument(
+        '--retries',
+        type=int,
+        help='the number of times to retry a failed job',
+        default=0)
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='resume the interrupted run, the jobs succeeded in the state '
+        'file of the work dir are not run again')
     parser.add_argument(
         '--log-level',
         help='set log level',
@@ -181,26 +239,35 @@ def get_model_metafile_info(global_info: dict, model_info: dict,
         # get meta info
         model_meta_info.update({meta_model.get('Config'): meta_model})
 
-        # get weight url
-        weights_url = meta_model.get('Weights')
-        weights_name = str(weights_url).split('/')[-1]
-        weights_save_path = checkpoint_save_dir.joinpath(weights_name)
-        if weights_save_path.exists() and \
-                not global_info.get('checkpoint_force_download', False):
-            logger.info(f'model {weights_name} exist, skip download it...')
-            continue
+    return model_meta_info, checkpoint_save_dir, codebase_dir
 
-        # Download weight
-        logger.info(f'Downloading {weights_url} to {weights_save_path}')
-        download_url_to_file(
-            weights_url, str(weights_save_path), progress=True)
 
-        # check weather the weight download successful
-        if not weights_save_path.exists():
-            raise FileExistsError(f'Weight {weights_name} download fail')
+def download_checkpoint(weights_url: str,
+                        weights_save_path: Path,
+                        log_path: Path,
+                        env: Optional[Dict[str, str]] = None,
+                        timeout: Optional[float] = None) -> int:
+    """Download the checkpoint in a subprocess, which is killed if it
+    times out.
 
-    logger.info('All models had been downloaded successful !')
-    return model_meta_info, checkpoint_save_dir, codebase_dir
+    Args:
+        weights_url (str): The url of the checkpoint.
+        weights_save_path (Path): The path to save the checkpoint.
+        log_path (Path): Path to log file.
+        env (dict[str, str] | None): The environment variables of the
+            command. Defaults to None.
+        timeout (float | None): The timeout in seconds. Defaults to None.
+
+    Returns:
+        int: error code.
+    """
+    # `download_url_to_file` moves the downloaded file to the path at last
+    cmd_lines = [
+        'python3 -c', '"from torch.hub import download_url_to_file; '
+        f"download_url_to_file('{weights_url}', '{weights_save_path}', "
+        'progress=False)"'
+    ]
+    return run_cmd(cmd_lines, log_path, env=env, timeout=timeout)
 
 
 def update_report(report_dict: dict, model_name: str, model_config: str,
@@ -262,8 +329,7 @@ def update_report(report_dict: dict, model_name: str, model_config: str,
 
 def get_pytorch_result(model_name: str, meta_info: dict, checkpoint_path: Path,
                        model_config_path: Path, model_config_name: str,
-                       test_yaml_metric_info: dict, report_dict: dict,
-                       logger: logging.Logger, report_txt_path: Path,
+                       test_yaml_metric_info: dict, logger: logging.Logger,
                        codebase_name: str):
     """Get metric from metafile info of the model.
 
@@ -274,13 +340,14 @@ def get_pytorch_result(model_name: str, meta_info: dict, checkpoint_path: Path,
         model_config_path (Path): Model config path.
         model_config_name (str): Name of model config in meta_info.
         test_yaml_metric_info (dict): Metrics info from test yaml.
-        report_dict (dict): Report info dict.
         logger (logging.Logger): Logger.
-        report_txt_path (Path): Report txt path.
         codebase_name (str): Codebase name.
 
     Returns:
         Dict: metric info of the model
+        Dict: dataset info of the model
+        Dict: the row of the model in the report, the arguments of
+            :func:`update_report`.
     """
 
     if model_config_name not in meta_info:
@@ -344,9 +411,7 @@ def get_pytorch_result(model_name: str, meta_info: dict, checkpoint_path: Path,
     logger.info(f'Got metric_list = {metric_list} ')
     logger.info(f'Got pytorch_metric = {pytorch_metric} ')
 
-    # update report
-    update_report(
-        report_dict=report_dict,
+    report_row = dict(
         model_name=model_name,
         model_config=str(model_config_path),
         task_name=task_type,
@@ -360,12 +425,11 @@ def get_pytorch_result(model_name: str, meta_info: dict, checkpoint_path: Path,
         fps=fps,
         metric_info=metric_list,
         test_pass='-',
-        report_txt_path=report_txt_path,
         codebase_name=codebase_name)
 
     logger.info(f'Got {model_config_path} metric: {valid_pytorch_metric}')
     dataset_info = dict(dataset=dataset_type, task=task_type)
-    return valid_pytorch_metric, dataset_info
+    return valid_pytorch_metric, dataset_info, report_row
 
 
 def parse_test_log(work_dir: str) -> dict:
@@ -447,37 +511,22 @@ def get_fps_metric(shell_res: int, pytorch_metric: dict, metric_info: dict,
     return fps, output_result, test_pass
 
 
-def get_backend_fps_metric(deploy_cfg_path: str, model_cfg_path: Path,
-                           convert_checkpoint_path: str, device_type: str,
-                           logger: logging.Logger, pytorch_metric: dict,
-                           metric_info: dict, backend_name: str,
-                           precision_type: str, convert_result: bool,
-                           report_dict: dict, infer_type: str, log_path: Path,
-                           dataset_info: dict, report_txt_path: Path,
-                           model_name: str):
-    """Get backend fps and metric.
+def get_test_cmd_lines(deploy_cfg_path: str, model_cfg_path: Path,
+                       convert_checkpoint_path: str, device_type: str,
+                       log_path: Path) -> List[str]:
+    """Get the command to test the converted model.
 
     Args:
         deploy_cfg_path (str): Deploy config path.
         model_cfg_path (Path): Model config path.
         convert_checkpoint_path (str): Converted checkpoint path.
-        device_type (str): Device for converting.
-        logger (logging.Logger): Logger handler.
-        pytorch_metric (dict): Pytorch metric info dict get from metafile.
-        metric_info (dict): Metric info from test yaml.
-        backend_name (str): Backend name.
-        precision_type (str): Precision type for evaluation.
-        convert_result (bool): Backend convert result.
-        report_dict (dict): Backend convert result.
-        infer_type (str): Infer type.
+        device_type (str): Device for testing.
         log_path (Path): Logger save path.
-        dataset_info (dict): Dataset info.
-        report_txt_path (Path): report txt save path.
-        model_name (str): Name of model in test yaml.
+
+    Returns:
+        List[str]: The command in multiple line style.
     """
     work_dir = log_path.parent.joinpath('test_logs')
-    if not work_dir.exists():
-        work_dir.mkdir(parents=True, exist_ok=True)
     cmd_lines = [
         'python3 tools/test.py', f'{deploy_cfg_path}', f'{model_cfg_path}',
         f'--model {convert_checkpoint_path}', f'--work-dir "{work_dir}"',
@@ -492,9 +541,65 @@ def get_backend_fps_metric(deploy_cfg_path: str, model_cfg_path: Path,
                       'val_dataloader.num_workers=0 ' \
                       'val_dataloader.persistent_workers=False '
         cmd_lines.append(f'--cfg-options {cfg_options}')
+    return cmd_lines
 
-    # Test backend
-    return_code = run_cmd(cmd_lines, log_path)
+
+def run_test_cmd(cmd_lines: List[str],
+                 log_path: Path,
+                 sdk_model_path: Optional[Path] = None,
+                 env: Optional[Dict[str, str]] = None,
+                 timeout: Optional[float] = None) -> int:
+    """Test the converted model.
+
+    Args:
+        cmd_lines: (list[str]): The test command in multiple line style.
+        log_path (Path): Logger save path.
+        sdk_model_path (Path | None): The SDK model whose `topk` is replaced
+            with `num_classes` before the test. Defaults to None.
+        env (dict[str, str] | None): The environment variables of the
+            command. Defaults to None.
+        timeout (float | None): The timeout in seconds. Defaults to None.
+
+    Returns:
+        int: error code.
+    """
+    if sdk_model_path is not None:
+        replace_top_in_pipeline_json(sdk_model_path, get_root_logger())
+    log_path.parent.joinpath('test_logs').mkdir(parents=True, exist_ok=True)
+    return run_cmd(cmd_lines, log_path, env=env, timeout=timeout)
+
+
+def get_backend_fps_metric(deploy_cfg_path: str, model_cfg_path: Path,
+                           convert_checkpoint_path: str,
+                           logger: logging.Logger, pytorch_metric: dict,
+                           metric_info: dict, backend_name: str,
+                           precision_type: str, convert_result: bool,
+                           return_code: int, infer_type: str, log_path: Path,
+                           dataset_info: dict, model_name: str) -> dict:
+    """Get backend fps and metric.
+
+    Args:
+        deploy_cfg_path (str): Deploy config path.
+        model_cfg_path (Path): Model config path.
+        convert_checkpoint_path (str): Converted checkpoint path.
+        logger (logging.Logger): Logger handler.
+        pytorch_metric (dict): Pytorch metric info dict get from metafile.
+        metric_info (dict): Metric info from test yaml.
+        backend_name (str): Backend name.
+        precision_type (str): Precision type for evaluation.
+        convert_result (bool): Backend convert result.
+        return_code (int): The return code of the test: 0 is success.
+        infer_type (str): Infer type.
+        log_path (Path): Logger save path.
+        dataset_info (dict): Dataset info.
+        model_name (str): Name of model in test yaml.
+
+    Returns:
+        dict: The row of the model in the report, the arguments of
+            :func:`update_report`.
+    """
+    work_dir = log_path.parent.joinpath('test_logs')
+    codebase_name = get_codebase(str(deploy_cfg_path)).value
     fps, backend_metric, test_pass = get_fps_metric(return_code,
                                                     pytorch_metric,
                                                     metric_info, work_dir)
@@ -507,9 +612,7 @@ def get_backend_fps_metric(deploy_cfg_path: str, model_cfg_path: Path,
         metric_list.append({metric: value})
     dataset_type = dataset_info['dataset']
     task_name = dataset_info['task']
-    # update the report
-    update_report(
-        report_dict=report_dict,
+    return dict(
         model_name=model_name,
         model_config=str(model_cfg_path),
         task_name=task_name,
@@ -523,7 +626,6 @@ def get_backend_fps_metric(deploy_cfg_path: str, model_cfg_path: Path,
         fps=fps,
         metric_info=metric_list,
         test_pass=str(test_pass),
-        report_txt_path=report_txt_path,
         codebase_name=codebase_name)
 
 
@@ -576,20 +678,38 @@ def replace_top_in_pipeline_json(backend_output_path: Path,
     logger.info('replace done')
 
 
-def gen_log_path(backend_output_path: Path, log_name: str):
-    if not backend_output_path.exists():
-        backend_output_path.mkdir(parents=True, exist_ok=True)
-    log_path = backend_output_path.joinpath(log_name)
-    if log_path.exists():
-        os.remove(str(log_path))
-    return log_path
+# the processes of the running commands, which are killed on interruption
+_running_processes = set()
+_running_processes_lock = threading.Lock()
 
 
-def run_cmd(cmd_lines: List[str], log_path: Path):
+def kill_process(process: subprocess.Popen):
+    """Kill the process of a command and its children.
+
+    Args:
+        process (subprocess.Popen): The process started by :func:`run_cmd`.
+    """
+    if process.poll() is not None:
+        return
+    if hasattr(os, 'killpg'):
+        # the command runs in its own process group
+        os.killpg(process.pid, signal.SIGKILL)
+    else:
+        subprocess.run(['taskkill', '/F', '/T', '/PID', str(process.pid)])
+
+
+def run_cmd(cmd_lines: List[str],
+            log_path: Path,
+            env: Optional[Dict[str, str]] = None,
+            timeout: Optional[float] = None):
     """
     Args:
         cmd_lines: (list[str]): A command in multiple line style.
         log_path (Path): Path to log file.
+        env (dict[str, str] | None): The environment variables of the
+            command. Defaults to None, which inherits the current ones.
+        timeout (float | None): The timeout of the command in seconds, the
+            command is killed if it times out. Defaults to None.
 
     Returns:
         int: error code.
@@ -620,8 +740,20 @@ def run_cmd(cmd_lines: List[str], log_path: Path):
             cwd=str(Path(__file__).absolute().parent.parent),
             shell=True,
             stdout=file_handler,
-            stderr=file_handler)
-        process_res.wait()
+            stderr=file_handler,
+            env=env,
+            start_new_session=system != 'windows')
+        with _running_processes_lock:
+            _running_processes.add(process_res)
+        try:
+            process_res.wait(timeout)
+        except subprocess.TimeoutExpired:
+            logger.error(f'Timeout after {timeout}s, kill cmd\n{cmd_for_log}')
+            kill_process(process_res)
+            process_res.wait()
+        finally:
+            with _running_processes_lock:
+                _running_processes.discard(process_res)
         return_code = process_res.returncode
 
     if return_code != 0:
@@ -632,17 +764,287 @@ def run_cmd(cmd_lines: List[str], log_path: Path):
     return return_code
 
 
-def get_backend_result(pipeline_info: dict, model_cfg_path: Path,
-                       checkpoint_path: Path, work_dir: Path, device_type: str,
-                       pytorch_metric: dict, metric_info: dict,
-                       report_dict: dict, test_type: str,
-                       logger: logging.Logger, backend_file_name: Union[str,
-                                                                        list],
-                       report_txt_path: Path, metafile_dataset: str,
-                       model_name: str):
-    """Convert model to onnx and then get metric.
+class Job:
+    """A job of the regression test, such as downloading a checkpoint or
+    converting a model.
+
+    Args:
+        name (str): The unique name of the job, which is also the key of its
+            state in the state file.
+        func (Callable): The function of the job, which returns the error
+            code. The environment variables and the timeout of the job are
+            passed to it as the keyword arguments `env` and `timeout`.
+        deps (Sequence[str]): The names of the jobs that should succeed
+            before the job starts. Defaults to ().
+        cpus (int): The number of CPU cores used by the job. Defaults to 1.
+        gpus (int): The number of GPUs used by the job. Defaults to 0.
+        ram (float): The RAM in GB used by the job. Defaults to 0.
+        timeout (float | None): The timeout of the job in seconds.
+            Defaults to None.
+        retries (int): The number of times to retry the job if it fails.
+            Defaults to 0.
+    """
+
+    def __init__(self,
+                 name: str,
+                 func: Callable,
+                 deps: Sequence[str] = (),
+                 cpus: int = 1,
+                 gpus: int = 0,
+                 ram: float = 0.,
+                 timeout: Optional[float] = None,
+                 retries: int = 0):
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.cpus = cpus
+        self.gpus = gpus
+        self.ram = ram
+        self.timeout = timeout
+        self.retries = retries
+
+
+class JobScheduler:
+    """Run the jobs concurrently in the order of their dependencies.
+
+    A job starts once the jobs it depends on have succeeded and there are
+    enough free CPU cores, GPUs and RAM for it. The jobs are started in the
+    order they are added, and a job that does not fit lets the later ones
+    run first. The GPUs of a job are given by `CUDA_VISIBLE_DEVICES`, and
+    the threads of a job are limited to its CPU cores.
+
+    The state of each finished job is saved in the state file, so that an
+    interrupted run can be resumed without running the succeeded jobs again.
+
+    Args:
+        cpus (int): The number of CPU cores.
+        gpu_ids (Sequence[int]): The ids of the GPUs, which can be empty.
+        ram (float): The RAM in GB.
+        state_file (Path | None): The path to save the states of the jobs.
+            Defaults to None.
+        resume (bool): Whether to skip the jobs succeeded in the state file.
+            Defaults to False.
+    """
+
+    def __init__(self,
+                 cpus: int,
+                 gpu_ids: Sequence[int],
+                 ram: float,
+                 state_file: Optional[Path] = None,
+                 resume: bool = False):
+        self.cpus = cpus
+        self.gpu_ids = list(gpu_ids)
+        self.ram = ram
+        self.state_file = state_file
+        self.jobs = OrderedDict()
+        self.states = dict()
+        if resume and state_file is not None and state_file.exists():
+            with open(state_file) as f:
+                self.states = {
+                    name: state
+                    for name, state in json.load(f).items() if state == 'done'
+                }
+
+        # the GPU ids are relative to the visible devices of this process
+        visible_devices = os.environ.get('CUDA_VISIBLE_DEVICES')
+        if visible_devices:
+            visible_devices = visible_devices.split(',')
+            self._device_names = [visible_devices[i] for i in self.gpu_ids]
+        else:
+            self._device_names = [str(i) for i in self.gpu_ids]
+
+    def add(self, job: Job) -> str:
+        """Add a job, the jobs it depends on should be added before it. A
+        job with the name of an added job is ignored.
+
+        Args:
+            job (Job): The job to add.
+
+        Returns:
+            str: The name of the job.
+        """
+        if job.name not in self.jobs:
+            for dep in job.deps:
+                assert dep in self.jobs, f'{dep} of {job.name} is not added.'
+            self.jobs[job.name] = job
+        return job.name
+
+    def _save_states(self):
+        if self.state_file is None:
+            return
+        tmp_file = self.state_file.with_suffix('.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(self.states, f, indent=4)
+        os.replace(tmp_file, self.state_file)
+
+    def _run_job(self, job: Job, cpus: int, device_names: List[str],
+                 finished: queue.Queue):
+        logger = get_root_logger()
+        env = os.environ.copy()
+        for key in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS',
+                    'OPENBLAS_NUM_THREADS'):
+            env[key] = str(cpus)
+        # hide the GPUs from the cpu jobs
+        env['CUDA_VISIBLE_DEVICES'] = ','.join(device_names)
+
+        state = 'failed'
+        for attempt in range(job.retries + 1):
+            if attempt > 0:
+                logger.warning(f'Retry {job.name}, attempt {attempt} of '
+                               f'{job.retries}.')
+            try:
+                return_code = job.func(env=env, timeout=job.timeout)
+            except Exception as e:
+                logger.error(f'{job.name} failed with {e!r}')
+                return_code = -1
+            if return_code == 0:
+                state = 'done'
+                break
+        finished.put((job.name, state))
+
+    def run(self) -> Dict[str, str]:
+        """Run the jobs until all of them are finished.
+
+        Returns:
+            Dict[str, str]: The states of the jobs, 'done' if a job
+                succeeded, 'failed' if it failed, or 'skipped' if a job it
+                depends on did not succeed.
+        """
+        logger = get_root_logger()
+        pending = [name for name in self.jobs if name not in self.states]
+        num_jobs = len(self.jobs)
+        if len(pending) < num_jobs:
+            logger.info(f'Resume {len(pending)} of {num_jobs} jobs.')
+        free_cpus, free_ram = self.cpus, self.ram
+        free_devices = list(self._device_names)
+        running = dict()
+        finished = queue.Queue()
+        try:
+            while len(pending) > 0 or len(running) > 0:
+                for name in list(pending):
+                    job = self.jobs[name]
+                    dep_states = [self.states.get(dep) for dep in job.deps]
+                    dep_failed = [
+                        state in ('failed', 'skipped') for state in dep_states
+                    ]
+                    if any(dep_failed):
+                        logger.warning(f'Skip {name} since the jobs it '
+                                       'depends on did not succeed.')
+                        self.states[name] = 'skipped'
+                        pending.remove(name)
+                        continue
+                    if any(state != 'done' for state in dep_states):
+                        continue
+
+                    if job.gpus > len(self._device_names):
+                        logger.error(f'{name} needs {job.gpus} GPUs, but '
+                                     f'only {len(self._device_names)} '
+                                     'are given.')
+                        self.states[name] = 'failed'
+                        pending.remove(name)
+                        continue
+                    # a job larger than the machine runs alone
+                    cpus = min(job.cpus, self.cpus)
+                    ram = min(job.ram, self.ram)
+                    if cpus > free_cpus or ram > free_ram or \
+                            job.gpus > len(free_devices):
+                        continue
+
+                    devices = free_devices[:job.gpus]
+                    del free_devices[:job.gpus]
+                    free_cpus -= cpus
+                    free_ram -= ram
+                    running[name] = (cpus, ram, devices)
+                    pending.remove(name)
+                    logger.info(f'Start {name}.')
+                    threading.Thread(
+                        target=self._run_job,
+                        args=(job, cpus, devices, finished),
+                        daemon=True).start()
+
+                self._save_states()
+                if len(running) == 0:
+                    continue
+                name, state = finished.get()
+                cpus, ram, devices = running.pop(name)
+                free_cpus += cpus
+                free_ram += ram
+                free_devices += devices
+                self.states[name] = state
+                logger.info(f'[{len(self.states)}/{num_jobs}] {name} {state}.')
+        except KeyboardInterrupt:
+            logger.error('Interrupted, kill the running jobs. Resume the '
+                         'run with `--resume`.')
+            with _running_processes_lock:
+                for process in _running_processes:
+                    kill_process(process)
+            raise
+        finally:
+            self._save_states()
+        return self.states
+
+
+def get_backend_report(states: Dict[str, str], convert_job: str,
+                       test_jobs: List[tuple], convert_row: dict,
+                       logger: logging.Logger) -> List[dict]:
+    """Get the rows of a pipeline in the report from the states of its jobs.
+
+    Args:
+        states (Dict[str, str]): The states of the jobs.
+        convert_job (str): The name of the job to convert the model.
+        test_jobs (List[tuple]): The names of the jobs to test the model,
+            with the arguments of :func:`get_backend_fps_metric`.
+        convert_row (dict): The row in the report if the model is not
+            tested.
+        logger (logging.Logger): Logger.
+
+    Returns:
+        List[dict]: The rows in the report, the arguments of
+            :func:`update_report`.
+    """
+    convert_result = states.get(convert_job) == 'done'
+    logger.info(f'Got convert_result = {convert_result}')
+    if convert_result and len(test_jobs) > 0:
+        return [
+            get_backend_fps_metric(
+                convert_result=convert_result,
+                return_code=0 if states.get(test_job) == 'done' else 1,
+                logger=logger,
+                **kwargs) for test_job, kwargs in test_jobs
+        ]
+
+    logger.info('Only test convert, saving to report...')
+    return [
+        dict(
+            convert_row,
+            conversion_result=str(convert_result),
+            test_pass=str(convert_result))
+    ]
+
+
+def add_backend_jobs(scheduler: JobScheduler,
+                     pipeline_info: dict,
+                     model_cfg_path: Path,
+                     checkpoint_path: Path,
+                     work_dir: Path,
+                     device_type: str,
+                     pytorch_metric: dict,
+                     metric_info: dict,
+                     test_type: str,
+                     logger: logging.Logger,
+                     backend_file_name: Union[str, list],
+                     metafile_dataset: dict,
+                     model_name: str,
+                     cache_dir: str,
+                     deps: Sequence[str] = (),
+                     job_cfg: Optional[dict] = None) -> Callable:
+    """Add the jobs to convert the model and then test it.
+
+    The IR is exported by its own job, and restored from the cache by the
+    conversion, so the pipelines sharing the IR export it only once.
 
     Args:
+        scheduler (JobScheduler): The scheduler to run the jobs.
         pipeline_info (dict):  Pipeline info of test yaml.
         model_cfg_path (Path): Model config file path.
         checkpoint_path (Path): Checkpoints path.
@@ -650,14 +1052,25 @@ def get_backend_result(pipeline_info: dict, model_cfg_path: Path,
         device_type (str): A string specifying device, defaults to 'cuda'.
         pytorch_metric (dict): All pytorch metric info.
         metric_info (dict): Metrics info.
-        report_dict (dict): Report info dict.
         test_type (str): Test type. 'precision' or 'convert'.
         logger (logging.Logger): Logger.
         backend_file_name (str | list): backend file save name.
-        report_txt_path (Path): report txt path.
-        metafile_dataset (str): Dataset type get from metafile.
+        metafile_dataset (dict): Dataset type get from metafile.
         model_name (str): Name of model in test yaml.
+        cache_dir (str): The dir to cache the conversion outputs.
+        deps (Sequence[str]): The jobs to finish before the conversion, such
+            as downloading the checkpoint. Defaults to ().
+        job_cfg (dict | None): The other arguments of :class:`Job`, such as
+            `cpus` and `timeout`. Defaults to None.
+
+    Returns:
+        Callable: The function to get the rows of the pipeline in the report
+            from the states of the jobs, see :func:`get_backend_report`.
     """
+    job_cfg = dict() if job_cfg is None else job_cfg
+    # the tolerances of the pipeline do not affect the others
+    metric_info = copy.deepcopy(metric_info)
+
     # get backend_test info
     backend_test = pipeline_info.get('backend_test', False)
 
@@ -716,8 +1129,39 @@ def get_backend_result(pipeline_info: dict, model_cfg_path: Path,
                  infer_type,
                  precision_type,
                  Path(checkpoint_path).stem)
+    if f'convert:{backend_output_path}' in scheduler.jobs:
+        # the concurrent pipelines should not share the work dir
+        backend_output_path = backend_output_path.joinpath(
+            deploy_cfg_path.stem)
     backend_output_path.mkdir(parents=True, exist_ok=True)
 
+    # export the IR into the cache
+    deploy_cfg = load_config(str(deploy_cfg_path))[0]
+    ir_key = json.dumps(
+        dict(
+            ir=get_export_config(deploy_cfg),
+            model_cfg=str(model_cfg_path),
+            checkpoint=str(checkpoint_path),
+            img=input_img_path,
+            device=device_type),
+        sort_keys=True,
+        default=str)
+    ir_hash = hashlib.sha256(ir_key.encode()).hexdigest()[:16]
+    export_lines = [
+        'python3 ./tools/deploy.py', f'{deploy_cfg_path}', f'{model_cfg_path}',
+        f'"{checkpoint_path}"', f'"{input_img_path}"',
+        f'--work-dir "{backend_output_path}"', f'--device {device_type}',
+        '--log-level INFO', f'--cache-dir "{cache_dir}"', '--ir-only'
+    ]
+    gpus = 0 if device_type == 'cpu' else 1
+    export_job = scheduler.add(
+        Job(f'export:{Path(checkpoint_path).stem}:{ir_hash}',
+            partial(run_cmd, export_lines,
+                    backend_output_path.joinpath('export_log.txt')),
+            deps=deps,
+            gpus=gpus,
+            **job_cfg))
+
     # convert cmd lines
     cmd_lines = [
         'python3 ./tools/deploy.py', f'{deploy_cfg_path}', f'{model_cfg_path}',
@@ -737,10 +1181,15 @@ def get_backend_result(pipeline_info: dict, model_cfg_path: Path,
         if calib_dataset_cfg is not None:
             cmd_lines += [f'--calib-dataset-cfg {calib_dataset_cfg}']
 
+    cmd_lines += [f'--cache-dir "{cache_dir}"']
+
     convert_log_path = backend_output_path.joinpath('convert_log.txt')
-    return_code = run_cmd(cmd_lines, convert_log_path)
-    convert_result = return_code == 0
-    logger.info(f'Got convert_result = {convert_result}')
+    convert_job = scheduler.add(
+        Job(f'convert:{backend_output_path}',
+            partial(run_cmd, cmd_lines, convert_log_path),
+            deps=[export_job],
+            gpus=gpus,
+            **job_cfg))
 
     if isinstance(backend_file_name, list):
         report_checkpoint = backend_output_path.joinpath(backend_file_name[0])
@@ -753,85 +1202,89 @@ def get_backend_result(pipeline_info: dict, model_cfg_path: Path,
         convert_checkpoint_path = \
             str(backend_output_path.joinpath(backend_file_name))
 
+    test_kwargs = dict(
+        model_cfg_path=model_cfg_path,
+        pytorch_metric=pytorch_metric,
+        metric_info=metric_info,
+        precision_type=precision_type,
+        infer_type=infer_type,
+        dataset_info=metafile_dataset,
+        model_name=model_name)
+
     # Test the model
-    if convert_result and test_type == 'precision':
+    test_jobs = []
+    if test_type == 'precision':
         # test the model metric
         if backend_test:
-            log_path = \
-                gen_log_path(backend_output_path.joinpath('backend'),
-                             'test_log.txt')
-
-            get_backend_fps_metric(
-                deploy_cfg_path=str(deploy_cfg_path),
-                model_cfg_path=model_cfg_path,
-                convert_checkpoint_path=convert_checkpoint_path,
-                device_type=device_type,
-                logger=logger,
-                pytorch_metric=pytorch_metric,
-                metric_info=metric_info,
-                backend_name=backend_name,
-                precision_type=precision_type,
-                convert_result=convert_result,
-                report_dict=report_dict,
-                infer_type=infer_type,
-                log_path=log_path,
-                dataset_info=metafile_dataset,
-                report_txt_path=report_txt_path,
-                model_name=model_name)
+            log_path = backend_output_path.joinpath('backend', 'test_log.txt')
+            test_lines = get_test_cmd_lines(
+                str(deploy_cfg_path), model_cfg_path, convert_checkpoint_path,
+                device_type, log_path)
+            test_job = scheduler.add(
+                Job(f'test:{backend_output_path}',
+                    partial(run_test_cmd, test_lines, log_path),
+                    deps=[convert_job],
+                    gpus=gpus,
+                    **job_cfg))
+            test_jobs.append(
+                (test_job,
+                 dict(
+                     test_kwargs,
+                     deploy_cfg_path=str(deploy_cfg_path),
+                     convert_checkpoint_path=convert_checkpoint_path,
+                     backend_name=backend_name,
+                     log_path=log_path)))
 
         if sdk_config is not None:
-
+            sdk_model_path = None
             if codebase_name == 'mmpretrain' or codebase_name == 'mmaction':
-                replace_top_in_pipeline_json(backend_output_path, logger)
+                sdk_model_path = backend_output_path
 
-            log_path = gen_log_path(
-                backend_output_path.joinpath('sdk'), 'test_log.txt')
+            log_path = backend_output_path.joinpath('sdk', 'test_log.txt')
+            sdk_device_type = device_type
             if backend_name == 'onnxruntime':
                 # sdk only support onnxruntime of cpu
-                device_type = 'cpu'
+                sdk_device_type = 'cpu'
             # sdk test
-            get_backend_fps_metric(
-                deploy_cfg_path=str(sdk_config),
-                model_cfg_path=model_cfg_path,
-                convert_checkpoint_path=str(backend_output_path),
-                device_type=device_type,
-                logger=logger,
-                pytorch_metric=pytorch_metric,
-                metric_info=metric_info,
-                backend_name=f'SDK-{backend_name}',
-                precision_type=precision_type,
-                convert_result=convert_result,
-                report_dict=report_dict,
-                infer_type=infer_type,
-                log_path=log_path,
-                dataset_info=metafile_dataset,
-                report_txt_path=report_txt_path,
-                model_name=model_name)
-    else:
-        logger.info('Only test convert, saving to report...')
-        metric_list = [{metric: '-'} for metric in metric_info]
-        fps = '-'
-        test_pass = convert_result
-        dataset_type = metafile_dataset['dataset']
-        task_name = metafile_dataset['task']
-        # update the report
-        update_report(
-            report_dict=report_dict,
-            model_name=model_name,
-            model_config=str(model_cfg_path),
-            task_name=task_name,
-            checkpoint=str(report_checkpoint),
-            dataset=dataset_type,
-            backend_name=backend_name,
-            deploy_config=str(deploy_cfg_path),
-            static_or_dynamic=infer_type,
-            precision_type=precision_type,
-            conversion_result=str(convert_result),
-            fps=fps,
-            metric_info=metric_list,
-            test_pass=str(test_pass),
-            report_txt_path=report_txt_path,
-            codebase_name=codebase_name)
+            test_lines = get_test_cmd_lines(
+                str(sdk_config), model_cfg_path, str(backend_output_path),
+                sdk_device_type, log_path)
+            test_job = scheduler.add(
+                Job(f'sdk_test:{backend_output_path}',
+                    partial(run_test_cmd, test_lines, log_path,
+                            sdk_model_path),
+                    deps=[convert_job],
+                    gpus=0 if sdk_device_type == 'cpu' else 1,
+                    **job_cfg))
+            test_jobs.append(
+                (test_job,
+                 dict(
+                     test_kwargs,
+                     deploy_cfg_path=str(sdk_config),
+                     convert_checkpoint_path=str(backend_output_path),
+                     backend_name=f'SDK-{backend_name}',
+                     log_path=log_path)))
+
+    metric_list = [{metric: '-'} for metric in metric_info]
+    convert_row = dict(
+        model_name=model_name,
+        model_config=str(model_cfg_path),
+        task_name=metafile_dataset['task'],
+        checkpoint=str(report_checkpoint),
+        dataset=metafile_dataset['dataset'],
+        backend_name=backend_name,
+        deploy_config=str(deploy_cfg_path),
+        static_or_dynamic=infer_type,
+        precision_type=precision_type,
+        fps='-',
+        metric_info=metric_list,
+        codebase_name=codebase_name)
+    return partial(
+        get_backend_report,
+        convert_job=convert_job,
+        test_jobs=test_jobs,
+        convert_row=convert_row,
+        logger=logger)
 
 
 def save_report(report_info: dict, report_save_path: Path,
@@ -868,6 +1321,24 @@ def _filter_string(inputs):
     return outputs
 
 
+def get_physical_memory() -> float:
+    """Get the physical memory in GB.
+
+    Returns:
+        float: The physical memory, or inf if it is unknown.
+    """
+    try:
+        import psutil
+        return psutil.virtual_memory().total / 2**30
+    except ImportError:
+        pass
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') / \
+            2**30
+    except (AttributeError, ValueError, OSError):
+        return float('inf')
+
+
 def main():
     args = parse_args()
     set_start_method('spawn')
@@ -905,6 +1376,36 @@ def main():
     work_dir = Path(args.work_dir)
     work_dir.mkdir(parents=True, exist_ok=True)
 
+    # the GPU of each job is visible to it as cuda:0
+    if args.gpus is None:
+        gpu_ids = [] if args.device == 'cpu' else \
+            [int(args.device.split(':')[-1]) if ':' in args.device else 0]
+    else:
+        gpu_ids = list(range(args.gpus))
+    device = 'cpu' if len(gpu_ids) == 0 else 'cuda:0'
+    if args.device != 'cpu' and len(gpu_ids) == 0:
+        logger.warning('Device type is forced to cpu since no GPU is given')
+    ram = get_physical_memory() if args.ram is None else args.ram
+    logger.info(f'Run the jobs with {args.cpus} CPU cores, GPUs {gpu_ids} '
+                f'and {ram:.1f}GB RAM.')
+
+    # the IR is passed from the export jobs to the conversions by the cache
+    cache_dir = args.cache_dir
+    if cache_dir is None:
+        cache_dir = str(work_dir.joinpath('cache'))
+    scheduler = JobScheduler(
+        args.cpus,
+        gpu_ids,
+        ram,
+        state_file=work_dir.joinpath('regression_state.json'),
+        resume=args.resume)
+    job_cfg = dict(
+        cpus=args.cpus_per_job,
+        ram=args.ram_per_job,
+        timeout=args.timeout,
+        retries=args.retries)
+
+    reports = []
     deploy_yaml_list = [
         f'./tests/regression/{codebase}.yml' for codebase in args.codebase
     ]
@@ -952,6 +1453,11 @@ def main():
             title_str = title_str[:-1] + '\n'
             f_report.write(title_str)  # clear the report tmp file
 
+        # the functions to get the rows of the report after the jobs
+        report_items = []
+        reports.append((deploy_yaml, report_dict, report_save_path,
+                        report_txt_path, report_items))
+
         models_info = yaml_info.get('models')
         for models in tqdm(models_info):
             model_name_origin = models.get('name', 'model')
@@ -989,13 +1495,33 @@ def main():
                     model_metafile_info.get(model_config).get('Weights')).name
 
                 checkpoint_path = Path(checkpoint_save_dir, checkpoint_name)
-                assert checkpoint_path.exists()
+                deps = []
+                if checkpoint_path.exists() and \
+                        not global_info.get('checkpoint_force_download',
+                                            False):
+                    logger.info(f'model {checkpoint_name} exist, '
+                                'skip download it...')
+                else:
+                    weights_url = \
+                        model_metafile_info.get(model_config).get('Weights')
+                    download_log_path = work_dir.joinpath(
+                        'download_logs', f'{checkpoint_path.stem}.txt')
+                    deps.append(
+                        scheduler.add(
+                            Job(f'download:{checkpoint_path}',
+                                partial(download_checkpoint, weights_url,
+                                        checkpoint_path, download_log_path),
+                                ram=1,
+                                timeout=args.timeout,
+                                retries=args.retries)))
 
                 # Get pytorch from metafile.yml
-                pytorch_metric, metafile_dataset = get_pytorch_result(
-                    model_name_origin, model_metafile_info, checkpoint_path,
-                    model_cfg_path, model_config, metric_info, report_dict,
-                    logger, report_txt_path, global_info.get('codebase_name'))
+                pytorch_metric, metafile_dataset, pytorch_row = \
+                    get_pytorch_result(
+                        model_name_origin, model_metafile_info,
+                        checkpoint_path, model_cfg_path, model_config,
+                        metric_info, logger, global_info.get('codebase_name'))
+                report_items.append(lambda states, row=pytorch_row: [row])
                 for pipeline in pipelines_info:
                     deploy_config = pipeline.get('deploy_config')
                     backend_name = get_backend(deploy_config).name.lower()
@@ -1011,12 +1537,36 @@ def main():
                                        'skip it...')
                         continue
 
-                    get_backend_result(pipeline, model_cfg_path,
-                                       checkpoint_path, work_dir, args.device,
-                                       pytorch_metric, metric_info,
-                                       report_dict, test_type, logger,
-                                       backend_file_name, report_txt_path,
-                                       metafile_dataset, model_name_origin)
+                    report_items.append(
+                        add_backend_jobs(
+                            scheduler,
+                            pipeline,
+                            model_cfg_path,
+                            checkpoint_path,
+                            work_dir,
+                            device,
+                            pytorch_metric,
+                            metric_info,
+                            test_type,
+                            logger,
+                            backend_file_name,
+                            metafile_dataset,
+                            model_name_origin,
+                            cache_dir,
+                            deps=deps,
+                            job_cfg=job_cfg))
+
+    # run the jobs of all the codebases concurrently
+    states = scheduler.run()
+
+    for deploy_yaml, report_dict, report_save_path, report_txt_path, \
+            report_items in reports:
+        for get_rows in report_items:
+            for row in get_rows(states):
+                update_report(
+                    report_dict=report_dict,
+                    report_txt_path=report_txt_path,
+                    **row)
         if len(report_dict.get('Model')) > 0:
             save_report(report_dict, report_save_path, logger)
         else:
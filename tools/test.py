@@ -7,7 +7,7 @@ from mmengine import DictAction
 
 from mmdeploy.apis import build_task_processor
 from mmdeploy.utils.config_utils import load_config
-from mmdeploy.utils.timer import TimeCounter
+from mmdeploy.utils.timer import Profiler, TimeCounter
 
 
 def parse_args():
@@ -65,12 +65,28 @@ def parse_args():
         help='the interval between each log, require setting '
         'speed-test first',
         default=100)
+    parser.add_argument(
+        '--export-json',
+        type=str,
+        help='export latency stats to json file, require setting '
+        'speed-test first')
+    parser.add_argument(
+        '--export-trace',
+        type=str,
+        help='export timeline to file in Chrome trace format, require '
+        'setting speed-test first')
     parser.add_argument(
         '--batch-size',
         type=int,
         default=1,
         help='the batch size for test, would override `samples_per_gpu`'
         'in  data config.')
+    parser.add_argument(
+        '--num-workers',
+        type=int,
+        default=None,
+        help='the number of dataloader workers preparing the data in '
+        'background, would override `num_workers` in data config.')
     parser.add_argument(
         '--uri',
         action='store_true',
@@ -113,10 +129,16 @@ def main():
             dataset.append(ds)
             loader['dataset'] = ds
             loader['batch_size'] = args.batch_size
+            if args.num_workers is not None:
+                loader['num_workers'] = args.num_workers
+                loader['persistent_workers'] = args.num_workers > 0
             loader = task_processor.build_dataloader(loader)
         dataloader = test_dataloader
     else:
         test_dataloader['batch_size'] = args.batch_size
+        if args.num_workers is not None:
+            test_dataloader['num_workers'] = args.num_workers
+            test_dataloader['persistent_workers'] = args.num_workers > 0
         dataset = task_processor.build_dataset(test_dataloader['dataset'])
         test_dataloader['dataset'] = dataset
         dataloader = task_processor.build_dataloader(test_dataloader)
@@ -140,14 +162,21 @@ def main():
 
     if args.speed_test:
         with_sync = not is_device_cpu
+        profiler = Profiler()
 
         with TimeCounter.activate(
                 warmup=args.warmup,
                 log_interval=args.log_interval,
                 with_sync=with_sync,
                 file=args.log2file,
-                batch_size=args.batch_size):
+                batch_size=args.batch_size,
+                profiler=profiler):
             runner.test()
+        profiler.print_stats(batch_size=args.batch_size)
+        if args.export_json:
+            profiler.export_json(args.export_json)
+        if args.export_trace:
+            profiler.export_chrome_trace(args.export_trace)
 
     else:
         runner.test()